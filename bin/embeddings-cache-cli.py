@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+
+import os
+import sys
+import time
+
+from inferbeddings.io import convert_embeddings, load_embeddings_cache
+
+import logging
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def main(argv):
+    def fmt(prog):
+        return argparse.HelpFormatter(prog, max_help_position=100, width=200)
+
+    argparser = argparse.ArgumentParser('Convert GloVe/word2vec embeddings to a memory-mapped binary cache',
+                                        formatter_class=fmt)
+
+    argparser.add_argument('paths', nargs='+', type=str, help='Paths of the embeddings files')
+    argparser.add_argument('--word2vec', action='store_true', default=False,
+                           help='The files are in the word2vec format (default: GloVe)')
+    argparser.add_argument('--text', action='store_true', default=False,
+                           help='The word2vec files are in the text format (default: binary)')
+    argparser.add_argument('--embeddings-cache', action='store', type=str, default=None,
+                           help='Directory of the cache (default: the directory of each embeddings file)')
+    argparser.add_argument('--force', '-f', action='store_true', default=False, help='Rebuild existing caches')
+
+    args = argparser.parse_args(argv)
+
+    for path in args.paths:
+        if not args.force and load_embeddings_cache(path, cache_dir=args.embeddings_cache) is not None:
+            logger.info('{} is already cached'.format(path))
+            continue
+
+        t0 = time.time()
+        vectors_path, _ = convert_embeddings(path, cache_dir=args.embeddings_cache,
+                                             is_word2vec=args.word2vec, binary=not args.text)
+        vocabulary, vectors = load_embeddings_cache(path, cache_dir=args.embeddings_cache)
+        logger.info('{}: {} embeddings of size {} cached in {} ({:.2f}s)'
+                    .format(path, vectors.shape[0], vectors.shape[1], vectors_path, time.time() - t0))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+    main(sys.argv[1:])
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import json
 import logging
 import math
 import sys
@@ -15,17 +16,21 @@ import tensorflow as tf
 from inferbeddings.io import read_triples, save
 from inferbeddings.knowledgebase import Fact, KnowledgeBaseParser
 
-from inferbeddings.parse import parse_clause
+from inferbeddings.parse import load_clauses
 
 from inferbeddings.models import base as models
 from inferbeddings.models import similarities
 
 from inferbeddings.models.training import losses, pairwise_losses, constraints, corrupt, index
-from inferbeddings.models.training.util import make_batches
+from inferbeddings.models.training.util import make_batches, make_bucketed_batches, pad_walks
 
 from inferbeddings.adversarial import Adversarial, GroundLoss
 
+from inferbeddings.walk import PathQuerySampler, held_out_path_queries
+
 from inferbeddings import evaluation
+from inferbeddings import scoring
+from inferbeddings.profiling import PhaseProfiler
 
 logger = logging.getLogger(os.path.basename(sys.argv[0]))
 
@@ -46,6 +51,36 @@ def is_simple_inverse_clause(clause):
     return head.arguments[0].name == atom.arguments[1].name and head.arguments[1].name == atom.arguments[0].name
 
 
+def interleave_versions(versions, batch_start, batch_end):
+    """
+    Builds a training batch where each positive example is followed by its corrupted versions.
+    :param versions: List of (Xr, Xe) pairs - positive examples first, followed by their corrupted versions.
+    :param batch_start: Index of the first example in the batch.
+    :param batch_end: Index following the last example in the batch.
+    :return: (Xr_batch, Xe_batch) pair.
+    """
+    (Xr, Xe), nb_versions = versions[0], len(versions)
+    curr_batch_size = batch_end - batch_start
+
+    Xr_batch = np.zeros((curr_batch_size * nb_versions, Xr.shape[1]), dtype=Xr.dtype)
+    Xe_batch = np.zeros((curr_batch_size * nb_versions, Xe.shape[1]), dtype=Xe.dtype)
+
+    for version_idx, (Xr_version, Xe_version) in enumerate(versions):
+        Xr_batch[version_idx::nb_versions, :] = Xr_version[batch_start:batch_end, :]
+        Xe_batch[version_idx::nb_versions, :] = Xe_version[batch_start:batch_end, :]
+
+    return Xr_batch, Xe_batch
+
+
+def get_engine_parameters(session, model):
+    """
+    Values of the model parameters other than the embeddings, as needed by inferbeddings.scoring engines.
+    """
+    if isinstance(model, models.ERMLP):
+        return dict(zip(['C', 'w'], session.run([model.C, model.w])))
+    return dict()
+
+
 def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed, similarity_name,
           entity_embedding_size, predicate_embedding_size, hidden_size, unit_cube,
           model_name, loss_name, pairwise_loss_name, margin,
@@ -56,7 +91,12 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
           adv_weight_simple, adv_weight_simple_inverse,
           adv_batch_size, adv_init_ground, adv_ground_samples, adv_ground_tol,
           adv_pooling, adv_closed_form,
-          predicate_l2, predicate_norm, debug, debug_embeddings, all_one_entities):
+          predicate_l2, predicate_norm, debug, debug_embeddings, all_one_entities,
+          path_lengths=None, nb_path_queries=None, profiler=None, trace_path=None):
+    if profiler is None:
+        profiler = PhaseProfiler(enabled=False)
+    profiler.start('graph construction')
+
     index_gen = index.GlorotIndexGenerator()
 
     # If adv_weight_simple and adv_weight_simple_inverse are not defined, use the default value adv_weight
@@ -83,6 +123,13 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
 
     nb_samples = Xr.shape[0]
 
+    # Path queries, i.e. multi-hop walks, are sampled from the training graph at each epoch
+    path_sampler = None
+    if path_lengths:
+        path_sampler = PathQuerySampler([(s, p, o) for (p, [s, o]) in train_sequences], seed=seed)
+        if nb_path_queries is None:
+            nb_path_queries = nb_samples
+
     # Number of samples per batch.
     batch_size = math.ceil(nb_samples / nb_batches)
     logger.info("Samples: %d, no. batches: %d -> batch size: %d" % (nb_samples, nb_batches, batch_size))
@@ -94,6 +141,11 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
     # but it can correspond to a sequence of predicates (a walk in the knowledge graph).
     walk_inputs = tf.placeholder(tf.int32, shape=[None, None])
 
+    # Mask for batches of variable-length walks, with 0 for the padding steps - only used by path queries
+    walk_mask = None
+    if path_sampler is not None:
+        walk_mask = tf.placeholder(tf.float32, shape=[None, None])
+
     np.random.seed(seed)
     random_state = np.random.RandomState(seed)
     tf.set_random_seed(seed)
@@ -208,53 +260,57 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
         nb_versions = 4
 
     # Loss function to minimize by means of Stochastic Gradient Descent.
-    fact_loss = 0.0
-    if loss_name is not None:
-        # We are now using a classic (scores, targets) loss from models/training/losses.py
-        loss = losses.get_function(loss_name)
-
-        # Generate a vector of targets - given that each positive example is followed by
-        # two negative examples, create a targets vector like [1, 0, 0, 1, 0, 0, 1, 0, 0 ..]
-        # > tf.cast((tf.range(0, limit=12) % 3) < 1, dtype=tf.int32).eval()
-        # array([1, 0, 0, 1, 0, 0, 1, 0, 0, 1, 0, 0], dtype=int32)
-
-        target = ((tf.range(0, limit=tf.shape(score)[0]) % nb_versions) < 1)
-        fact_loss += loss(score, tf.cast(target, score.dtype), margin=margin)
-    else:
-        # We are now using a pairwise (positives, negatives) loss from models/training/pairwise_losses.py
-
-        # Transform the pairwise loss function in an unary loss function,
-        # where each positive example is followed by two negative examples.
-        def loss_modifier(_loss_function):
-            def unary_function(_score, *_args, **_kwargs):
-                if corrupt_relations:
-                    # if corrupt_relations is true, then nb_versions = 4.
-                    assert nb_versions == 4
-                    # tf.reshape(x, [-1, 4]) turns an [M]-dimensional score vector into a [M/4, 4] dimensional one
-                    # tf.split(1, 4, x) turns a [N, 4]-dimensional score matrix into four [N]-dimensional ones
-                    positive_scores, neg_left, neg_central, neg_right = tf.split(axis=1, num_or_size_splits=nb_versions,
-                                                                                 value=tf.reshape(_score, [-1, nb_versions]))
-                    _loss_left = _loss_function(positive_scores, neg_left, *_args, **_kwargs)
-                    _loss_central = _loss_function(positive_scores, neg_central, *_args, **_kwargs)
-                    _loss_right = _loss_function(positive_scores, neg_right, *_args, **_kwargs)
-                    _loss = _loss_left + _loss_central + _loss_right
-                else:
-                    assert nb_versions == 3
-                    # tf.reshape(x, [-1, 3]) turns an [M]-dimensional score vector into a [M/3, 3] dimensional one
-                    # tf.split(1, 3, x) turns a [N, 3]-dimensional score matrix into three [N]-dimensional ones
-                    positive_scores, negative_scores_left, negative_scores_right = tf.split(axis=1, num_or_size_splits=nb_versions,
-                                                                                            value=tf.reshape(_score, [-1, nb_versions]))
-                    _loss_left = _loss_function(positive_scores, negative_scores_left, *_args, **_kwargs)
-                    _loss_right = _loss_function(positive_scores, negative_scores_right, *_args, **_kwargs)
-                    _loss = _loss_left + _loss_right
-                return _loss
-            return unary_function
-
-        pairwise_loss = loss_modifier(pairwise_losses.get_function(pairwise_loss_name))
-        fact_loss += pairwise_loss(score, margin=margin)
-
-    if predicate_l2 is not None:
-        fact_loss += tf.nn.l2_loss(predicate_embedding_layer)
+    def fact_loss_function(_score):
+        _fact_loss = 0.0
+        if loss_name is not None:
+            # We are now using a classic (scores, targets) loss from models/training/losses.py
+            loss = losses.get_function(loss_name)
+
+            # Generate a vector of targets - given that each positive example is followed by
+            # two negative examples, create a targets vector like [1, 0, 0, 1, 0, 0, 1, 0, 0 ..]
+            # > tf.cast((tf.range(0, limit=12) % 3) < 1, dtype=tf.int32).eval()
+            # array([1, 0, 0, 1, 0, 0, 1, 0, 0, 1, 0, 0], dtype=int32)
+
+            target = ((tf.range(0, limit=tf.shape(_score)[0]) % nb_versions) < 1)
+            _fact_loss += loss(_score, tf.cast(target, _score.dtype), margin=margin)
+        else:
+            # We are now using a pairwise (positives, negatives) loss from models/training/pairwise_losses.py
+
+            # Transform the pairwise loss function in an unary loss function,
+            # where each positive example is followed by two negative examples.
+            def loss_modifier(_loss_function):
+                def unary_function(_score, *_args, **_kwargs):
+                    if corrupt_relations:
+                        # if corrupt_relations is true, then nb_versions = 4.
+                        assert nb_versions == 4
+                        # tf.reshape(x, [-1, 4]) turns an [M]-dimensional score vector into a [M/4, 4] dimensional one
+                        # tf.split(1, 4, x) turns a [N, 4]-dimensional score matrix into four [N]-dimensional ones
+                        positive_scores, neg_left, neg_central, neg_right = tf.split(axis=1, num_or_size_splits=nb_versions,
+                                                                                     value=tf.reshape(_score, [-1, nb_versions]))
+                        _loss_left = _loss_function(positive_scores, neg_left, *_args, **_kwargs)
+                        _loss_central = _loss_function(positive_scores, neg_central, *_args, **_kwargs)
+                        _loss_right = _loss_function(positive_scores, neg_right, *_args, **_kwargs)
+                        _loss = _loss_left + _loss_central + _loss_right
+                    else:
+                        assert nb_versions == 3
+                        # tf.reshape(x, [-1, 3]) turns an [M]-dimensional score vector into a [M/3, 3] dimensional one
+                        # tf.split(1, 3, x) turns a [N, 3]-dimensional score matrix into three [N]-dimensional ones
+                        positive_scores, negative_scores_left, negative_scores_right = tf.split(axis=1, num_or_size_splits=nb_versions,
+                                                                                                value=tf.reshape(_score, [-1, nb_versions]))
+                        _loss_left = _loss_function(positive_scores, negative_scores_left, *_args, **_kwargs)
+                        _loss_right = _loss_function(positive_scores, negative_scores_right, *_args, **_kwargs)
+                        _loss = _loss_left + _loss_right
+                    return _loss
+                return unary_function
+
+            pairwise_loss = loss_modifier(pairwise_losses.get_function(pairwise_loss_name))
+            _fact_loss += pairwise_loss(_score, margin=margin)
+
+        if predicate_l2 is not None:
+            _fact_loss += tf.nn.l2_loss(predicate_embedding_layer)
+        return _fact_loss
+
+    fact_loss = fact_loss_function(score)
 
     loss_function += fact_loss
 
@@ -264,6 +320,14 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
     trainable_var_list = [entity_embedding_layer, predicate_embedding_layer] + model.parameters
     training_step = optimizer.minimize(loss_function, var_list=trainable_var_list)
 
+    # Path queries only contribute to the fact loss, computed on a masked version of the model, so that
+    # the padding steps of variable-length walks are skipped - the masking is not paid by ordinary triples
+    path_training_step, path_fact_loss = None, None
+    if path_sampler is not None:
+        path_model = model_class(walk_mask=walk_mask, reuse_variables=True, **model_parameters)
+        path_fact_loss = fact_loss_function(path_model())
+        path_training_step = optimizer.minimize(path_fact_loss, var_list=trainable_var_list)
+
     # We enforce all entity embeddings to have an unitary norm, or to live in the unit cube.
     entity_projection = constraints.unit_sphere(entity_embedding_layer, norm=1.0)
     if unit_cube:
@@ -284,25 +348,32 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
     init_op = tf.global_variables_initializer()
     session.run(init_op)
 
+    profiler.stop()
+
     prev_embedding_matrix = None
 
     adversarial_training_time = .0
     discriminator_training_time = .0
 
     for epoch in range(1, nb_epochs + 1):
+        profiler.set_epoch(epoch)
 
         # This is a {clause:list[dict]} dictionary that maps each clause to a list[feed_dict], where each feed_dict
         # provides a {variable:entity}
         if clause_to_feed_dicts is not None:
+            profiler.start('ground loss')
             sum_errors = 0
             for clause_idx, clause in enumerate(clauses):
                 nb_errors = ground_loss.zero_one_errors(clause=clause, feed_dicts=clause_to_feed_dicts[clause])
                 logger.info('Epoch: {}\tClause index: {}\tZero-One Errors: {}'.format(epoch, clause_idx, nb_errors))
                 sum_errors += nb_errors
             logger.info('Epoch: {}\tSum of Zero-One Errors: {}'.format(epoch, sum_errors))
+            profiler.stop()
 
         for disc_epoch in range(1, discriminator_epochs + 1):
             discriminator_training_t0 = time.time()
+            profiler.start('discriminator')
+            profiler.start('batch preparation')
 
             order = random_state.permutation(nb_samples)
             Xr_shuf, Xe_shuf = Xr[order, :], Xe[order, :]
@@ -321,20 +392,15 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
             loss_values, violation_loss_values, sar_loss_values = [], [], []
             total_fact_loss_value = 0
 
-            for batch_start, batch_end in batches:
-                curr_batch_size = batch_end - batch_start
-
-                Xr_batch = np.zeros((curr_batch_size * nb_versions, Xr_shuf.shape[1]), dtype=Xr_shuf.dtype)
-                Xe_batch = np.zeros((curr_batch_size * nb_versions, Xe_shuf.shape[1]), dtype=Xe_shuf.dtype)
-
-                Xr_batch[0::nb_versions, :] = Xr_shuf[batch_start:batch_end, :]
-                Xe_batch[0::nb_versions, :] = Xe_shuf[batch_start:batch_end, :]
+            versions = [(Xr_shuf, Xe_shuf), (Xr_sc, Xe_sc), (Xr_oc, Xe_oc)]
+            if corrupt_relations:
+                versions += [(Xr_rc, Xe_rc)]
 
-                Xr_batch[1::nb_versions, :], Xe_batch[1::nb_versions, :] = Xr_sc[batch_start:batch_end, :], Xe_sc[batch_start:batch_end, :]
-                Xr_batch[2::nb_versions, :], Xe_batch[2::nb_versions, :] = Xr_oc[batch_start:batch_end, :], Xe_oc[batch_start:batch_end, :]
+            profiler.stop()
 
-                if corrupt_relations:
-                    Xr_batch[3::nb_versions, :], Xe_batch[3::nb_versions, :] = Xr_rc[batch_start:batch_end, :], Xe_rc[batch_start:batch_end, :]
+            for batch_idx, (batch_start, batch_end) in enumerate(batches):
+                profiler.start('batch preparation')
+                Xr_batch, Xe_batch = interleave_versions(versions, batch_start, batch_end)
 
                 # Safety check - each positive example is followed by two negative (corrupted) examples
                 assert Xr_batch[0] == Xr_batch[1] == Xr_batch[2]
@@ -345,27 +411,87 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
                     assert Xe_batch[0, 1] == Xe_batch[1, 1] == Xe_batch[3, 1]
 
                 loss_args = {walk_inputs: Xr_batch, entity_inputs: Xe_batch}
+                profiler.stop()
+
+                # Trace the first training step of each epoch, if requested
+                run_kwargs, run_metadata = dict(), None
+                if trace_path is not None and disc_epoch == 1 and batch_idx == 0:
+                    run_metadata = tf.RunMetadata()
+                    run_kwargs = dict(options=tf.RunOptions(trace_level=tf.RunOptions.FULL_TRACE),
+                                      run_metadata=run_metadata)
+
+                profiler.start('session.run')
 
                 # Update Parameters and Compute Loss
                 if adv_lr is not None:
                     _, loss_value, fact_loss_value, violation_loss_value = session.run(
-                        [training_step, loss_function, fact_loss, violation_loss], feed_dict=loss_args)
+                        [training_step, loss_function, fact_loss, violation_loss], feed_dict=loss_args, **run_kwargs)
                     violation_loss_values += [violation_loss_value]
                 elif sar_weight is not None:
                     _, loss_value, fact_loss_value, sar_loss_value = session.run([training_step, loss_function, fact_loss, sar_loss],
-                                                                                 feed_dict=loss_args)
+                                                                                 feed_dict=loss_args, **run_kwargs)
                     sar_loss_values += [sar_loss_value]
                 else:
                     _, loss_value, fact_loss_value = session.run([training_step, loss_function, fact_loss],
-                                                                 feed_dict=loss_args)
+                                                                 feed_dict=loss_args, **run_kwargs)
+
+                profiler.stop()
+
+                if run_metadata is not None:
+                    from tensorflow.python.client import timeline
+                    epoch_trace_path = '{}.epoch{}.json'.format(trace_path, epoch)
+                    with open(epoch_trace_path, 'w') as f:
+                        f.write(timeline.Timeline(run_metadata.step_stats).generate_chrome_trace_format())
+                    logger.info('Trace of the first training step of epoch {} saved in {}'.format(epoch, epoch_trace_path))
 
                 loss_values += [loss_value / (Xr_batch.shape[0] / nb_versions)]
                 total_fact_loss_value += fact_loss_value
 
                 # Project parameters
+                profiler.start('projection')
                 for projection_step in projection_steps:
                     session.run(projection_step)
+                profiler.stop()
+
+            path_loss_values = []
+            if path_sampler is not None:
+                profiler.start('path queries')
+                # Walks of all lengths are padded, and grouped by length in batches so that little computation
+                # is spent on padding steps, which are masked in the walk embeddings
+                path_walks, path_entities = [], []
+                for path_length in path_lengths:
+                    Xr_path, Xe_path = path_sampler(nb_path_queries, path_length)
+                    path_walks += list(Xr_path)
+                    path_entities += [Xe_path]
+
+                Xr_path, mask_path = pad_walks(path_walks)
+                Xe_path = np.concatenate(path_entities, axis=0)
+                path_lengths_arr = mask_path.sum(axis=1).astype(np.int64)
+
+                path_versions = [(Xr_path, Xe_path),
+                                 subject_corruptor(Xr_path, Xe_path), object_corruptor(Xr_path, Xe_path)]
+                if corrupt_relations:
+                    path_versions += [relation_corruptor(Xr_path, Xe_path)]
 
+                for batch_idxs in make_bucketed_batches(path_lengths_arr, batch_size, random_state=random_state):
+                    # Only keep as many steps as the longest walk in the batch
+                    batch_length = path_lengths_arr[batch_idxs].max()
+                    batch_versions = [(Xr_version[batch_idxs, :batch_length], Xe_version[batch_idxs])
+                                      for (Xr_version, Xe_version) in path_versions]
+                    Xr_batch, Xe_batch = interleave_versions(batch_versions, 0, len(batch_idxs))
+                    mask_batch = np.repeat(mask_path[batch_idxs, :batch_length], len(path_versions), axis=0)
+
+                    _, path_loss_value = session.run([path_training_step, path_fact_loss],
+                                                     feed_dict={walk_inputs: Xr_batch, entity_inputs: Xe_batch,
+                                                                walk_mask: mask_batch})
+                    path_loss_values += [path_loss_value / len(batch_idxs)]
+
+                    for projection_step in projection_steps:
+                        session.run(projection_step)
+
+                profiler.stop()
+
+            profiler.stop()
             discriminator_training_t1 = time.time()
             discriminator_training_time += discriminator_training_t1 - discriminator_training_t0
 
@@ -376,6 +502,8 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
             if sar_weight:
                 logger.info('Epoch: {0}/{1}\tSAR Loss: {2}'.format(epoch, disc_epoch, stats(sar_loss_values)))
             logger.info('Epoch: {0}/{1}\tFact Loss: {2:.4f}'.format(epoch, disc_epoch, total_fact_loss_value))
+            if path_loss_values:
+                logger.info('Epoch: {0}/{1}\tPath Loss: {2}'.format(epoch, disc_epoch, stats(path_loss_values)))
 
             if adv_lr is not None:
                 logger.info(
@@ -397,6 +525,7 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
                 sys.exit(0)
 
         if adv_lr is not None:
+            profiler.start('adversary')
             logger.info('Finding violators ..')
 
             session.run([initialize_violators, adversarial_optimizer_variables_initializer])
@@ -446,6 +575,8 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
                 }
                 save('{}_adversary_{}.pkl'.format(debug_embeddings, epoch), objects_to_serialize)
 
+            profiler.stop()
+
         if debug:
             from inferbeddings.visualization import hinton_diagram
 
@@ -463,9 +594,12 @@ def train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed
 
             prev_embedding_matrix = embedding_matrix
 
+    profiler.set_epoch(None)
+
     objects = {
         'entity_embedding_layer': entity_embedding_layer,
-        'predicate_embedding_layer': predicate_embedding_layer
+        'predicate_embedding_layer': predicate_embedding_layer,
+        'model': model
     }
 
     logger.info('Total Discriminator Training Time (seconds): {}'.format(discriminator_training_time))
@@ -532,6 +666,20 @@ def main(argv):
 
     argparser.add_argument('--auc', '-a', action='store_true',
                            help='Measure the predictive accuracy using AUC-PR and AUC-ROC')
+    argparser.add_argument('--auc-batch-size', action='store', type=int, default=None,
+                           help='Score triples in chunks of this size when computing AUC-PR and AUC-ROC')
+    argparser.add_argument('--auc-max-exact-size', action='store', type=int, default=2 ** 20,
+                           help='Above this number of triples, AUC-PR and AUC-ROC are computed from a score histogram')
+    argparser.add_argument('--auc-nb-bins', action='store', type=int, default=2 ** 16,
+                           help='Number of bins of the score histogram used for AUC-PR and AUC-ROC')
+    argparser.add_argument('--path-lengths', nargs='+', type=int, default=None,
+                           help='Also train on path queries (multi-hop walks) with these lengths')
+    argparser.add_argument('--nb-path-queries', action='store', type=int, default=None,
+                           help='Number of path queries of each length sampled at each epoch (default: no. of training triples)')
+    argparser.add_argument('--path-eval-queries', action='store', type=int, default=None,
+                           help='Number of path queries of each length sampled for the validation and test evaluation')
+    argparser.add_argument('--eval-workers', action='store', type=int, default=None,
+                           help='Number of worker processes used for computing the ranks of validation and test triples')
     argparser.add_argument('--map', action='store_true',
                            help='Measure the predictive accuracy using Mean Average Precision (MAP)')
     argparser.add_argument('--seed', '-S', action='store', type=int, default=0, help='Seed for the PRNG')
@@ -585,8 +733,19 @@ def main(argv):
 
     argparser.add_argument('--materialize', action='store_true',
                            help='Materialize all facts using clauses and logical inference')
+    argparser.add_argument('--materialize-cache', action='store', type=str, default=None,
+                           help='Directory used for caching (and incrementally updating) materialized facts')
     argparser.add_argument('--save', action='store', type=str, default=None,
                            help='Path for saving the serialized model')
+    argparser.add_argument('--export', action='store', type=str, default=None,
+                           help='Directory for exporting the embeddings as memory-mappable .npy files and a manifest')
+    argparser.add_argument('--results-json', action='store', type=str, default=None,
+                           help='Path for saving the evaluation results as JSON')
+
+    argparser.add_argument('--profile', action='store_true',
+                           help='Report the time spent in each phase of training and evaluation')
+    argparser.add_argument('--profile-trace', action='store', type=str, default=None,
+                           help='Path prefix for saving a TensorFlow trace of the first training step of each epoch')
 
     args = argparser.parse_args(argv)
 
@@ -611,6 +770,10 @@ def main(argv):
         predicate_embedding_size = entity_embedding_size
 
     is_auc, is_map = args.auc, args.map
+    auc_parameters = dict(batch_size=args.auc_batch_size, nb_bins=args.auc_nb_bins,
+                          max_exact_size=args.auc_max_exact_size)
+    eval_workers = args.eval_workers
+    path_lengths, nb_path_queries, path_eval_queries = args.path_lengths, args.nb_path_queries, args.path_eval_queries
     seed = args.seed
     debug = args.debug
     debug_embeddings = args.debug_embeddings
@@ -632,7 +795,13 @@ def main(argv):
     head_subsample_size = args.head_subsample_size
 
     save_path = args.save
+    results_json_path = args.results_json
+    export_path = args.export
     is_materialize = args.materialize
+    materialize_cache_path = args.materialize_cache
+
+    profiler = PhaseProfiler(enabled=args.profile)
+    profiler.start('data loading')
 
     assert train_path is not None
     pos_train_triples, _ = read_triples(train_path)
@@ -660,6 +829,9 @@ def main(argv):
     def fact(s, p, o):
         return Fact(predicate_name=p, argument_names=[s, o])
 
+    profiler.stop()
+    profiler.start('parsing')
+
     train_facts = [fact(s, p, o) for s, p, o in pos_train_triples]
 
     valid_facts = [fact(s, p, o) for s, p, o in pos_valid_triples] if pos_valid_triples is not None else []
@@ -682,6 +854,8 @@ def main(argv):
 
     logger.info('#Entities: {}\t#Predicates: {}'.format(nb_entities, nb_predicates))
 
+    profiler.stop()
+
     # Subsampling training facts for X-shot learning
     if subsample_size is not None and subsample_size < 1:
         assert subsample_size >= .0
@@ -700,8 +874,7 @@ def main(argv):
     if clauses_paths is not None:
         clauses = []
         for clauses_path in clauses_paths:
-            with open(clauses_path, 'r') as f:
-                clauses += [parse_clause(line.strip()) for line in f.readlines()]
+            clauses += load_clauses(clauses_path)
 
     # Subsampling training facts that appear in the clause heads for X-shot learning
     if head_subsample_size is not None and head_subsample_size < 1:
@@ -741,6 +914,7 @@ def main(argv):
         train_facts = _train_facts
 
     if is_materialize:
+        profiler.start('materialization')
         logger.info('Materializing the Knowledge Base using Logical Inference')
         assert clauses is not None
 
@@ -759,7 +933,11 @@ def main(argv):
 
         print(clauses_to_materialize)
 
-        from inferbeddings.logic import materialize
+        if materialize_cache_path is not None:
+            from inferbeddings.logic import MaterializationCache
+            materialize = MaterializationCache(materialize_cache_path)
+        else:
+            from inferbeddings.logic import materialize
         inferred_train_facts = materialize(train_facts, clauses_to_materialize, parser)
         nb_inferred_facts = len(set(inferred_train_facts))
         logger.info('Number of (new) inferred unique facts: {}'.format(nb_inferred_facts - nb_train_facts))
@@ -768,6 +946,7 @@ def main(argv):
         assert nb_inferred_facts >= nb_train_facts
 
         train_facts = inferred_train_facts
+        profiler.stop()
 
     train_sequences = parser.facts_to_sequences(train_facts)
 
@@ -797,6 +976,7 @@ def main(argv):
             # assert set([(s, p, o) for (p, [s, o]) in test_sequences]) & set([(s, p, o) for (p, [s, o]) in train_sequences]) == set()
 
     with tf.Session(config=sess_config) as session:
+        profiler.start('training')
         scoring_function, objects = train(session, train_sequences, nb_entities, nb_predicates, nb_batches, seed,
                                           similarity_name,
                                           entity_embedding_size, predicate_embedding_size, hidden_size, unit_cube,
@@ -808,7 +988,10 @@ def main(argv):
                                           adv_weight_simple, adv_weight_simple_inverse,
                                           adv_batch_size, adv_init_ground, adv_ground_samples, adv_ground_tol,
                                           adv_pooling, adv_closed_form,
-                                          predicate_l2, predicate_norm, debug, debug_embeddings, all_one_entities)
+                                          predicate_l2, predicate_norm, debug, debug_embeddings, all_one_entities,
+                                          path_lengths=path_lengths, nb_path_queries=nb_path_queries,
+                                          profiler=profiler, trace_path=args.profile_trace)
+        profiler.stop()
 
         if args.debug_scores is not None:
             # Print the scores of all triples contained in args.debug_scores
@@ -836,6 +1019,15 @@ def main(argv):
             save_path = saver.save(session, '{}.model.ckpt'.format(save_path))
             logger.info('Model saved in {}'.format(save_path))
 
+        if export_path is not None:
+            scoring.export_embeddings(export_path, model_name, similarity_name,
+                                      objects['entity_embedding_layer'].eval(),
+                                      objects['predicate_embedding_layer'].eval(),
+                                      entity_to_index=parser.entity_to_index,
+                                      predicate_to_index=parser.predicate_to_index,
+                                      parameters=get_engine_parameters(session, objects['model']),
+                                      metadata={'command_line': argv})
+
         train_triples = [(s, p, o) for (p, [s, o]) in train_sequences]
 
         valid_triples = [(s, p, o) for (p, [s, o]) in valid_sequences]
@@ -852,27 +1044,77 @@ def main(argv):
 
         true_triples = train_triples + valid_triples + test_triples
 
+        results = dict()
+
+        profiler.start('evaluation')
+
+        ranker = None
+        if eval_workers is not None:
+            # Rank triples in worker processes, using a NumPy version of the model on the trained embeddings;
+            # the workers are started once, and shared by the validation and test evaluations
+            engine_class = scoring.get_function(model_name)
+            engine = engine_class(objects['entity_embedding_layer'].eval(),
+                                  objects['predicate_embedding_layer'].eval(),
+                                  similarity_name=similarity_name,
+                                  parameters=get_engine_parameters(session, objects['model']))
+            ranker = evaluation.ParallelRanker(engine, nb_entities, true_triples=true_triples, nb_workers=eval_workers)
+
         if valid_triples:
             if is_auc:
                 evaluation.evaluate_auc(scoring_function, valid_triples, valid_triples_neg,
-                                        nb_entities, nb_predicates, tag='valid')
+                                        nb_entities, nb_predicates, tag='valid', results=results,
+                                        **auc_parameters)
             elif is_map:
-                evaluation.evaluate_map(scoring_function, valid_triples, valid_triples_neg, tag='valid')
+                evaluation.evaluate_map(scoring_function, valid_triples, valid_triples_neg, tag='valid', results=results)
             else:
                 evaluation.evaluate_ranks(scoring_function, valid_triples,
                                           nb_entities, true_triples=true_triples, tag='valid',
-                                          verbose=args.debug_results, index_to_predicate=parser.index_to_predicate)
+                                          verbose=args.debug_results, index_to_predicate=parser.index_to_predicate,
+                                          results=results, ranker=ranker)
 
         if test_triples:
             if is_auc:
                 evaluation.evaluate_auc(scoring_function, test_triples, test_triples_neg,
-                                        nb_entities, nb_predicates, tag='test')
+                                        nb_entities, nb_predicates, tag='test', results=results,
+                                        **auc_parameters)
             elif is_map:
-                evaluation.evaluate_map(scoring_function, test_triples, test_triples_neg, tag='test')
+                evaluation.evaluate_map(scoring_function, test_triples, test_triples_neg, tag='test', results=results)
             else:
                 evaluation.evaluate_ranks(scoring_function, test_triples,
                                           nb_entities, true_triples=true_triples, tag='test',
-                                          verbose=args.debug_results, index_to_predicate=parser.index_to_predicate)
+                                          verbose=args.debug_results, index_to_predicate=parser.index_to_predicate,
+                                          results=results, ranker=ranker)
+
+        if path_lengths and path_eval_queries:
+            for path_tag, path_triples in [('valid', valid_triples), ('test', test_triples)]:
+                if not path_triples:
+                    continue
+                for path_length in path_lengths:
+                    # Path queries involving at least one triple that is not in the training set
+                    walks, walk_entities = held_out_path_queries(train_triples, train_triples + path_triples,
+                                                                 nb_queries=path_eval_queries, length=path_length,
+                                                                 nb_entities=nb_entities, seed=seed)
+                    logger.info('Evaluating {} {} path queries of length {}'
+                                .format(walks.shape[0], path_tag, path_length))
+                    if walks.shape[0] > 0:
+                        evaluation.evaluate_path_ranks(scoring_function, walks, walk_entities, nb_entities,
+                                                       true_triples=true_triples,
+                                                       tag='{} paths ({})'.format(path_tag, path_length),
+                                                       results=results)
+
+        if ranker is not None:
+            ranker.close()
+
+        profiler.stop()
+        profiler.log_report()
+
+        if results_json_path is not None:
+            results_json = {'command_line': argv, 'results': results}
+            if profiler.enabled:
+                results_json['profile'] = profiler.to_json()
+            with open(results_json_path, 'w') as f:
+                json.dump(results_json, f, indent=2)
+            logger.info('Results saved in {}'.format(results_json_path))
 
 
 if __name__ == '__main__':
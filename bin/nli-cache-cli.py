@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+
+import os
+import sys
+import time
+
+from inferbeddings.nli import corpus
+
+import logging
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def main(argv):
+    def fmt(prog):
+        return argparse.HelpFormatter(prog, max_help_position=100, width=200)
+
+    argparser = argparse.ArgumentParser('Build the tokenized cache of SNLI/MultiNLI corpora', formatter_class=fmt)
+
+    argparser.add_argument('paths', nargs='*', type=str,
+                           default=['data/snli/snli_1.0_train.jsonl.gz',
+                                    'data/snli/snli_1.0_dev.jsonl.gz',
+                                    'data/snli/snli_1.0_test.jsonl.gz'],
+                           help='Paths of the .jsonl.gz corpora')
+    argparser.add_argument('--lower', '-l', action='store_true', default=False, help='Lowercase the corpus')
+    argparser.add_argument('--corpus-cache', action='store', type=str, default=None,
+                           help='Directory of the tokenized corpus cache (default: the directory of each corpus)')
+    argparser.add_argument('--nb-workers', '-w', action='store', type=int, default=None,
+                           help='Number of processes used for parsing (default: number of CPUs)')
+    argparser.add_argument('--force', '-f', action='store_true', default=False, help='Rebuild existing caches')
+
+    args = argparser.parse_args(argv)
+
+    for path in args.paths:
+        cache_path = corpus.cache_path(path, is_lower=args.lower, cache_dir=args.corpus_cache)
+        if args.force and os.path.isfile(cache_path):
+            os.remove(cache_path)
+
+        t0 = time.time()
+        data_corpus = corpus.load_corpus(path, is_lower=args.lower, cache_dir=args.corpus_cache,
+                                         nb_workers=args.nb_workers)
+        logger.info('{}: {} instances, {} tokens, {} distinct tokens ({:.2f}s)'
+                    .format(path, len(data_corpus), data_corpus.tokens.shape[0],
+                            len(data_corpus.vocabulary), time.time() - t0))
+
+        t0 = time.time()
+        corpus.load_corpus(path, is_lower=args.lower, cache_dir=args.corpus_cache)
+        logger.info('{}: loaded from {} in {:.3f}s'.format(path, cache_path, time.time() - t0))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+    main(sys.argv[1:])
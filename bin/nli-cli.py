@@ -5,6 +5,7 @@ import argparse
 
 import os
 import sys
+import time
 
 import pickle
 
@@ -14,7 +15,8 @@ import tensorflow as tf
 from inferbeddings.io import load_glove, load_word2vec, load_glove_words, load_word2vec_words
 from inferbeddings.models.training.util import make_batches
 
-from inferbeddings.nli import util, tfutil
+from inferbeddings.nli import util, tfutil, corpus
+from inferbeddings.nli.sampler import BucketSampler, BatchPrefetcher, EpochStatistics
 from inferbeddings.nli import ConditionalBiLSTM, FeedForwardDAM, FeedForwardDAMP, FeedForwardDAMS, ESIMv1
 
 from inferbeddings.nli.regularizers.base import contradiction_symmetry_l2
@@ -66,6 +68,10 @@ def main(argv):
     argparser.add_argument('--has-eos', action='store_true', default=False, help='Has <End Of Sentence> token')
     argparser.add_argument('--has-unk', action='store_true', default=False, help='Has <Unknown Word> token')
     argparser.add_argument('--lower', '-l', action='store_true', default=False, help='Lowercase the corpus')
+    argparser.add_argument('--corpus-cache', action='store', type=str, default=None,
+                           help='Directory of the tokenized corpus cache (default: the directory of each corpus)')
+    argparser.add_argument('--embeddings-cache', action='store', type=str, default=None,
+                           help='Directory of the binary cache of the pre-trained embeddings (default: no cache)')
 
     argparser.add_argument('--initialize-embeddings', '-i', action='store', type=str, default=None,
                            choices=['normal', 'uniform'])
@@ -75,7 +81,19 @@ def main(argv):
     argparser.add_argument('--only-use-pretrained-embeddings', '-p', action='store_true',
                            help='Only use pre-trained word embeddings')
     argparser.add_argument('--train-special-token-embeddings', '-s', action='store_true')
-    argparser.add_argument('--semi-sort', '-S', action='store_true')
+    argparser.add_argument('--semi-sort', '-S', action='store_true',
+                           help='Group sentence pairs with similar lengths in the same batches')
+    argparser.add_argument('--nb-buckets', action='store', type=int, default=10,
+                           help='Number of premise and hypothesis length buckets used by --semi-sort')
+    argparser.add_argument('--max-tokens', action='store', type=int, default=None,
+                           help='Maximum number of tokens, including padding, in a batch (replaces --batch-size)')
+    argparser.add_argument('--prefetch', action='store', type=int, default=4,
+                           help='Number of batches assembled in advance (0: assemble batches in the training loop)')
+    argparser.add_argument('--input-threads', action='store', type=int, default=1,
+                           help='Number of threads assembling batches')
+    argparser.add_argument('--accumulate', action='store', type=int, default=1,
+                           help='Number of batches whose gradients are accumulated before each update, '
+                                'i.e. the effective batch contains --accumulate batches')
 
     argparser.add_argument('--save', action='store', type=str, default=None)
     argparser.add_argument('--hard-save', action='store', type=str, default=None)
@@ -138,6 +156,8 @@ def main(argv):
     has_eos = args.has_eos
     has_unk = args.has_unk
     is_lower = args.lower
+    corpus_cache_dir = args.corpus_cache
+    embeddings_cache_dir = args.embeddings_cache
 
     initialize_embeddings = args.initialize_embeddings
 
@@ -146,6 +166,11 @@ def main(argv):
     is_only_use_pretrained_embeddings = args.only_use_pretrained_embeddings
     is_train_special_token_embeddings = args.train_special_token_embeddings
     is_semi_sort = args.semi_sort
+    nb_buckets = args.nb_buckets
+    max_tokens = args.max_tokens
+    prefetch_capacity = args.prefetch
+    nb_input_threads = args.input_threads
+    nb_accumulation_steps = args.accumulate
 
     logger.info('has_bos: {}, has_eos: {}, has_unk: {}'.format(has_bos, has_eos, has_unk))
     logger.info('is_lower: {}, is_fixed_embeddings: {}, is_normalize_embeddings: {}'
@@ -202,10 +227,12 @@ def main(argv):
     tf.set_random_seed(seed)
 
     logger.debug('Reading corpus ..')
-    train_is, dev_is, test_is = util.SNLI.generate(train_path=train_path, valid_path=valid_path, test_path=test_path, is_lower=is_lower)
+    train_corpus, dev_corpus, test_corpus = corpus.load_corpora(train_path=train_path, valid_path=valid_path,
+                                                                test_path=test_path, is_lower=is_lower,
+                                                                cache_dir=corpus_cache_dir)
 
-    logger.info('Train size: {}\tDev size: {}\tTest size: {}'.format(len(train_is), len(dev_is), len(test_is)))
-    all_is = train_is + dev_is + test_is
+    logger.info('Train size: {}\tDev size: {}\tTest size: {}'
+                .format(len(train_corpus), len(dev_corpus), len(test_corpus)))
 
     # Enumeration of tokens start at index=3:
     # index=0 PADDING, index=1 START_OF_SENTENCE, index=2 END_OF_SENTENCE, index=3 UNKNOWN_WORD
@@ -213,32 +240,25 @@ def main(argv):
     start_idx = 1 + (1 if has_bos else 0) + (1 if has_eos else 0) + (1 if has_unk else 0)
 
     if not restore_path:
-        # Create a sequence of tokens containing all sentences in the dataset
-        token_seq = []
-        for instance in all_is:
-            token_seq += instance['sentence1_parse_tokens'] + instance['sentence2_parse_tokens']
+        # Count the number of occurrences of each token in all sentences in the dataset
+        all_token_counts = corpus.token_counts([train_corpus, dev_corpus, test_corpus])
 
-        token_set = set(token_seq)
+        token_set = set(all_token_counts.keys())
         allowed_words = None
         if is_only_use_pretrained_embeddings:
             assert (glove_path is not None) or (word2vec_path is not None)
             if glove_path:
                 logger.info('Loading GloVe words from {}'.format(glove_path))
                 assert os.path.isfile(glove_path)
-                allowed_words = load_glove_words(path=glove_path, words=token_set)
+                allowed_words = load_glove_words(path=glove_path, words=token_set, cache_dir=embeddings_cache_dir)
             elif word2vec_path:
                 logger.info('Loading word2vec words from {}'.format(word2vec_path))
                 assert os.path.isfile(word2vec_path)
-                allowed_words = load_word2vec_words(path=word2vec_path, words=token_set)
+                allowed_words = load_word2vec_words(path=word2vec_path, words=token_set, cache_dir=embeddings_cache_dir)
             logger.info('Number of allowed words: {}'.format(len(allowed_words)))
 
-        # Count the number of occurrences of each token
-        token_counts = dict()
-        for token in token_seq:
-            if (allowed_words is None) or (token in allowed_words):
-                if token not in token_counts:
-                    token_counts[token] = 0
-                token_counts[token] += 1
+        token_counts = {token: count for token, count in all_token_counts.items()
+                        if (allowed_words is None) or (token in allowed_words)}
 
         # Sort the tokens according to their frequency and lexicographic ordering
         sorted_vocabulary = sorted(token_counts.keys(), key=lambda t: (- token_counts[t], t))
@@ -275,15 +295,13 @@ def main(argv):
                 bos_idx=bos_idx, eos_idx=eos_idx, unk_idx=unk_idx,
                 max_len=max_len)
 
-    train_dataset = util.instances_to_dataset(train_is, token_to_index, label_to_index, **args)
-    dev_dataset = util.instances_to_dataset(dev_is, token_to_index, label_to_index, **args)
-    test_dataset = util.instances_to_dataset(test_is, token_to_index, label_to_index, **args)
+    # Sentences are stored as ragged arrays, and each batch is only padded to its longest sentence
+    train_dataset = train_corpus.to_ragged_dataset(token_to_index, label_to_index, **args)
+    dev_dataset = dev_corpus.to_ragged_dataset(token_to_index, label_to_index, **args)
+    test_dataset = test_corpus.to_ragged_dataset(token_to_index, label_to_index, **args)
 
-    sentence1 = train_dataset['sentence1']
-    sentence1_length = train_dataset['sentence1_length']
-    sentence2 = train_dataset['sentence2']
-    sentence2_length = train_dataset['sentence2_length']
-    label = train_dataset['label']
+    sentence1_length = train_dataset.sentence1_length
+    sentence2_length = train_dataset.sentence2_length
 
     sentence1_ph = tf.placeholder(dtype=tf.int32, shape=[None, None], name='sentence1')
     sentence2_ph = tf.placeholder(dtype=tf.int32, shape=[None, None], name='sentence2')
@@ -307,11 +325,11 @@ def main(argv):
         if glove_path:
             logger.info('Loading GloVe word embeddings from {}'.format(glove_path))
             assert os.path.isfile(glove_path)
-            token_to_embedding = load_glove(glove_path, token_set)
+            token_to_embedding = load_glove(glove_path, token_set, cache_dir=embeddings_cache_dir)
         elif word2vec_path:
             logger.info('Loading word2vec word embeddings from {}'.format(word2vec_path))
             assert os.path.isfile(word2vec_path)
-            token_to_embedding = load_word2vec(word2vec_path, token_set)
+            token_to_embedding = load_word2vec(word2vec_path, token_set, cache_dir=embeddings_cache_dir)
 
     discriminator_scope_name = 'discriminator'
     with tf.variable_scope(discriminator_scope_name):
@@ -389,7 +407,11 @@ def main(argv):
 
     discriminator_optimizer_scope_name = 'discriminator_optimizer'
     with tf.variable_scope(discriminator_optimizer_scope_name):
-        if clip_value:
+        if nb_accumulation_steps > 1:
+            accumulation_weight_ph, accumulate_gradients, apply_accumulated_gradients, reset_accumulated_gradients = \
+                tfutil.gradient_accumulator(optimizer, loss, var_list=trainable_discriminator_vars,
+                                            clip_value=clip_value)
+        elif clip_value:
             gradients, v = zip(*optimizer.compute_gradients(loss, var_list=trainable_discriminator_vars))
             gradients, _ = tf.clip_by_global_norm(gradients, clip_value)
             training_step = optimizer.apply_gradients(zip(gradients, v))
@@ -399,13 +421,15 @@ def main(argv):
     discriminator_optimizer_vars = tfutil.get_variables_in_scope(discriminator_optimizer_scope_name)
     discriminator_optimizer_init_op = tf.variables_initializer(discriminator_optimizer_vars)
 
-    token_idx_ph = tf.placeholder(dtype=tf.int32, name='word_idx')
-    token_embedding_ph = tf.placeholder(dtype=tf.float32, shape=[None], name='word_embedding')
+    token_idxs_ph = tf.placeholder(dtype=tf.int32, shape=[None], name='word_idxs')
+    token_embeddings_ph = tf.placeholder(dtype=tf.float32, shape=[None, embedding_size], name='word_embeddings')
 
     if is_train_special_token_embeddings:
-        assign_token_embedding = embedding_layer_words[token_idx_ph - nb_special_tokens, :].assign(token_embedding_ph)
+        # Rows of the word embedding table are offset by the number of special tokens
+        assign_token_embeddings = tfutil.scatter_rows(embedding_layer_words, token_idxs_ph, token_embeddings_ph,
+                                                      offset=nb_special_tokens)
     else:
-        assign_token_embedding = embedding_layer[token_idx_ph, :].assign(token_embedding_ph)
+        assign_token_embeddings = tfutil.scatter_rows(embedding_layer, token_idxs_ph, token_embeddings_ph)
 
     init_projection_steps = []
     learning_projection_steps = []
@@ -450,38 +474,16 @@ def main(argv):
 
             adversarial_pooling = name_to_adversarial_pooling[adversarial_pooling_name]
 
-            if rule1_weight:
-                rule1_loss, rule1_vars = adversarial.rule1_loss()
-                adversary_loss += rule1_weight * adversarial_pooling(rule1_loss)
-                adversary_vars += rule1_vars
-            if rule2_weight:
-                rule2_loss, rule2_vars = adversarial.rule2_loss()
-                adversary_loss += rule2_weight * adversarial_pooling(rule2_loss)
-                adversary_vars += rule2_vars
-            if rule3_weight:
-                rule3_loss, rule3_vars = adversarial.rule3_loss()
-                adversary_loss += rule3_weight * adversarial_pooling(rule3_loss)
-                adversary_vars += rule3_vars
-            if rule4_weight:
-                rule4_loss, rule4_vars = adversarial.rule4_loss()
-                adversary_loss += rule4_weight * adversarial_pooling(rule4_loss)
-                adversary_vars += rule4_vars
-            if rule5_weight:
-                rule5_loss, rule5_vars = adversarial.rule5_loss()
-                adversary_loss += rule5_weight * adversarial_pooling(rule5_loss)
-                adversary_vars += rule5_vars
-            if rule6_weight:
-                rule6_loss, rule6_vars = adversarial.rule6_loss()
-                adversary_loss += rule6_weight * adversarial_pooling(rule6_loss)
-                adversary_vars += rule6_vars
-            if rule7_weight:
-                rule7_loss, rule7_vars = adversarial.rule7_loss()
-                adversary_loss += rule7_weight * adversarial_pooling(rule7_loss)
-                adversary_vars += rule7_vars
-            if rule8_weight:
-                rule8_loss, rule8_vars = adversarial.rule8_loss()
-                adversary_loss += rule8_weight * adversarial_pooling(rule8_loss)
-                adversary_vars += rule8_vars
+            rule_idx_to_weight = {
+                1: rule1_weight, 2: rule2_weight, 3: rule3_weight, 4: rule4_weight,
+                5: rule5_weight, 6: rule6_weight, 7: rule7_weight, 8: rule8_weight
+            }
+            rule_idxs = [rule_idx for rule_idx, rule_weight in sorted(rule_idx_to_weight.items()) if rule_weight]
+
+            # The model is applied once to the sentence pairs of all rules
+            for rule_idx, (rule_loss, rule_vars) in zip(rule_idxs, adversarial.rule_losses(rule_idxs)):
+                adversary_loss += rule_idx_to_weight[rule_idx] * adversarial_pooling(rule_loss)
+                adversary_vars += rule_vars
 
             loss += adversary_loss
 
@@ -545,70 +547,84 @@ def main(argv):
 
             # Initialising pre-trained embeddings
             logger.info('Initialising the embeddings pre-trained vectors ..')
-            for token in token_to_embedding:
-                token_idx, token_embedding = token_to_index[token], token_to_embedding[token]
-                assert embedding_size == len(token_embedding)
-                session.run(assign_token_embedding,
+            if len(token_to_embedding) > 0:
+                token_idxs, token_embeddings = util.pretrained_embeddings(token_to_index, token_to_embedding,
+                                                                          embedding_size)
+                session.run(assign_token_embeddings,
                             feed_dict={
-                                token_idx_ph: token_idx,
-                                token_embedding_ph: token_embedding
+                                token_idxs_ph: token_idxs,
+                                token_embeddings_ph: token_embeddings
                             })
             logger.info('Done!')
 
             for adversary_projection_step in init_projection_steps:
                 session.run([adversary_projection_step])
 
-        nb_instances = sentence1.shape[0]
+        if nb_accumulation_steps > 1:
+            # Gradient accumulators are not part of the checkpoints
+            session.run(reset_accumulated_gradients)
+
+        nb_instances = len(train_dataset)
         batches = make_batches(size=nb_instances, batch_size=batch_size)
 
+        sampler = None
+        if is_semi_sort or max_tokens is not None:
+            sampler = BucketSampler(sentence1_length, sentence2_length, nb_buckets=nb_buckets if is_semi_sort else 1,
+                                    batch_size=batch_size if max_tokens is None else None, max_tokens=max_tokens,
+                                    random_state=random_state)
+
         best_dev_acc, best_test_acc = None, None
         discriminator_batch_counter = 0
 
         for epoch in range(1, nb_epochs + 1):
 
             for d_epoch in range(1, nb_discriminator_epochs + 1):
-                order = random_state.permutation(nb_instances)
+                if sampler is None:
+                    order = random_state.permutation(nb_instances)
+                    batch_idxs = [order[batch_start:batch_end] for batch_start, batch_end in batches]
+                else:
+                    batch_idxs = sampler.batches()
 
-                sentences1, sentences2 = sentence1[order], sentence2[order]
-                sizes1, sizes2 = sentence1_length[order], sentence2_length[order]
-                labels = label[order]
-
-                if is_semi_sort:
-                    order = util.semi_sort(sizes1, sizes2)
-                    sentences1, sentences2 = sentence1[order], sentence2[order]
-                    sizes1, sizes2 = sentence1_length[order], sentence2_length[order]
-                    labels = label[order]
+                # Batches are assembled in background threads while the model trains on the previous ones
+                prefetcher = BatchPrefetcher(train_dataset.batch, batch_idxs,
+                                             capacity=prefetch_capacity, nb_threads=nb_input_threads)
 
+                epoch_stats = EpochStatistics()
                 loss_values, epoch_loss_values = [], []
-                for batch_idx, (batch_start, batch_end) in enumerate(batches):
+                step_start_time = time.perf_counter()
+                for batch_idx, batch in enumerate(prefetcher):
                     discriminator_batch_counter += 1
 
-                    batch_sentences1, batch_sentences2 = sentences1[batch_start:batch_end], sentences2[batch_start:batch_end]
-                    batch_sizes1, batch_sizes2 = sizes1[batch_start:batch_end], sizes2[batch_start:batch_end]
-                    batch_labels = labels[batch_start:batch_end]
-
-                    batch_max_size1 = np.max(batch_sizes1)
-                    batch_max_size2 = np.max(batch_sizes2)
-
-                    batch_sentences1 = batch_sentences1[:, :batch_max_size1]
-                    batch_sentences2 = batch_sentences2[:, :batch_max_size2]
-
                     batch_feed_dict = {
-                        sentence1_ph: batch_sentences1, sentence1_len_ph: batch_sizes1,
-                        sentence2_ph: batch_sentences2, sentence2_len_ph: batch_sizes2,
-                        label_ph: batch_labels, dropout_keep_prob_ph: dropout_keep_prob
+                        sentence1_ph: batch['sentence1'], sentence1_len_ph: batch['sentence1_length'],
+                        sentence2_ph: batch['sentence2'], sentence2_len_ph: batch['sentence2_length'],
+                        label_ph: batch['label'], dropout_keep_prob_ph: dropout_keep_prob
                     }
 
-                    _, loss_value = session.run([training_step, loss], feed_dict=batch_feed_dict)
+                    if nb_accumulation_steps > 1:
+                        batch_feed_dict[accumulation_weight_ph] = batch['sentence1'].shape[0]
+                        _, loss_value = session.run([accumulate_gradients, loss], feed_dict=batch_feed_dict)
+                        # The parameters are updated every nb_accumulation_steps batches, and at the end of each epoch
+                        is_update_step = (batch_idx + 1) % nb_accumulation_steps == 0 or \
+                            batch_idx + 1 == len(batch_idxs)
+                        if is_update_step:
+                            session.run(apply_accumulated_gradients)
+                    else:
+                        _, loss_value = session.run([training_step, loss], feed_dict=batch_feed_dict)
+                        is_update_step = True
 
                     logger.debug('Epoch {0}/{1}/{2}\tLoss: {3}'.format(epoch, d_epoch, batch_idx, loss_value))
 
-                    cur_batch_size = batch_sentences1.shape[0]
+                    cur_batch_size = batch['sentence1'].shape[0]
                     loss_values += [loss_value / cur_batch_size]
                     epoch_loss_values += [loss_value / cur_batch_size]
 
-                    for adversary_projection_step in learning_projection_steps:
-                        session.run([adversary_projection_step])
+                    if is_update_step:
+                        for adversary_projection_step in learning_projection_steps:
+                            session.run([adversary_projection_step])
+
+                    epoch_stats.add(batch['sentence1_length'], batch['sentence2_length'],
+                                    time.perf_counter() - step_start_time, prefetcher.last_wait_seconds)
 
                     if discriminator_batch_counter % report_loss_interval == 0:
                         logger.info('Epoch {0}/{1}/{2}\tLoss Stats: {3}'.format(epoch, d_epoch, batch_idx, stats(loss_values)))
@@ -637,7 +653,11 @@ def main(argv):
                         logger.info('Epoch {0}/{1}/{2}\tBest Dev Accuracy: {3:.2f}\tBest Test Accuracy: {4:.2f}'
                                     .format(epoch, d_epoch, batch_idx, best_dev_acc * 100, best_test_acc * 100))
 
+                    # Time spent on evaluation and reporting is not part of the training step
+                    step_start_time = time.perf_counter()
+
                 logger.info('Epoch {0}/{1}\tEpoch Loss Stats: {2}'.format(epoch, d_epoch, stats(epoch_loss_values)))
+                logger.info('Epoch {0}/{1}\t{2}'.format(epoch, d_epoch, epoch_stats))
 
                 if hard_save_path:
                     with open('{}_index_to_token.p'.format(hard_save_path), 'wb') as f:
@@ -17,7 +17,7 @@ import tensorflow as tf
 from tensorflow.contrib import rnn
 from tensorflow.contrib import legacy_seq2seq
 
-from inferbeddings.nli import util, tfutil
+from inferbeddings.nli import tfutil, corpus
 from inferbeddings.nli import ConditionalBiLSTM
 from inferbeddings.nli import FeedForwardDAM
 from inferbeddings.nli import FeedForwardDAMP
@@ -96,6 +96,8 @@ def main(argv):
     argparser.add_argument('--has-eos', action='store_true', default=False, help='Has <End Of Sentence> token')
     argparser.add_argument('--has-unk', action='store_true', default=False, help='Has <Unknown Word> token')
     argparser.add_argument('--lower', '-l', action='store_true', default=False, help='Lowercase the corpus')
+    argparser.add_argument('--corpus-cache', action='store', type=str, default=None,
+                           help='Directory of the tokenized corpus cache (default: the directory of each corpus)')
 
     argparser.add_argument('--restore', action='store', type=str, default=None)
     argparser.add_argument('--lm', action='store', type=str, default='models/lm/')
@@ -118,6 +120,7 @@ def main(argv):
     has_eos = args.has_eos
     has_unk = args.has_unk
     is_lower = args.lower
+    corpus_cache_dir = args.corpus_cache
 
     restore_path = args.restore
     lm_path = args.lm
@@ -126,8 +129,8 @@ def main(argv):
     tf.set_random_seed(seed)
 
     logger.debug('Reading corpus ..')
-    data_is, _, _ = util.SNLI.generate(train_path=data_path, valid_path=None, test_path=None, is_lower=is_lower)
-    logger.info('Data size: {}'.format(len(data_is)))
+    data_corpus = corpus.load_corpus(data_path, is_lower=is_lower, cache_dir=corpus_cache_dir)
+    logger.info('Data size: {}'.format(len(data_corpus)))
 
     # Enumeration of tokens start at index=3:
     # index=0 PADDING, index=1 START_OF_SENTENCE, index=2 END_OF_SENTENCE, index=3 UNKNOWN_WORD
@@ -157,7 +160,7 @@ def main(argv):
         bos_idx=bos_idx, eos_idx=eos_idx, unk_idx=unk_idx,
         max_len=max_len)
 
-    dataset = util.instances_to_dataset(data_is, token_to_index, label_to_index, **args)
+    dataset = data_corpus.to_dataset(token_to_index, label_to_index, **args)
 
     sentence1 = dataset['sentence1']
     sentence1_length = dataset['sentence1_length']
@@ -19,7 +19,7 @@ from tensorflow.contrib import legacy_seq2seq
 
 from inferbeddings.models.training.util import make_batches
 
-from inferbeddings.nli import util, tfutil
+from inferbeddings.nli import tfutil, corpus
 from inferbeddings.nli import ConditionalBiLSTM
 from inferbeddings.nli import FeedForwardDAM
 from inferbeddings.nli import FeedForwardDAMP
@@ -297,6 +297,8 @@ def main(argv):
     argparser.add_argument('--has-eos', action='store_true', default=False, help='Has <End Of Sentence> token')
     argparser.add_argument('--has-unk', action='store_true', default=False, help='Has <Unknown Word> token')
     argparser.add_argument('--lower', '-l', action='store_true', default=False, help='Lowercase the corpus')
+    argparser.add_argument('--corpus-cache', action='store', type=str, default=None,
+                           help='Directory of the tokenized corpus cache (default: the directory of each corpus)')
 
     argparser.add_argument('--restore', action='store', type=str, default=None)
     argparser.add_argument('--lm', action='store', type=str, default='models/lm/')
@@ -329,6 +331,7 @@ def main(argv):
     has_eos = args.has_eos
     has_unk = args.has_unk
     is_lower = args.lower
+    corpus_cache_dir = args.corpus_cache
 
     restore_path = args.restore
     lm_path = args.lm
@@ -355,8 +358,8 @@ def main(argv):
     tf.set_random_seed(seed)
 
     logger.debug('Reading corpus ..')
-    data_is, _, _ = util.SNLI.generate(train_path=data_path, valid_path=None, test_path=None, is_lower=is_lower)
-    logger.info('Data size: {}'.format(len(data_is)))
+    data_corpus = corpus.load_corpus(data_path, is_lower=is_lower, cache_dir=corpus_cache_dir)
+    logger.info('Data size: {}'.format(len(data_corpus)))
 
     # Enumeration of tokens start at index=3:
     # index=0 PADDING, index=1 START_OF_SENTENCE, index=2 END_OF_SENTENCE, index=3 UNKNOWN_WORD
@@ -391,7 +394,7 @@ def main(argv):
         bos_idx=bos_idx, eos_idx=eos_idx, unk_idx=unk_idx,
         max_len=max_len)
 
-    dataset = util.instances_to_dataset(data_is, token_to_index, label_to_index, **args)
+    dataset = data_corpus.to_dataset(token_to_index, label_to_index, **args)
 
     sentence1, sentence1_length = dataset['sentence1'], dataset['sentence1_length']
     sentence2, sentence2_length = dataset['sentence2'], dataset['sentence2_length']
@@ -554,28 +557,28 @@ def main(argv):
 
         if is_most_violating:
             c_ranking = np.argsort(np.array(c_losses))[::-1]
-            assert c_ranking.shape[0] == len(data_is)
+            assert c_ranking.shape[0] == len(data_corpus)
 
             for i in range(min(1024, c_ranking.shape[0])):
                 idx = c_ranking[i]
-                print('[C/{}/{}] {} ({})'.format(i, idx, data_is[idx]['sentence1'], c_losses[idx]))
-                print('[C/{}/{}] {} ({})'.format(i, idx, data_is[idx]['sentence2'], c_losses[idx]))
+                print('[C/{}/{}] {} ({})'.format(i, idx, data_corpus.instance(idx)['sentence1'], c_losses[idx]))
+                print('[C/{}/{}] {} ({})'.format(i, idx, data_corpus.instance(idx)['sentence2'], c_losses[idx]))
 
             e_ranking = np.argsort(np.array(e_losses))[::-1]
-            assert e_ranking.shape[0] == len(data_is)
+            assert e_ranking.shape[0] == len(data_corpus)
 
             for i in range(min(1024, e_ranking.shape[0])):
                 idx = e_ranking[i]
-                print('[E/{}/{}] {} ({})'.format(i, idx, data_is[idx]['sentence1'], e_losses[idx]))
-                print('[E/{}/{}] {} ({})'.format(i, idx, data_is[idx]['sentence2'], e_losses[idx]))
+                print('[E/{}/{}] {} ({})'.format(i, idx, data_corpus.instance(idx)['sentence1'], e_losses[idx]))
+                print('[E/{}/{}] {} ({})'.format(i, idx, data_corpus.instance(idx)['sentence2'], e_losses[idx]))
 
             n_ranking = np.argsort(np.array(n_losses))[::-1]
-            assert n_ranking.shape[0] == len(data_is)
+            assert n_ranking.shape[0] == len(data_corpus)
 
             for i in range(min(1024, n_ranking.shape[0])):
                 idx = n_ranking[i]
-                print('[N/{}/{}] {} ({})'.format(i, idx, data_is[idx]['sentence1'], n_losses[idx]))
-                print('[N/{}/{}] {} ({})'.format(i, idx, data_is[idx]['sentence2'], n_losses[idx]))
+                print('[N/{}/{}] {} ({})'.format(i, idx, data_corpus.instance(idx)['sentence1'], n_losses[idx]))
+                print('[N/{}/{}] {} ({})'.format(i, idx, data_corpus.instance(idx)['sentence2'], n_losses[idx]))
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
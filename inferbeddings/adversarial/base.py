@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 import tensorflow as tf
+
+from inferbeddings.parse.compiled import compile_clause
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -64,14 +67,16 @@ class Adversarial:
         # Trainable parameters of the adversarial model
         self.parameters = []
 
-        # Weight terms of clauses, as mapping from clause to term
+        # Weight terms of clauses, as mapping from compiled clause to term
         self.weights = {}
 
-        # Mapping {clause:v2l} where "clause" is a clause, and v2l is a {var_name:layer} mapping
+        # Mapping {clause:v2l} where "clause" is a compiled clause, and v2l is a {var_name:layer} mapping
         self.clause_to_variable_name_to_layer = dict()
         self.clause_to_loss = dict()
 
         for clause_idx, clause in enumerate(clauses):
+            # Compiled clauses hold predicate indices and variable positions, and hash in constant time
+            clause = compile_clause(clause, self.parser.predicate_to_index)
             clause_errors, clause_loss, clause_parameters, variable_name_to_layer =\
                 self._parse_clause('clause_{}'.format(clause_idx), clause)
 
@@ -82,18 +87,17 @@ class Adversarial:
             self.loss += clause_loss
             self.parameters += clause_parameters
 
-    def _parse_atom(self, atom, variable_name_to_layer):
+    def _parse_atom(self, atom, variable_layers):
         """
-        Given an atom in the form p(X, Y), where X and Y are associated to two distinct [1, k] embedding layers,
+        Given a compiled atom in the form p(X, Y), where X and Y are associated to two distinct [1, k] embedding layers,
         return the symbolic score of the atom.
         """
-        predicate_idx = self.parser.predicate_to_index[atom.predicate.name]
         # [batch_size x 1 x embedding_size] tensor
-        walk_embeddings = tf.nn.embedding_lookup(self.predicate_embedding_layer, [[predicate_idx]] * self.batch_size)
-        arg1_name, arg2_name = atom.arguments[0].name, atom.arguments[1].name
+        walk_embeddings = tf.nn.embedding_lookup(self.predicate_embedding_layer,
+                                                 [[atom.predicate_idx]] * self.batch_size)
 
         # [batch_size x embedding_size] variables
-        arg1_layer, arg2_layer = variable_name_to_layer[arg1_name], variable_name_to_layer[arg2_name]
+        arg1_layer, arg2_layer = variable_layers[atom.variable_idxs[0]], variable_layers[atom.variable_idxs[1]]
         # [batch_size x 2 x embedding_size] tensor
         arg1_arg2_embeddings = tf.concat(values=[tf.expand_dims(arg1_layer, 1), tf.expand_dims(arg2_layer, 1)], axis=1)
 
@@ -106,26 +110,24 @@ class Adversarial:
 
         return atom_score
 
-    def _parse_conjunction(self, atoms, variable_name_to_layer):
+    def _parse_conjunction(self, atoms, variable_layers):
         """
         Given a conjunction of atoms in the form p(X0, X1), q(X2, X3), r(X4, X5), return its symbolic score.
         """
         conjunction_score = None
         for atom in atoms:
-            atom_score = self._parse_atom(atom, variable_name_to_layer=variable_name_to_layer)
+            atom_score = self._parse_atom(atom, variable_layers=variable_layers)
             conjunction_score = atom_score if conjunction_score is None else tf.minimum(conjunction_score, atom_score)
         return conjunction_score
 
     def _parse_clause(self, name, clause):
         """
-        Given a clause in the form p(X0, X1) :- q(X2, X3), r(X4, X5), return its symbolic score.
+        Given a compiled clause in the form p(X0, X1) :- q(X2, X3), r(X4, X5), return its symbolic score.
         """
         head, body = clause.head, clause.body
 
         # Enumerate all variables
-        variable_names = {argument.name for argument in head.arguments}
-        for body_atom in body:
-            variable_names |= {argument.name for argument in body_atom.arguments}
+        variable_names = set(clause.variable_names)
 
         # Instantiate a new layer for each variable
         variable_name_to_layer = dict()
@@ -136,8 +138,11 @@ class Adversarial:
                                              initializer=tf.contrib.layers.xavier_initializer())
             variable_name_to_layer[variable_name] = variable_layer
 
-        head_score = self._parse_atom(head, variable_name_to_layer=variable_name_to_layer)
-        body_score = self._parse_conjunction(body, variable_name_to_layer=variable_name_to_layer)
+        # Layers by position of the corresponding variables in the compiled clause
+        variable_layers = [variable_name_to_layer[variable_name] for variable_name in clause.variable_names]
+
+        head_score = self._parse_atom(head, variable_layers=variable_layers)
+        body_score = self._parse_conjunction(body, variable_layers=variable_layers)
 
         parameters = [variable_name_to_layer[variable_name] for variable_name in sorted(variable_names)]
 
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
+
+from inferbeddings.parse.compiled import CompiledClause, compile_clause
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +16,23 @@ class GroundLoss:
         self.scoring_function = scoring_function
         self.tolerance = tolerance
 
+        # Clauses are compiled once, so that scoring a grounding only involves index lookups
+        self.clause_to_compiled = {clause: compile_clause(clause, self.parser.predicate_to_index) for clause in clauses}
+
+    def compile(self, clause):
+        """
+        Compiled form of a clause, cached for the clauses of the loss.
+        :param clause: Clause or CompiledClause.
+        :return: CompiledClause.
+        """
+        if isinstance(clause, CompiledClause):
+            return clause
+        compiled_clause = self.clause_to_compiled.get(clause)
+        if compiled_clause is None:
+            compiled_clause = compile_clause(clause, self.parser.predicate_to_index)
+            self.clause_to_compiled[clause] = compiled_clause
+        return compiled_clause
+
     @staticmethod
     def get_variable_names(clause):
         """
@@ -52,49 +72,41 @@ class GroundLoss:
     def __entity_to_idx(self, entity):
         return self.parser.entity_to_index[entity] if isinstance(entity, str) else entity
 
-    def __predicate_to_idx(self, predicate):
-        return self.parser.predicate_to_index[predicate] if isinstance(predicate, str) else predicate
-
-    def _score_atom(self, atom, feed_dict):
-        arg1_name, arg2_name, predicate_name = atom.arguments[0].name, atom.arguments[1].name, atom.predicate.name
-        arg1_value, arg2_value = feed_dict[arg1_name], feed_dict[arg2_name]
+    def _score_compiled_atom(self, atom, entity_idxs):
+        s_idx, o_idx = entity_idxs[atom.variable_idxs[0]], entity_idxs[atom.variable_idxs[1]]
+        return self.scoring_function([[[atom.predicate_idx]], [[s_idx, o_idx]]])
 
-        s_idx, o_idx = self.__entity_to_idx(arg1_value), self.__entity_to_idx(arg2_value)
-        p_idx = self.__predicate_to_idx(predicate_name)
-
-        score_value = self.scoring_function([[[p_idx]], [[s_idx, o_idx]]])
-        return score_value
-
-    def _score_conjunction(self, atoms, feed_dict):
-        atom_scores = [self._score_atom(atom, feed_dict) for atom in atoms]
-        return min(atom_scores)
+    def _compiled_scores(self, compiled_clause, feed_dict):
+        # Entity indices, by position of the corresponding variables in the compiled clause
+        entity_idxs = [self.__entity_to_idx(feed_dict[name]) for name in compiled_clause.variable_names]
+        score_head = self._score_compiled_atom(compiled_clause.head, entity_idxs)
+        score_body = min(self._score_compiled_atom(atom, entity_idxs) for atom in compiled_clause.body)
+        return score_head, score_body
 
     def zero_one_errors(self, clause, feed_dicts):
-        return sum([self.zero_one_error(clause, feed_dict) for feed_dict in feed_dicts])
+        compiled_clause = self.compile(clause)
+        return sum([self.zero_one_error(compiled_clause, feed_dict) for feed_dict in feed_dicts])
 
     def zero_one_error(self, clause, feed_dict):
         """
         Compute the 0-1 loss of a clause w.r.t. of a variable assignment feed_dict
-        :param clause: Clause.
+        :param clause: Clause or CompiledClause.
         :param feed_dict: Variable assignment: {variable_name: entity}
         :return: Value in {0, 1}
         """
-        head, body = clause.head, clause.body
-        score_head = self._score_atom(head, feed_dict)
-        score_body = self._score_conjunction(body, feed_dict)
+        score_head, score_body = self._compiled_scores(self.compile(clause), feed_dict)
         return int(not ((score_body - self.tolerance) <= score_head))
 
     def continuous_errors(self, clause, feed_dicts):
-        return sum([self.continuous_error(clause, feed_dict) for feed_dict in feed_dicts])
+        compiled_clause = self.compile(clause)
+        return sum([self.continuous_error(compiled_clause, feed_dict) for feed_dict in feed_dicts])
 
     def continuous_error(self, clause, feed_dict):
         """
         Compute the violation error of a clause w.r.t. of a variable assignment feed_dict
-        :param clause: Clause.
+        :param clause: Clause or CompiledClause.
         :param feed_dict: Variable assignment: {variable_name: entity}
         :return: Continuous value
         """
-        head, body = clause.head, clause.body
-        score_head = self._score_atom(head, feed_dict)
-        score_body = self._score_conjunction(body, feed_dict)
+        score_head, score_body = self._compiled_scores(self.compile(clause), feed_dict)
         return score_body - score_head
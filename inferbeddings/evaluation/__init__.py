@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
 
-from inferbeddings.evaluation.base import evaluate_auc, evaluate_ranks, evaluate_map, ranking_summary
+from inferbeddings.evaluation.base import evaluate_auc, evaluate_ranks, evaluate_map, evaluate_path_ranks
+from inferbeddings.evaluation.base import ranking_summary, ranking_summaries, rank_statistics, grouped_rank_statistics
+from inferbeddings.evaluation.parallel import ParallelRanker
 
 __all__ = ['evaluate_auc',
            'evaluate_ranks',
            'evaluate_map',
-           'ranking_summary']
+           'evaluate_path_ranks',
+           'ranking_summary',
+           'ranking_summaries',
+           'rank_statistics',
+           'grouped_rank_statistics',
+           'ParallelRanker']
@@ -3,111 +3,236 @@
 import numpy as np
 
 from inferbeddings.evaluation import metrics
+from inferbeddings.evaluation.parallel import ParallelRanker
+from inferbeddings.scoring import ScoringEngine
+
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
-def ranking_summary(res, n=10, tag=None):
-    dres = dict()
+def rank_statistics(ranks, ns=range(1, 10 + 1)):
+    """
+    Computes the mean rank, median rank, mean reciprocal rank and Hits@n, for all n in ns, of an array of ranks.
+    :param ranks: Array of ranks.
+    :param ns: Cut-off values for Hits@n.
+    :return: {statistic: value} dictionary.
+    """
+    ranks = np.asarray(ranks)
+    max_n = max(ns)
+
+    # hits[n] is the number of ranks <= n
+    hits = np.cumsum(np.bincount(np.minimum(ranks, max_n + 1).astype(np.int64), minlength=max_n + 2))
+
+    res = {
+        'mean': np.mean(ranks),
+        'median': np.median(ranks),
+        'mrr': np.mean(1. / ranks)
+    }
+    for n in ns:
+        res['hits@{}'.format(n)] = hits[n] / ranks.size * 100
+    return res
+
+
+def grouped_rank_statistics(ranks, groups, ns=range(1, 10 + 1)):
+    """
+    Computes the same statistics as rank_statistics for each group of ranks, in a single pass.
+    :param ranks: Array of ranks.
+    :param groups: Array of non-negative integer group identifiers (e.g. predicate indices), one per rank.
+    :param ns: Cut-off values for Hits@n.
+    :return: {group: {statistic: value}} dictionary.
+    """
+    ranks, groups = np.asarray(ranks), np.asarray(groups)
+    counts = np.bincount(groups)
+
+    statistics = {
+        'mean': np.bincount(groups, weights=ranks) / np.maximum(counts, 1),
+        'mrr': np.bincount(groups, weights=1. / ranks) / np.maximum(counts, 1)
+    }
+    for n in ns:
+        statistics['hits@{}'.format(n)] = np.bincount(groups, weights=ranks <= n) / np.maximum(counts, 1) * 100
+
+    # Medians: sort ranks within each group, and average the two central elements of each group
+    sorted_ranks = ranks[np.lexsort((ranks, groups))]
+    starts = np.cumsum(counts) - counts
+    lo, hi = starts + np.maximum(counts - 1, 0) // 2, starts + counts // 2
+    valid = counts > 0
+    medians = np.zeros(counts.size)
+    medians[valid] = (sorted_ranks[lo[valid]] + sorted_ranks[hi[valid]]) / 2
+    statistics['median'] = medians
+
+    return {group: {name: values[group] for name, values in statistics.items()}
+            for group in np.flatnonzero(valid).tolist()}
+
+
+def ranking_summaries(res, ns=range(1, 10 + 1), groups=None):
+    """
+    Summarises left (subject), right (object) and global ranks, computing all statistics at once.
+    :param res: (left ranks, right ranks) pair.
+    :param ns: Cut-off values for Hits@n.
+    :param groups: If not None, array of integer group identifiers (e.g. predicate indices), one per triple.
+    :return: {'left': stats, 'right': stats, 'global': stats} dictionary, or {group: {'left': ..}} if groups is set.
+    """
+    ranks_l, ranks_r = np.asarray(res[0]), np.asarray(res[1])
+    ranks_g = np.concatenate([ranks_l, ranks_r])
+
+    if groups is None:
+        return {
+            'left': rank_statistics(ranks_l, ns=ns),
+            'right': rank_statistics(ranks_r, ns=ns),
+            'global': rank_statistics(ranks_g, ns=ns)
+        }
+
+    groups = np.asarray(groups)
+    group_to_l = grouped_rank_statistics(ranks_l, groups, ns=ns)
+    group_to_r = grouped_rank_statistics(ranks_r, groups, ns=ns)
+    group_to_g = grouped_rank_statistics(ranks_g, np.concatenate([groups, groups]), ns=ns)
+    return {group: {'left': group_to_l[group], 'right': group_to_r[group], 'global': group_to_g[group]}
+            for group in group_to_l}
+
+
+def log_ranking_summary(summary, n=10, tag=None):
+    logger.info('### MICRO (%s):' % tag)
+    for name, side in [('left  ', 'left'), ('right ', 'right'), ('global', 'global')]:
+        stats = summary[side]
+        logger.info('\t-- %s >> mean: %s, median: %s, mrr: %s, hits@%s: %s%%' %
+                    (name, round(stats['mean'], 5), round(stats['median'], 5),
+                     round(stats['mrr'], 3), n, round(stats['hits@{}'.format(n)], 3)))
+
 
-    dres['microlmean'] = np.mean(res[0])
-    dres['microlmedian'] = np.median(res[0])
-    dres['microlhits@n'] = np.mean(np.asarray(res[0]) <= n) * 100
-    dres['micrormean'] = np.mean(res[1])
-    dres['micrormedian'] = np.median(res[1])
-    dres['microrhits@n'] = np.mean(np.asarray(res[1]) <= n) * 100
+def ranking_summary(res, n=10, tag=None):
+    log_ranking_summary(ranking_summaries(res, ns=[n]), n=n, tag=tag)
 
-    resg = res[0] + res[1]
 
-    dres['microgmean'] = np.mean(resg)
-    dres['microgmedian'] = np.median(resg)
-    dres['microghits@n'] = np.mean(np.asarray(resg) <= n) * 100
+def summary_to_json(summary):
+    """
+    Converts a (possibly nested) summary, containing NumPy scalars, to a JSON-serializable dictionary.
+    """
+    if isinstance(summary, dict):
+        return {str(key): summary_to_json(value) for key, value in summary.items()}
+    return float(summary)
 
-    dres['microlmrr'] = np.mean(1. / np.asarray(res[0]))
-    dres['micrormrr'] = np.mean(1. / np.asarray(res[1]))
-    dres['microgmrr'] = np.mean(1. / np.asarray(resg))
 
-    logger.info('### MICRO (%s):' % tag)
-    logger.info('\t-- left   >> mean: %s, median: %s, mrr: %s, hits@%s: %s%%' %
-                (round(dres['microlmean'], 5), round(dres['microlmedian'], 5),
-                 round(dres['microlmrr'], 3), n, round(dres['microlhits@n'], 3)))
-    logger.info('\t-- right  >> mean: %s, median: %s, mrr: %s, hits@%s: %s%%' %
-                (round(dres['micrormean'], 5), round(dres['micrormedian'], 5),
-                 round(dres['micrormrr'], 3), n, round(dres['microrhits@n'], 3)))
-    logger.info('\t-- global >> mean: %s, median: %s, mrr: %s, hits@%s: %s%%' %
-                (round(dres['microgmean'], 5), round(dres['microgmedian'], 5),
-                 round(dres['microgmrr'], 3), n, round(dres['microghits@n'], 3)))
-
-
-def evaluate_map(scoring_function, pos_triples, neg_triples, tag=None):
+def evaluate_map(scoring_function, pos_triples, neg_triples, tag=None, results=None):
     _map = metrics.MeanAveragePrecision(scoring_function)
     map_value = _map(pos_triples, neg_triples)
     logger.info('[{}]\tMean Average Precision (MAP): {}'.format(tag, map_value))
+    if results is not None:
+        results[tag] = {'map': float(map_value)}
     return map_value
 
 
-def evaluate_auc(scoring_function, pos_triples, neg_triples, nb_entities, nb_predicates, tag=None):
-    auc = metrics.AUC(scoring_function=scoring_function, nb_entities=nb_entities, nb_predicates=nb_predicates)
+def evaluate_auc(scoring_function, pos_triples, neg_triples, nb_entities, nb_predicates, tag=None, results=None,
+                 batch_size=None, nb_bins=2 ** 16, max_exact_size=2 ** 20):
+    """
+    Evaluates the AUC-ROC and AUC-PR - if batch_size is not None, triples are scored in chunks of batch_size
+    triples by metrics.StreamingAUC, which switches to a histogram of nb_bins bins after max_exact_size triples.
+    """
+    if batch_size is None:
+        auc = metrics.AUC(scoring_function=scoring_function, nb_entities=nb_entities, nb_predicates=nb_predicates)
+    else:
+        auc = metrics.StreamingAUC(scoring_function=scoring_function, batch_size=batch_size,
+                                   nb_bins=nb_bins, max_exact_size=max_exact_size)
     auc_roc_value, auc_pr_value = auc(pos_triples, neg_triples)
     logger.info('[{}]\tAUC-ROC: {}'.format(tag, auc_roc_value))
     logger.info('[{}]\tAUC-PR: {}'.format(tag, auc_pr_value))
+    if results is not None:
+        results[tag] = {'auc_roc': float(auc_roc_value), 'auc_pr': float(auc_pr_value)}
     return auc_roc_value, auc_pr_value
 
 
 def evaluate_ranks(scoring_function, triples, nb_entities, true_triples=None, tag=None,
-                   verbose=False, index_to_predicate=None):
+                   verbose=False, index_to_predicate=None, results=None, nb_workers=None, ranker=None):
+    """
+    Evaluates the ranks of the subject and object of each triple, logging raw and filtered summaries.
+    If results is a dictionary, results[tag] is set to a JSON-serializable version of such summaries.
+    If nb_workers is set and scoring_function is an inferbeddings.scoring.ScoringEngine, the triples
+    are ranked by a pool of nb_workers worker processes.
+    If ranker is set, e.g. to a ParallelRanker shared by several evaluations, the triples are ranked by it, and
+    scoring_function, true_triples and nb_workers are not used.
+    """
     if true_triples is None:
         true_triples = []
 
-    ranker = metrics.Ranker(scoring_function=scoring_function, nb_entities=nb_entities,
-                            true_triples=true_triples)
     # ranks and ranks_filtered have the form (list, list):
     # the former (resp. latter) list is the ranks on triples obtained corrupting the subject (resp. object)
-    ranks, ranks_filtered = ranker(triples)
+    if ranker is not None:
+        ranks, ranks_filtered = ranker(triples)
+    elif nb_workers is not None and isinstance(scoring_function, ScoringEngine):
+        with ParallelRanker(engine=scoring_function, nb_entities=nb_entities,
+                            true_triples=true_triples, nb_workers=nb_workers) as parallel_ranker:
+            ranks, ranks_filtered = parallel_ranker(triples)
+    else:
+        ranker = metrics.Ranker(scoring_function=scoring_function, nb_entities=nb_entities,
+                                true_triples=true_triples)
+        ranks, ranks_filtered = ranker(triples)
+
+    ns = range(1, 10 + 1)
+    summary = {
+        'raw': ranking_summaries(ranks, ns=ns),
+        'filtered': ranking_summaries(ranks_filtered, ns=ns)
+    }
 
     if tag is not None:
-        for n in range(1, 10 + 1):
-            ranking_summary(ranks, n=n, tag='{} raw'.format(tag))
+        for n in ns:
+            log_ranking_summary(summary['raw'], n=n, tag='{} raw'.format(tag))
 
     if tag is not None:
-        for n in range(1, 10 + 1):
-            ranking_summary(ranks_filtered, n=n, tag='{} filtered'.format(tag))
+        for n in ns:
+            log_ranking_summary(summary['filtered'], n=n, tag='{} filtered'.format(tag))
 
     if verbose:
         assert index_to_predicate is not None
 
-        ranks_l, ranks_r = ranks
-        ranks_l_filtered, ranks_r_filtered = ranks_filtered
+        p_idxs = np.array([p for (_, p, _) in triples])
+        p_to_summary = ranking_summaries(ranks, ns=ns, groups=p_idxs)
+        p_to_summary_filtered = ranking_summaries(ranks_filtered, ns=ns, groups=p_idxs)
+
+        summary['predicates'] = dict()
+        for p_idx in sorted(p_to_summary.keys()):
+            predicate_name = index_to_predicate[p_idx]
+
+            if tag is not None:
+                for n in ns:
+                    log_ranking_summary(p_to_summary[p_idx], n=n, tag='{}\t{} raw'.format(predicate_name, tag))
 
-        p_idxs = sorted({p for (_, p, _) in triples})
+            if tag is not None:
+                for n in ns:
+                    log_ranking_summary(p_to_summary_filtered[p_idx], n=n,
+                                        tag='{}\t{} filtered'.format(predicate_name, tag))
 
-        p_to_ranks_l = {p_idx: [] for p_idx in p_idxs}
-        p_to_ranks_l_filtered = {p_idx: [] for p_idx in p_idxs}
+            summary['predicates'][predicate_name] = {'raw': p_to_summary[p_idx],
+                                                     'filtered': p_to_summary_filtered[p_idx]}
 
-        p_to_ranks_r = {p_idx: [] for p_idx in p_idxs}
-        p_to_ranks_r_filtered = {p_idx: [] for p_idx in p_idxs}
+    if results is not None:
+        results[tag] = summary_to_json(summary)
 
-        for (_, p, _), r_l, r_r, r_l_f, r_r_f in zip(triples, ranks_l, ranks_r, ranks_l_filtered, ranks_r_filtered):
-            p_to_ranks_l[p] += [r_l]
-            p_to_ranks_r[p] += [r_r]
+    return ranks
 
-            p_to_ranks_l_filtered[p] += [r_l_f]
-            p_to_ranks_r_filtered[p] += [r_r_f]
 
-        for p_idx in p_idxs:
-            predicate_name = index_to_predicate[p_idx]
+def evaluate_path_ranks(scoring_function, walks, entities, nb_entities, true_triples=None, tag=None, results=None):
+    """
+    Evaluates the ranks of the source and target of each path query, logging raw and filtered summaries.
+    If results is a dictionary, results[tag] is set to a JSON-serializable version of such summaries.
+    """
+    ranker = metrics.PathRanker(scoring_function=scoring_function, nb_entities=nb_entities,
+                                true_triples=true_triples)
+    ranks, ranks_filtered = ranker(walks, entities)
 
-            ranks = (p_to_ranks_l[p_idx], p_to_ranks_r[p_idx])
-            ranks_f = (p_to_ranks_l_filtered[p_idx], p_to_ranks_r_filtered[p_idx])
+    ns = range(1, 10 + 1)
+    summary = {
+        'raw': ranking_summaries(ranks, ns=ns),
+        'filtered': ranking_summaries(ranks_filtered, ns=ns)
+    }
 
-            if tag is not None:
-                for n in range(1, 10 + 1):
-                    ranking_summary(ranks, n=n, tag='{}\t{} raw'.format(predicate_name, tag))
+    if tag is not None:
+        for n in ns:
+            log_ranking_summary(summary['raw'], n=n, tag='{} raw'.format(tag))
+        for n in ns:
+            log_ranking_summary(summary['filtered'], n=n, tag='{} filtered'.format(tag))
 
-            if tag is not None:
-                for n in range(1, 10 + 1):
-                    ranking_summary(ranks_f, n=n, tag='{}\t{} filtered'.format(predicate_name, tag))
+    if results is not None:
+        results[tag] = summary_to_json(summary)
 
     return ranks
@@ -56,26 +56,9 @@ class AUCPRDavis(RankingEvaluationMetric):
         scores = self._preprocess_scores(scores)
         n, n_pos = len(scores), np.sum(y == self.pos_label)
 
-        metric = davis.AUC(n_pos, n - n_pos)
         order = np.argsort(scores)[::-1]
-        ordered_y = y[order]
-
-        _tp = np.sum(y == self.pos_label)
-
-        pn_points = []
-        for i in reversed(range(y.shape[0])):
-            _y = ordered_y[:i + 1]
-            n = _y.shape[0]
-
-            _tp -= 1 if (i + 1) < ordered_y.shape[0] and ordered_y[i + 1] == self.pos_label else 0
-            fp = n - _tp
-
-            point = davis.PNPoint(_tp, fp)
-            pn_points += [point]
-
-        metric.set_pn_points(pn_points)
-        metric.interpolate()
-        ans = metric.calculate_auc_pr()
+        true_positives, false_positives = davis.pn_curve(y[order], pos_label=self.pos_label)
+        ans = davis.calculate_auc_pr(true_positives, false_positives, nb_positives=n_pos)
         return ans
 
     @property
@@ -114,26 +97,9 @@ class AUCROCDavis(RankingEvaluationMetric):
         scores = self._preprocess_scores(scores)
         n, n_pos = len(scores), np.sum(y == self.pos_label)
 
-        metric = davis.AUC(n_pos, n - n_pos)
         order = np.argsort(scores)[::-1]
-        ordered_y = y[order]
-
-        _tp = np.sum(y == self.pos_label)
-
-        pn_points = []
-        for i in reversed(range(y.shape[0])):
-            _y = ordered_y[:i + 1]
-            n = _y.shape[0]
-
-            _tp -= 1 if (i + 1) < ordered_y.shape[0] and ordered_y[i + 1] == self.pos_label else 0
-            fp = n - _tp
-
-            point = davis.PNPoint(_tp, fp)
-            pn_points += [point]
-
-        metric.set_pn_points(pn_points)
-        metric.interpolate()
-        ans = metric.calculate_auc_roc()
+        true_positives, false_positives = davis.pn_curve(y[order], pos_label=self.pos_label)
+        ans = davis.calculate_auc_roc(true_positives, false_positives, nb_positives=n_pos, nb_negatives=n - n_pos)
         return ans
 
     @property
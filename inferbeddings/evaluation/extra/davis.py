@@ -2,6 +2,8 @@
 
 from functools import total_ordering
 
+import numpy as np
+
 import logging
 
 
@@ -285,3 +287,63 @@ class AUC(object):
             area += .5 * (true_positive_rate_B - true_positive_rate_A) * (false_positive_rate_B + false_positive_rate_A)
 
         return 1. - area
+
+
+def pn_curve(ordered_y, pos_label=1):
+    """
+    Computes the points in the True Positives/False Positives space obtained by considering, for each i,
+    the first i + 1 elements of a ranking as retrieved.
+
+    Consecutive points differ by exactly one example, so AUC.interpolate() would not add any point to them.
+
+    :param ordered_y: Labels of the ranked elements, sorted by decreasing score.
+    :param pos_label: Label of positive examples.
+    :return: (true_positives, false_positives) arrays.
+    """
+    is_positive = np.asarray(ordered_y) == pos_label
+    true_positives = np.cumsum(is_positive)
+    false_positives = np.arange(1, is_positive.shape[0] + 1) - true_positives
+    return true_positives, false_positives
+
+
+def calculate_auc_pr(true_positives, false_positives, nb_positives):
+    """
+    Vectorized version of AUC.calculate_auc_pr, for min_recall = 0.
+
+    :param true_positives: Array of true positives, one for each (already interpolated) point.
+    :param false_positives: Array of false positives, one for each (already interpolated) point.
+    :param nb_positives: Number of positive examples.
+    :return: Area under the Precision-Recall curve.
+    """
+    if len(true_positives) < 2:
+        return None
+    recall = true_positives / nb_positives
+    precision = true_positives / (true_positives + false_positives)
+
+    areas = np.empty(recall.shape[0])
+    areas[0] = recall[0] * precision[0]
+    areas[1:] = .5 * (recall[1:] - recall[:-1]) * (precision[:-1] + precision[1:])
+    # np.cumsum accumulates sequentially, matching the point-by-point summation in AUC.calculate_auc_pr
+    return np.cumsum(areas)[-1]
+
+
+def calculate_auc_roc(true_positives, false_positives, nb_positives, nb_negatives):
+    """
+    Vectorized version of AUC.calculate_auc_roc.
+
+    :param true_positives: Array of true positives, one for each (already interpolated) point.
+    :param false_positives: Array of false positives, one for each (already interpolated) point.
+    :param nb_positives: Number of positive examples.
+    :param nb_negatives: Number of negative examples.
+    :return: Area under the ROC curve.
+    """
+    if len(true_positives) < 2:
+        return None
+    true_positive_rate = true_positives / nb_positives
+    false_positive_rate = false_positives / nb_negatives
+
+    areas = np.empty(true_positive_rate.shape[0])
+    areas[0] = .5 * true_positive_rate[0] * false_positive_rate[0]
+    areas[1:] = .5 * (true_positive_rate[1:] - true_positive_rate[:-1]) *\
+        (false_positive_rate[1:] + false_positive_rate[:-1])
+    return 1. - np.cumsum(areas)[-1]
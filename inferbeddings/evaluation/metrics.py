@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
 import abc
+import itertools
 import numpy as np
 
 from sklearn import metrics
 
-from inferbeddings.evaluation.util import apk
+from inferbeddings.evaluation.util import average_precision, ScoreHistogram
+from inferbeddings.walk.queries import adjacency_matrices, path_query_answers
 
 import logging
 
@@ -22,32 +24,30 @@ class MeanAveragePrecision(BaseRanker):
         self.scoring_function = scoring_function
 
     def __call__(self, pos_triples, neg_triples=None):
-        # First, create a list wih all relation indices
-        p_idxs = sorted({p for (_, p, _) in pos_triples + (neg_triples if neg_triples else [])})
+        triples = pos_triples + (neg_triples if neg_triples else [])
+        if len(triples) == 0:
+            return np.mean([])
 
-        average_precisions = []
-
-        # Iterate over each predicate p and create a list of positive and a list of negative triples for p
-        for p_idx in p_idxs:
-            p_pos_triples = [(s, p, o) for (s, p, o) in pos_triples if p == p_idx]
-            p_neg_triples = [(s, p, o) for (s, p, o) in neg_triples if p == p_idx]
+        triples = np.array(triples, dtype=np.int32).reshape(-1, 3)
+        labels = np.arange(triples.shape[0]) < len(pos_triples)
 
-            # Score such triples:
-            n = len(p_pos_triples + p_neg_triples)
-            Xr = np.full(shape=(n, 1), fill_value=p_idx, dtype=np.int32)
-            Xe = np.full(shape=(n, 2), fill_value=0, dtype=np.int32)
+        # Group triples by predicate with a stable sort, so that within each group positive triples still
+        # precede negative ones, and score all of them at once
+        order = np.argsort(triples[:, 1], kind='mergesort')
+        triples, labels = triples[order], labels[order]
 
-            for i, (s_idx, _p_idx, o_idx) in enumerate(p_pos_triples + p_neg_triples):
-                assert _p_idx == p_idx
-                Xe[i, 0], Xe[i, 1] = s_idx, o_idx
+        Xr, Xe = triples[:, 1:2], triples[:, [0, 2]]
+        scores = np.asarray(self.scoring_function([Xr, Xe])).reshape(-1)
 
-            scores = self.scoring_function([Xr, Xe])
+        p_idxs, p_starts = np.unique(triples[:, 1], return_index=True)
+        p_ends = np.append(p_starts[1:], triples.shape[0])
 
-            actual = range(1, len(p_pos_triples) + 1)
-            predicted = 1 + np.argsort(scores)[::-1]
-
-            average_precision = apk(actual=actual, predicted=predicted, k=n)
-            average_precisions += [average_precision]
+        average_precisions = []
+        for p_start, p_end in zip(p_starts, p_ends):
+            p_scores, p_labels = scores[p_start:p_end], labels[p_start:p_end]
+            # Rank the triples of each predicate by decreasing score
+            predicted = np.argsort(p_scores)[::-1]
+            average_precisions += [average_precision(p_labels[predicted])]
         return np.mean(average_precisions)
 
 
@@ -57,6 +57,13 @@ class Ranker(BaseRanker):
         self.nb_entities = nb_entities
         self.true_triples = true_triples
 
+        # Index the true triples by (subject, predicate) and (predicate, object), so that filtering the
+        # ranks of a triple does not require scanning all true triples
+        self.sp_to_objects, self.po_to_subjects = dict(), dict()
+        for (s, p, o) in (self.true_triples if self.true_triples else []):
+            self.sp_to_objects.setdefault((s, p), []).append(o)
+            self.po_to_subjects.setdefault((p, o), []).append(s)
+
     def __call__(self, pos_triples, neg_triples=None):
         err_subj, err_obj = [], []
         filtered_err_subj, filtered_err_obj = [], []
@@ -83,8 +90,8 @@ class Ranker(BaseRanker):
             err_obj += [1 + np.argsort(np.argsort(- scores_s))[obj_idx - 1]]
 
             if self.true_triples:
-                rm_idx_o = [o - 1 for (s, p, o) in self.true_triples if s == subj_idx and p == pred_idx and o != obj_idx]
-                rm_idx_s = [s - 1 for (s, p, o) in self.true_triples if o == obj_idx and p == pred_idx and s != subj_idx]
+                rm_idx_o = [o - 1 for o in self.sp_to_objects.get((subj_idx, pred_idx), []) if o != obj_idx]
+                rm_idx_s = [s - 1 for s in self.po_to_subjects.get((pred_idx, obj_idx), []) if s != subj_idx]
 
                 if rm_idx_o:
                     scores_s[rm_idx_o] = - np.inf
@@ -101,6 +108,80 @@ class Ranker(BaseRanker):
         return (err_subj, err_obj), (filtered_err_subj, filtered_err_obj)
 
 
+class PathRanker(BaseRanker):
+    """
+    Ranks path queries (s, [p_1, .., p_n], o): the source (resp. target) is ranked against all entities
+    given the walk and the target (resp. source), and the filtered ranks ignore all the other entities
+    connected by the walk in the graph of true triples.
+
+    Queries, which share the walk length, are scored in batches - one call to scoring_function for all the
+    candidate sources, and one for all the candidate targets, of a batch of queries - and the rank of an entity
+    is one plus the number of candidates with a strictly higher score.
+    """
+    def __init__(self, scoring_function, nb_entities, true_triples=None, batch_size=None):
+        """
+        :param scoring_function: Function scoring [walks, entity pairs] arrays.
+        :param nb_entities: Number of entities.
+        :param true_triples: Triples used for computing the filtered ranks.
+        :param batch_size: Number of queries scored at a time - by default, such that each call to
+            scoring_function scores about 2^20 (walk, entity pair) rows.
+        """
+        self.scoring_function = scoring_function
+        self.nb_entities = nb_entities
+        self.true_triples = true_triples
+        self.batch_size = batch_size
+        self.predicate_to_adjacency = adjacency_matrices(true_triples if true_triples else [], nb_entities)
+
+    def __call__(self, walks, entities):
+        """
+        :param walks: (nb_queries, length) array of predicate indices.
+        :param entities: (nb_queries, 2) array of source and target indices.
+        :return: ((left ranks, right ranks), (filtered left ranks, filtered right ranks)) pair.
+        """
+        walks, entities = np.asarray(walks), np.asarray(entities)
+        err_subj, err_obj = [], []
+        filtered_err_subj, filtered_err_obj = [], []
+
+        # Entities reachable from each source, and entities from which each target can be reached
+        objects = path_query_answers(self.predicate_to_adjacency, walks, entities[:, 0], self.nb_entities)
+        subjects = path_query_answers(self.predicate_to_adjacency, walks, entities[:, 1], self.nb_entities,
+                                      inverse=True)
+
+        n = self.nb_entities
+        batch_size = self.batch_size if self.batch_size is not None else max(1, (1 << 20) // n)
+        candidates = np.arange(1, n + 1)
+
+        for start in range(0, entities.shape[0], batch_size):
+            batch_walks, batch_entities = walks[start:start + batch_size], entities[start:start + batch_size]
+            nb_queries, rows = batch_entities.shape[0], np.arange(batch_entities.shape[0])
+            subj_idxs, obj_idxs = batch_entities[:, 0], batch_entities[:, 1]
+
+            Xr = np.repeat(batch_walks, n, axis=0)
+            # Candidate sources (?, walk, o) and candidate targets (s, walk, ?) of each query in the batch
+            Xe_o = np.stack([np.tile(candidates, nb_queries), np.repeat(obj_idxs, n)], axis=1).astype(np.int32)
+            Xe_s = np.stack([np.repeat(subj_idxs, n), np.tile(candidates, nb_queries)], axis=1).astype(np.int32)
+
+            scores_o = np.array(self.scoring_function([Xr, Xe_o]), dtype=np.float64).reshape(nb_queries, n)
+            scores_s = np.array(self.scoring_function([Xr, Xe_s]), dtype=np.float64).reshape(nb_queries, n)
+
+            def ranks(scores, idxs):
+                return (1 + np.sum(scores > scores[rows, idxs - 1][:, np.newaxis], axis=1)).tolist()
+
+            err_subj += ranks(scores_o, subj_idxs)
+            err_obj += ranks(scores_s, obj_idxs)
+
+            # Other answers of each query, i.e. entities connected by the walk, are not candidates when filtering
+            for answers, scores, idxs in [(objects, scores_s, obj_idxs), (subjects, scores_o, subj_idxs)]:
+                batch_answers = answers[start:start + nb_queries].tocoo()
+                is_other = (batch_answers.col > 0) & (batch_answers.col != idxs[batch_answers.row])
+                scores[batch_answers.row[is_other], batch_answers.col[is_other] - 1] = - np.inf
+
+            filtered_err_subj += ranks(scores_o, subj_idxs)
+            filtered_err_obj += ranks(scores_s, obj_idxs)
+
+        return (err_subj, err_obj), (filtered_err_subj, filtered_err_obj)
+
+
 class AUC(BaseRanker):
     def __init__(self, scoring_function, nb_entities, nb_predicates, rescale_predictions=False):
         self.scoring_function = scoring_function
@@ -132,3 +213,61 @@ class AUC(BaseRanker):
         aucpr_value = metrics.auc(recall, precision)
 
         return aucroc_value, aucpr_value
+
+
+class StreamingAUC(BaseRanker):
+    """
+    Computes the AUC-ROC and AUC-PR by scoring triples in fixed-size chunks. Scores are kept exactly while the
+    number of triples is at most max_exact_size - results then match AUC - and are otherwise accumulated in a
+    ScoreHistogram with nb_bins bins, so that memory usage does not depend on the number of triples.
+    """
+    def __init__(self, scoring_function, batch_size=2 ** 16, nb_bins=2 ** 16, max_exact_size=2 ** 20):
+        self.scoring_function = scoring_function
+        self.batch_size = batch_size
+        self.nb_bins = nb_bins
+        self.max_exact_size = max_exact_size
+
+    def _chunks(self, pos_triples, neg_triples):
+        labeled_triples = itertools.chain(((triple, True) for triple in pos_triples),
+                                          ((triple, False) for triple in neg_triples))
+        while True:
+            chunk = list(itertools.islice(labeled_triples, self.batch_size))
+            if len(chunk) == 0:
+                return
+            X = np.array([triple for triple, _ in chunk], dtype=np.int32).reshape(-1, 3)
+            labels = np.array([label for _, label in chunk], dtype=bool)
+            yield X[:, 1:2], X[:, [0, 2]], labels
+
+    def __call__(self, pos_triples, neg_triples=None):
+        exact_scores, exact_labels, nb_exact = [], [], 0
+        histogram = None
+
+        for Xr, Xe, labels in self._chunks(pos_triples, neg_triples if neg_triples else []):
+            scores = np.asarray(self.scoring_function([Xr, Xe])).reshape(-1)
+
+            if histogram is None:
+                exact_scores += [scores]
+                exact_labels += [labels]
+                nb_exact += scores.shape[0]
+
+                if self.max_exact_size is not None and nb_exact > self.max_exact_size:
+                    # Too many triples for keeping all scores: switch to the histogram
+                    histogram = ScoreHistogram(nb_bins=self.nb_bins)
+                    histogram.update(np.concatenate(exact_scores), np.concatenate(exact_labels))
+                    exact_scores, exact_labels = None, None
+            else:
+                histogram.update(scores, labels)
+
+        if histogram is None:
+            ays = np.concatenate(exact_labels).astype(int)
+            ascores = np.concatenate(exact_scores)
+            sample_weight = None
+        else:
+            ays, ascores, sample_weight = histogram.to_weighted_samples()
+
+        aucroc_value = metrics.roc_auc_score(ays, ascores, sample_weight=sample_weight)
+        precision, recall, thresholds = metrics.precision_recall_curve(ays, ascores, pos_label=1,
+                                                                       sample_weight=sample_weight)
+        aucpr_value = metrics.auc(recall, precision)
+
+        return aucroc_value, aucpr_value
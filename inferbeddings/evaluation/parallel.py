@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import math
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from inferbeddings.evaluation.metrics import BaseRanker, Ranker
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ranker used by each worker process, created once per process by _init_worker
+_worker_ranker = None
+
+
+def to_shared_array(array):
+    """
+    Copies a NumPy array in a block of shared memory.
+    :param array: NumPy array.
+    :return: (RawArray, dtype, shape) triple, which can be passed to worker processes.
+    """
+    array = np.ascontiguousarray(array)
+    raw_array = RawArray('b', max(array.nbytes, 1))
+    np.frombuffer(raw_array, dtype=np.int8)[:array.nbytes] = array.reshape(-1).view(np.int8)
+    return raw_array, array.dtype.str, array.shape
+
+
+def from_shared_array(shared_array):
+    """
+    Read-only NumPy view of an array created by to_shared_array - no data is copied.
+    """
+    raw_array, dtype, shape = shared_array
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape)) * dtype.itemsize
+    array = np.frombuffer(raw_array, dtype=np.int8)[:size].view(dtype).reshape(shape)
+    array.flags.writeable = False
+    return array
+
+
+def _init_worker(engine_class, similarity_name, shared_entities, shared_predicates, shared_parameters,
+                 nb_entities, shared_true_triples):
+    global _worker_ranker
+    parameters = {name: from_shared_array(shared_array) for name, shared_array in shared_parameters.items()}
+    engine = engine_class(from_shared_array(shared_entities), from_shared_array(shared_predicates),
+                          similarity_name=similarity_name, parameters=parameters)
+    true_triples = None
+    if shared_true_triples is not None:
+        true_triples = [tuple(triple) for triple in from_shared_array(shared_true_triples).tolist()]
+    _worker_ranker = Ranker(scoring_function=engine, nb_entities=nb_entities, true_triples=true_triples)
+
+
+def _rank_shard(triples):
+    return _worker_ranker(triples)
+
+
+class ParallelRanker(BaseRanker):
+    """
+    Computes the same ranks as Ranker, by sharding the test triples across a pool of worker processes.
+
+    Each worker scores triples with a NumPy scoring engine (see inferbeddings.scoring) whose embedding matrices
+    are read-only views of a single copy held in shared memory, and the partial rank lists are then merged in
+    the order of the test triples. Workers are started by a fork server rather than forked from the calling
+    process, which may be running TensorFlow threads; since starting them is costly (e.g. each worker imports the
+    __main__ module of the caller), the pool is started on the first call and reused by the following ones, until
+    close is called - e.g. by using the ranker as a context manager.
+    """
+    def __init__(self, engine, nb_entities, true_triples=None, nb_workers=None, shard_size=None):
+        """
+        :param engine: inferbeddings.scoring.ScoringEngine instance.
+        :param nb_entities: Number of entities.
+        :param true_triples: Triples used for computing the filtered ranks.
+        :param nb_workers: Number of worker processes - defaults to the number of CPUs.
+        :param shard_size: Number of test triples processed by a worker at a time.
+        """
+        self.engine = engine
+        self.nb_entities = nb_entities
+        self.true_triples = true_triples
+        self.nb_workers = nb_workers if nb_workers is not None else multiprocessing.cpu_count()
+        self.shard_size = shard_size
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes, if they were started.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            shared_true_triples = None
+            if self.true_triples:
+                shared_true_triples = to_shared_array(np.array(list(self.true_triples), dtype=np.int64))
+            initargs = (self.engine.__class__, self.engine.similarity_name,
+                        to_shared_array(self.engine.entity_embeddings),
+                        to_shared_array(self.engine.predicate_embeddings),
+                        {name: to_shared_array(value) for name, value in self.engine.parameters.items()},
+                        self.nb_entities, shared_true_triples)
+
+            logger.debug('Starting {} workers ..'.format(self.nb_workers))
+
+            # Forking a process after TensorFlow started its threads (e.g. in kbp-cli.py) may deadlock the workers
+            context = multiprocessing.get_context('forkserver')
+            self._pool = context.Pool(processes=self.nb_workers, initializer=_init_worker, initargs=initargs)
+        return self._pool
+
+    def __call__(self, pos_triples, neg_triples=None):
+        pos_triples = list(pos_triples)
+
+        # Processes in a pool (e.g. the trials of a sweep) cannot start their own pool
+        if self.nb_workers <= 1 or len(pos_triples) == 0 or multiprocessing.current_process().daemon:
+            ranker = Ranker(scoring_function=self.engine, nb_entities=self.nb_entities,
+                            true_triples=self.true_triples)
+            return ranker(pos_triples)
+
+        # A few shards per worker, so that workers finishing early can pick up the remaining ones
+        shard_size = self.shard_size
+        if shard_size is None:
+            shard_size = int(math.ceil(len(pos_triples) / (self.nb_workers * 4)))
+        shards = [pos_triples[i:i + shard_size] for i in range(0, len(pos_triples), shard_size)]
+
+        logger.debug('Ranking {} triples in {} shards using {} workers ..'
+                     .format(len(pos_triples), len(shards), self.nb_workers))
+
+        shard_ranks = self._get_pool().map(_rank_shard, shards)
+
+        err_subj, err_obj, filtered_err_subj, filtered_err_obj = [], [], [], []
+        for (shard_err_subj, shard_err_obj), (shard_filtered_err_subj, shard_filtered_err_obj) in shard_ranks:
+            err_subj += shard_err_subj
+            err_obj += shard_err_obj
+            filtered_err_subj += shard_filtered_err_subj
+            filtered_err_obj += shard_filtered_err_obj
+
+        return (err_subj, err_obj), (filtered_err_subj, filtered_err_obj)
@@ -31,10 +31,14 @@ def apk(actual, predicted, k=10):
     score = 0.0
     num_hits = 0.0
 
+    # Sets make membership checks O(1), rather than O(n) on lists and prefixes of predicted
+    actual_set, seen = set(actual), set()
+
     for i, p in enumerate(predicted):
-        if p in actual and p not in predicted[:i]:
+        if p in actual_set and p not in seen:
             num_hits += 1.0
             score += num_hits / (i+1.0)
+        seen.add(p)
 
     if not actual:
         return 0.0
@@ -63,3 +67,90 @@ def mapk(actual, predicted, k=10):
             The mean average precision at k over the input lists
     """
     return np.mean([apk(a, p, k) for a, p in zip(actual, predicted)])
+
+
+def average_precision(labels):
+    """
+    Computes the average precision of a ranking, given the binary relevance labels of the ranked elements.
+    Equivalent to apk(actual, predicted, k=len(predicted)), where actual contains the relevant elements.
+    Parameters
+    ----------
+    labels : array
+             A boolean array, where labels[i] is True iff the element at rank i + 1 is relevant
+    Returns
+    -------
+    score : double
+            The average precision of the ranking
+    """
+    labels = np.asarray(labels, dtype=bool)
+    nb_relevant = int(np.sum(labels))
+    if nb_relevant == 0:
+        return 0.0
+    num_hits = np.cumsum(labels, dtype=np.float64)[labels]
+    ranks = np.flatnonzero(labels) + 1.0
+    # np.cumsum accumulates sequentially, so the result is the same as summing precisions one by one
+    return float(np.cumsum(num_hits / ranks)[-1] / nb_relevant)
+
+
+class ScoreHistogram:
+    """
+    Fixed-size histogram of the scores of positive and negative examples, whose range grows as needed by
+    merging adjacent bins, so that it can be updated with an unbounded stream of scores in bounded memory.
+    """
+
+    def __init__(self, nb_bins=2 ** 16):
+        # Merging adjacent pairs of bins requires an even number of bins
+        assert nb_bins >= 2 and nb_bins % 2 == 0
+        self.nb_bins = nb_bins
+        self.counts = np.zeros((2, nb_bins), dtype=np.int64)
+        self.low, self.width = None, None
+
+    @property
+    def high(self):
+        return self.low + self.width * self.nb_bins
+
+    def _merge(self, towards_low):
+        merged_counts = self.counts.reshape(2, -1, 2).sum(axis=2)
+        self.counts = np.zeros_like(self.counts)
+        if towards_low:
+            # The range is extended on the left: merged bins occupy the right half
+            self.counts[:, self.nb_bins // 2:] = merged_counts
+            self.low -= self.width * self.nb_bins
+        else:
+            self.counts[:, :self.nb_bins // 2] = merged_counts
+        self.width *= 2
+
+    def update(self, scores, labels):
+        """
+        Adds scores to the histogram.
+        :param scores: Array of scores.
+        :param labels: Boolean array, True for positive examples.
+        """
+        scores, labels = np.asarray(scores, dtype=np.float64), np.asarray(labels, dtype=bool)
+        if scores.size == 0:
+            return
+        if not np.all(np.isfinite(scores)):
+            raise ValueError('Scores must be finite')
+        min_score, max_score = np.min(scores), np.max(scores)
+
+        if self.low is None:
+            self.low = min_score
+            self.width = max((max_score - min_score) / self.nb_bins, np.finfo(np.float32).eps * max(abs(min_score), 1.))
+
+        while min_score < self.low:
+            self._merge(towards_low=True)
+        while max_score >= self.high:
+            self._merge(towards_low=False)
+
+        bins = np.minimum(((scores - self.low) / self.width).astype(np.int64), self.nb_bins - 1)
+        self.counts[1] += np.bincount(bins[labels], minlength=self.nb_bins)
+        self.counts[0] += np.bincount(bins[~labels], minlength=self.nb_bins)
+
+    def to_weighted_samples(self):
+        """
+        Represents the histogram as weighted samples, one for each non-empty (bin, label) pair.
+        :return: (labels, scores, weights) arrays, where each score is the center of the corresponding bin.
+        """
+        labels, bins = np.nonzero(self.counts)
+        scores = self.low + (bins + .5) * self.width
+        return labels, scores, self.counts[labels, bins]
@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from inferbeddings.io.base import iopen, read_triples, save
+from inferbeddings.io.base import iopen, read_triples, cache_triples, save
 from inferbeddings.io.embeddings import load_glove, load_word2vec, load_glove_words, load_word2vec_words
+from inferbeddings.io.embeddings import convert_embeddings, load_embeddings_cache
 
 __all__ = ['iopen',
            'read_triples',
+           'cache_triples',
            'save',
            'load_glove',
            'load_word2vec',
            'load_glove_words',
-           'load_word2vec_words']
+           'load_word2vec_words',
+           'convert_embeddings',
+           'load_embeddings_cache']
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import os
 import gzip
 import bz2
 import pickle
 
+import numpy as np
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +21,57 @@ def iopen(file, *args, **kwargs):
     return _open(file, *args, **kwargs)
 
 
+# {absolute path: (symbols, pos_idxs, neg_idxs)} cache, filled by cache_triples
+_triples_cache = {}
+
+
+def _encode_triples(pos_triples, neg_triples):
+    symbols = sorted({symbol for triples in (pos_triples, neg_triples or [])
+                      for triple in triples for symbol in triple})
+    symbol_to_idx = {symbol: idx for idx, symbol in enumerate(symbols)}
+
+    def encode(triples):
+        idxs = np.array([[symbol_to_idx[symbol] for symbol in triple] for triple in triples], dtype=np.int32)
+        idxs = idxs.reshape(-1, 3)
+        idxs.flags.writeable = False
+        return idxs
+
+    symbols = np.array(symbols, dtype=np.str_)
+    symbols.flags.writeable = False
+    return symbols, encode(pos_triples), encode(neg_triples) if neg_triples is not None else None
+
+
+def _decode_triples(symbols, idxs):
+    return [tuple(triple) for triple in symbols[idxs].tolist()]
+
+
+def cache_triples(paths):
+    """
+    Reads the triples in the given files once and keeps them in memory, so that later calls to read_triples on
+    such files do not read and parse them again.
+
+    The triples are stored in read-only numpy arrays - an array of symbols, and (nb_triples, 3) arrays of symbol
+    indices - rather than in lists of tuples of strings: processes forked afterwards share the pages of these arrays
+    with the parent, since reading them does not update any reference count. Each call to read_triples still builds
+    a new list of triples, owned by the caller.
+
+    :param paths: List of paths of triple files.
+    """
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in _triples_cache:
+            _triples_cache[key] = _encode_triples(*_read_triples(path))
+
+
 def read_triples(path):
+    cached = _triples_cache.get(os.path.abspath(path))
+    if cached is not None:
+        symbols, pos_idxs, neg_idxs = cached
+        return _decode_triples(symbols, pos_idxs), _decode_triples(symbols, neg_idxs) if neg_idxs is not None else None
+    return _read_triples(path)
+
+
+def _read_triples(path):
     logger.debug('Acquiring %s ..' % path)
     pos_triples, neg_triples = [], None
 
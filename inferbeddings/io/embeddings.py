@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import os
+import warnings
+
+import numpy as np
+
 import gensim
 from inferbeddings.io import iopen
 
@@ -7,8 +12,21 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+CACHE_VERSION = 1
+
+
+def load_glove(path, words=None, cache_dir=None):
+    """
+    Loads GloVe word embeddings.
+
+    :param path: Path of the GloVe file.
+    :param words: If not None, only load the embeddings of these words.
+    :param cache_dir: If not None, load the embeddings from a binary cache in this directory, created on first use.
+    :return: Dictionary mapping words to their embeddings.
+    """
+    if cache_dir is not None:
+        return load_cached_embeddings(path, words=words, cache_dir=cache_dir)
 
-def load_glove(path, words=None):
     word_to_embedding = {}
 
     with iopen(path, 'r') as stream:
@@ -27,7 +45,10 @@ def load_glove(path, words=None):
     return word_to_embedding
 
 
-def load_glove_words(path, words=None):
+def load_glove_words(path, words=None, cache_dir=None):
+    if cache_dir is not None:
+        return load_cached_words(path, words=words, cache_dir=cache_dir)
+
     res = set()
 
     with iopen(path, 'r') as stream:
@@ -43,7 +64,10 @@ def load_glove_words(path, words=None):
     return res
 
 
-def load_word2vec(path, words=None, binary=True):
+def load_word2vec(path, words=None, binary=True, cache_dir=None):
+    if cache_dir is not None:
+        return load_cached_embeddings(path, words=words, cache_dir=cache_dir, is_word2vec=True, binary=binary)
+
     word_to_embedding = {}
 
     model = gensim.models.KeyedVectors.load_word2vec_format(path, binary=binary)
@@ -54,5 +78,237 @@ def load_word2vec(path, words=None, binary=True):
     return word_to_embedding
 
 
-def load_word2vec_words(path, words=None):
-    raise NotImplementedError('Operation not yet implemented')
+def load_word2vec_words(path, words=None, binary=True, cache_dir=None):
+    if cache_dir is not None:
+        return load_cached_words(path, words=words, cache_dir=cache_dir, is_word2vec=True, binary=binary)
+
+    res = set()
+
+    with iopen(path, 'rb') as stream:
+        for chunk_words, _ in _read_word2vec(stream, binary=binary):
+            res.update(word for word in chunk_words if words is None or word in words)
+
+    return res
+
+
+def _read_glove(stream, chunk_size=8192):
+    """
+    Iterates over the embeddings in a GloVe file, in (words, embedding matrix) chunks - words may contain spaces,
+    so the embedding is given by the last fields of each line, and the embedding size by the first line.
+    """
+    embedding_size, words, fields = None, [], []
+    for n, line in enumerate(stream):
+        if not isinstance(line, str):
+            line = line.decode('utf-8')
+        line = line.rstrip()
+        if embedding_size is None:
+            embedding_size = line.count(' ')
+
+        word, _, line_fields = line.partition(' ')
+        if line_fields.count(' ') != embedding_size - 1:
+            # The word contains spaces
+            word = line.rsplit(' ', embedding_size)[0]
+            line_fields = line[len(word) + 1:]
+
+        words += [word]
+        fields += [line_fields]
+        if len(words) == chunk_size:
+            yield _parse_fields(words, fields, embedding_size)
+            words, fields = [], []
+
+    if words:
+        yield _parse_fields(words, fields, embedding_size)
+
+
+def _parse_fields(words, fields, embedding_size):
+    # Parsing all lines of a chunk at once is considerably faster than parsing each line; malformed values stop
+    # the parsing early, in which case lines are parsed one by one
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            embeddings = np.fromstring(' '.join(fields), dtype=np.float32, sep=' ')
+        if embeddings.shape[0] == len(words) * embedding_size:
+            return words, embeddings.reshape(len(words), embedding_size)
+    except ValueError:
+        pass
+
+    valid_words, valid_embeddings = [], []
+    for word, line_fields in zip(words, fields):
+        try:
+            embedding = np.array(line_fields.split(' '), dtype=np.float32)
+        except ValueError:
+            embedding = None
+        if embedding is None or embedding.shape[0] != embedding_size:
+            logger.error('{}\t{}'.format(word, line_fields))
+            continue
+        valid_words += [word]
+        valid_embeddings += [embedding]
+    return valid_words, np.array(valid_embeddings, dtype=np.float32).reshape(-1, embedding_size)
+
+
+def _read_word2vec(stream, binary=True, chunk_size=8192):
+    """
+    Iterates over the embeddings in a word2vec file, opened in binary mode, in (words, embedding matrix) chunks.
+    """
+    nb_words, embedding_size = [int(field) for field in stream.readline().decode('utf-8').split()]
+    words, embeddings = [], []
+    for n in range(nb_words):
+        if binary:
+            word = bytearray()
+            while True:
+                c = stream.read(1)
+                if c == b' ' or c == b'':
+                    break
+                # Embeddings may or may not be followed by a newline
+                if c != b'\n':
+                    word += c
+            words += [word.decode('utf-8', errors='replace')]
+            embeddings += [np.frombuffer(stream.read(4 * embedding_size), dtype='<f4')]
+        else:
+            split_line = stream.readline().decode('utf-8').rstrip().rsplit(' ', embedding_size)
+            words += [split_line[0]]
+            embeddings += [np.array(split_line[1:], dtype=np.float32)]
+
+        if len(words) == chunk_size:
+            yield words, np.array(embeddings, dtype=np.float32)
+            words, embeddings = [], []
+
+    if words:
+        yield words, np.array(embeddings, dtype=np.float32)
+
+
+def cache_paths(path, cache_dir=None):
+    """
+    Paths of the binary cache of an embeddings file - by default, in the directory of the file: a .vectors.npy file,
+    containing the embedding matrix, and a .vocab.npz file, containing the word of each row.
+    """
+    prefix = os.path.join(cache_dir if cache_dir is not None else os.path.dirname(path), os.path.basename(path))
+    return '{}.vectors.npy'.format(prefix), '{}.vocab.npz'.format(prefix)
+
+
+def convert_embeddings(path, cache_dir=None, is_word2vec=False, binary=True, chunk_size=8192):
+    """
+    Converts a GloVe or word2vec file in a binary cache, which can then be memory-mapped by load_embeddings_cache.
+
+    :param path: Path of the embeddings file.
+    :param cache_dir: Directory of the cache - by default, the directory of the embeddings file.
+    :param is_word2vec: Whether the file is in the word2vec format (otherwise, GloVe).
+    :param binary: Whether the word2vec file is binary.
+    :param chunk_size: Number of embeddings written at a time.
+    :return: (vectors_path, vocab_path) pair.
+    """
+    vectors_path, vocab_path = cache_paths(path, cache_dir=cache_dir)
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # The number of embeddings in a GloVe file is not known in advance, so they are first appended to a raw file
+    raw_path = '{}.{}.raw'.format(vectors_path, os.getpid())
+    tmp_vectors_path = '{}.{}.tmp.npy'.format(vectors_path, os.getpid())
+    tmp_vocab_path = '{}.{}.tmp.npz'.format(vocab_path, os.getpid())
+
+    source_stat = os.stat(path)
+    vocabulary, embedding_size = [], None
+    try:
+        with iopen(path, 'rb') as stream, open(raw_path, 'wb') as raw:
+            if is_word2vec:
+                chunks = _read_word2vec(stream, binary=binary, chunk_size=chunk_size)
+            else:
+                chunks = _read_glove(stream, chunk_size=chunk_size)
+            for chunk_words, chunk_embeddings in chunks:
+                embedding_size = chunk_embeddings.shape[1]
+                vocabulary += chunk_words
+                raw.write(chunk_embeddings.astype('<f4').tobytes())
+
+        shape = (len(vocabulary), embedding_size or 0)
+        if shape[0] > 0:
+            raw_vectors = np.memmap(raw_path, dtype='<f4', mode='r', shape=shape)
+            vectors = np.lib.format.open_memmap(tmp_vectors_path, mode='w+', dtype='<f4', shape=shape)
+            for start in range(0, shape[0], chunk_size):
+                vectors[start:start + chunk_size] = raw_vectors[start:start + chunk_size]
+            vectors.flush()
+            del vectors, raw_vectors
+        else:
+            np.save(tmp_vectors_path, np.zeros(shape, dtype='<f4'))
+
+        with open(tmp_vocab_path, 'wb') as f:
+            # Words cannot contain newlines, which separate them
+            np.savez(f, version=np.array(CACHE_VERSION),
+                     words=np.frombuffer('\n'.join(vocabulary).encode('utf-8'), dtype=np.uint8),
+                     source=np.array([source_stat.st_size, source_stat.st_mtime_ns]))
+
+        # The vocabulary is written last, so that an interrupted conversion does not leave a valid-looking cache
+        os.replace(tmp_vectors_path, vectors_path)
+        os.replace(tmp_vocab_path, vocab_path)
+    finally:
+        for tmp_path in [raw_path, tmp_vectors_path, tmp_vocab_path]:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+
+    logger.info('Cached {} embeddings from {} in {}'.format(len(vocabulary), path, vectors_path))
+    return vectors_path, vocab_path
+
+
+def load_embeddings_cache(path, cache_dir=None):
+    """
+    Loads the binary cache of an embeddings file, created by convert_embeddings.
+
+    :param path: Path of the embeddings file.
+    :param cache_dir: Directory of the cache - by default, the directory of the embeddings file.
+    :return: (vocabulary, vectors) pair, where vocabulary is the list of words and vectors a read-only memory-mapped
+        embedding matrix, or None if there is no cache, or if the embeddings file changed after it was created.
+    """
+    vectors_path, vocab_path = cache_paths(path, cache_dir=cache_dir)
+    if not (os.path.isfile(vectors_path) and os.path.isfile(vocab_path)):
+        return None
+
+    source_stat = os.stat(path)
+    with np.load(vocab_path) as data:
+        if int(data['version']) != CACHE_VERSION:
+            return None
+        if data['source'].tolist() != [source_stat.st_size, source_stat.st_mtime_ns]:
+            logger.info('Cache {} is stale'.format(vocab_path))
+            return None
+        words = data['words'].tobytes().decode('utf-8')
+
+    vocabulary = words.split('\n') if words else []
+    vectors = np.load(vectors_path, mmap_mode='r')
+    return vocabulary, vectors
+
+
+def _embeddings_cache(path, cache_dir, is_word2vec, binary):
+    cache = load_embeddings_cache(path, cache_dir=cache_dir)
+    if cache is None:
+        logger.info('Converting {} ..'.format(path))
+        convert_embeddings(path, cache_dir=cache_dir, is_word2vec=is_word2vec, binary=binary)
+        cache = load_embeddings_cache(path, cache_dir=cache_dir)
+    return cache
+
+
+def load_cached_embeddings(path, words=None, cache_dir=None, is_word2vec=False, binary=True):
+    """
+    Loads word embeddings from the binary cache of a GloVe or word2vec file, creating it if needed: only the rows
+    of the requested words are read from the memory-mapped embedding matrix.
+
+    :param path: Path of the embeddings file.
+    :param words: If not None, only load the embeddings of these words.
+    :param cache_dir: Directory of the cache - by default, the directory of the embeddings file.
+    :param is_word2vec: Whether the file is in the word2vec format (otherwise, GloVe).
+    :param binary: Whether the word2vec file is binary.
+    :return: Dictionary mapping words to their embeddings, as NumPy arrays.
+    """
+    vocabulary, vectors = _embeddings_cache(path, cache_dir, is_word2vec, binary)
+
+    # As with load_glove, the last occurrence of a repeated word is used
+    word_to_row = {word: row for row, word in enumerate(vocabulary) if words is None or word in words}
+    rows = np.array(sorted(word_to_row.values()), dtype=np.int64)
+    embeddings = np.asarray(vectors[rows]) if rows.shape[0] > 0 else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+    row_to_position = {row: position for position, row in enumerate(rows.tolist())}
+    return {word: embeddings[row_to_position[row]] for word, row in word_to_row.items()}
+
+
+def load_cached_words(path, words=None, cache_dir=None, is_word2vec=False, binary=True):
+    """
+    Words in the binary cache of a GloVe or word2vec file, creating it if needed.
+    """
+    vocabulary, _ = _embeddings_cache(path, cache_dir, is_word2vec, binary)
+    return {word for word in vocabulary if words is None or word in words}
@@ -1,12 +1,9 @@
 # -*- coding: utf-8 -*-
 
-import gzip
-import json
-
 import numpy as np
 import nltk
 
-from inferbeddings.nli.util import pad_sequences
+from inferbeddings.nli.corpus import load_corpus, pad_ragged
 from inferbeddings.models.training.util import make_batches
 
 import logging
@@ -35,24 +32,11 @@ class SNLILoader:
         self.seed = seed
         self.random_state = np.random.RandomState(self.seed)
 
-        self.sentences = []
-
-        with gzip.open(self.path, 'rb') as f:
-            for line in f:
-                decoded_line = line.decode('utf-8')
-                obj = json.loads(decoded_line)
-
-                s1, s2, gl = SNLILoader.extract_sentences(obj)
-
-                if gl in {'entailment', 'neutral', 'contradiction'}:
-                    self.sentences += [s1, s2]
-
-        self.sentence_idxs = []
-        for sentence in self.sentences:
-            s_idxs = [self.token_to_index.get(word, self.unk_idx) for word in sentence]
-            self.sentence_idxs += [s_idxs]
+        # Premises and hypotheses of all instances, from the tokenized corpus cache
+        self.corpus = load_corpus(self.path)
 
-        self.tensor = pad_sequences(self.sentence_idxs)
+        index_map = self.corpus.index_map(self.token_to_index, default=self.unk_idx)
+        self.tensor = pad_ragged(index_map[self.corpus.tokens], self.corpus.lengths)
         self.nb_samples, self.max_len = self.tensor.shape
 
         self.create_batches()
@@ -1,11 +1,10 @@
 # -*- coding: utf-8 -*-
 
-import gzip
-import json
-
 import numpy as np
 import nltk
 
+from inferbeddings.nli.corpus import load_corpus, gather_ragged
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,31 +34,23 @@ class SNLILoader:
 
         self.random_state = np.random.RandomState(self.seed)
 
-        self.sentences = SNLILoader.read_from_path(self.path)
+        # Premises and hypotheses of all instances, from the tokenized corpus cache
+        self.corpus = load_corpus(self.path)
+        self.index_map = self.corpus.index_map(self.token_to_index, default=self.unk_idx)
 
         self.create_batches()
         self.reset_batch_pointer()
 
     @staticmethod
     def read_from_path(path):
-        res = []
-        with gzip.open(path, 'rb') as f:
-            for line in f:
-                decoded_line = line.decode('utf-8')
-                obj = json.loads(decoded_line)
-                s1, s2, gl = SNLILoader.extract_sentences(obj)
-                if gl in {'entailment', 'neutral', 'contradiction'}:
-                    res += [s1, s2]
-        return res
+        corpus = load_corpus(path)
+        return [corpus.sentence_tokens(i) for i in range(corpus.offsets.shape[0] - 1)]
 
     def create_batches(self):
-        self.text_idxs = []
-        order = self.random_state.permutation(len(self.sentences))
+        order = self.random_state.permutation(self.corpus.offsets.shape[0] - 1)
 
-        for i in order:
-            sentence = self.sentences[i]
-            for word in sentence:
-                self.text_idxs += [self.token_to_index.get(word, self.unk_idx)]
+        # Concatenation of the token indices of all sentences, in the order given by the permutation
+        self.text_idxs, _ = gather_ragged(self.index_map[self.corpus.tokens], self.corpus.lengths, order)
 
         self.tensor = np.array(self.text_idxs)
         self.num_batches = int(self.tensor.size / (self.batch_size * self.seq_length))
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from inferbeddings.logic.base import materialize
+from inferbeddings.logic.base import materialize, closure
+from inferbeddings.logic.cache import MaterializationCache
 
-__all__ = ['materialize']
+__all__ = ['materialize', 'closure', 'MaterializationCache']
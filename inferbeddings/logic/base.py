@@ -3,6 +3,7 @@
 from pyDatalog import pyDatalog
 
 from inferbeddings.knowledgebase import Fact
+from inferbeddings.parse.clauses import Variable
 
 import logging
 
@@ -49,3 +50,160 @@ def materialize(facts, clauses, parser):
     inferred_facts = [Fact(index_to_predicate[p], [index_to_entity[s], index_to_entity[o]])
                       for (s, p, o) in sorted(_ans.answers)]
     return inferred_facts
+
+
+class TripleIndex:
+    """
+    Index over (subject, predicate, object) triples, supporting lookups where the subject and/or the object
+    of a triple are bound.
+    """
+
+    def __init__(self, triples=None):
+        self.triples = set()
+        self.predicate_to_triples = dict()
+        self.predicate_subject_to_objects = dict()
+        self.predicate_object_to_subjects = dict()
+
+        for triple in (triples if triples is not None else []):
+            self.add(triple)
+
+    def __contains__(self, triple):
+        return triple in self.triples
+
+    def __len__(self):
+        return len(self.triples)
+
+    def add(self, triple):
+        if triple in self.triples:
+            return False
+        s, p, o = triple
+        self.triples.add(triple)
+        self.predicate_to_triples.setdefault(p, set()).add(triple)
+        self.predicate_subject_to_objects.setdefault((p, s), set()).add(o)
+        self.predicate_object_to_subjects.setdefault((p, o), set()).add(s)
+        return True
+
+    def candidates(self, p, s=None, o=None):
+        """
+        Yields all (s, p, o) triples in the index matching the given predicate, and the subject and object if bound.
+        """
+        if s is not None and o is not None:
+            if (s, p, o) in self.triples:
+                yield (s, p, o)
+        elif s is not None:
+            for _o in self.predicate_subject_to_objects.get((p, s), ()):
+                yield (s, p, _o)
+        elif o is not None:
+            for _s in self.predicate_object_to_subjects.get((p, o), ()):
+                yield (_s, p, o)
+        else:
+            yield from self.predicate_to_triples.get(p, ())
+
+
+def _is_variable(term):
+    return isinstance(term, Variable)
+
+
+def _resolve(term, binding):
+    return binding.get(term.name) if _is_variable(term) else term.name
+
+
+def _unify(atom, triple, binding):
+    """
+    Extends the {variable: entity} mapping binding so that atom matches triple, or returns None if not possible.
+    """
+    s, p, o = triple
+    if p != atom.predicate.name:
+        return None
+    extended_binding = binding
+    for term, value in zip(atom.arguments, (s, o)):
+        if _is_variable(term):
+            bound_value = extended_binding.get(term.name)
+            if bound_value is None:
+                if extended_binding is binding:
+                    extended_binding = dict(binding)
+                extended_binding[term.name] = value
+            elif bound_value != value:
+                return None
+        elif term.name != value:
+            return None
+    return extended_binding
+
+
+def _join(atoms, binding, index):
+    """
+    Yields all {variable: entity} mappings extending binding which satisfy all atoms in the index.
+    """
+    if len(atoms) == 0:
+        yield binding
+        return
+    atom, other_atoms = atoms[0], atoms[1:]
+    s, o = _resolve(atom.arguments[0], binding), _resolve(atom.arguments[1], binding)
+    for triple in index.candidates(atom.predicate.name, s, o):
+        extended_binding = _unify(atom, triple, binding)
+        if extended_binding is not None:
+            yield from _join(other_atoms, extended_binding, index)
+
+
+def _head_triple(clause, binding):
+    head = clause.head
+    s, o = _resolve(head.arguments[0], binding), _resolve(head.arguments[1], binding)
+    if s is None or o is None:
+        raise ValueError('Clause {} is not range-restricted'.format(clause))
+    return s, head.predicate.name, o
+
+
+def _consequences(clauses, index, delta):
+    """
+    Yields all triples that can be derived by applying the clauses once, using at least one triple in delta.
+    """
+    delta_index = TripleIndex(delta)
+    for clause in clauses:
+        body = clause.body
+        for pivot_idx, pivot_atom in enumerate(body):
+            other_atoms = body[:pivot_idx] + body[pivot_idx + 1:]
+            for triple in delta_index.candidates(pivot_atom.predicate.name):
+                binding = _unify(pivot_atom, triple, dict())
+                if binding is not None:
+                    for extended_binding in _join(other_atoms, binding, index):
+                        yield _head_triple(clause, extended_binding)
+
+
+def closure(triples, clauses, delta=None, new_clauses=None):
+    """
+    Computes the deductive closure of a set of (subject, predicate, object) triples using semi-naive
+    forward chaining, where only consequences involving newly derived triples are computed at each iteration.
+
+    :param triples: Iterable of (s, p, o) triples, where the ones not in delta are assumed to be closed
+        under all clauses not in new_clauses.
+    :param clauses: List of Horn clauses.
+    :param delta: Iterable of new (s, p, o) triples - if None, all triples are considered new.
+    :param new_clauses: List of clauses, among the ones in clauses, not yet applied to the closed triples.
+    :return: Set of (s, p, o) triples.
+    """
+    index = TripleIndex(triples)
+    if delta is None:
+        delta = set(index.triples)
+    else:
+        delta = {triple for triple in delta}
+        for triple in delta:
+            index.add(triple)
+
+    clauses = [clause for clause in clauses if len(clause.body) > 0]
+
+    if new_clauses:
+        # New clauses were never applied, so their consequences on all triples are new as well
+        new_clauses = [clause for clause in new_clauses if len(clause.body) > 0]
+        delta |= {triple for triple in _consequences(new_clauses, index, index.triples) if triple not in index}
+        for triple in delta:
+            index.add(triple)
+
+    while len(delta) > 0:
+        new_delta = set()
+        for triple in _consequences(clauses, index, delta):
+            if triple not in index and triple not in new_delta:
+                new_delta.add(triple)
+        for triple in new_delta:
+            index.add(triple)
+        delta = new_delta
+    return index.triples
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import pickle
+import hashlib
+
+from inferbeddings.knowledgebase import Fact
+from inferbeddings.logic.base import closure
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MaterializationCache:
+    """
+    On-disk cache of materialized Knowledge Bases, keyed by a hash of the training triples and of the clause set.
+
+    When no entry matches exactly, the closure is computed incrementally, starting from the largest cached
+    closure whose triples and clauses are subsets of the requested ones, so that only the delta is derived.
+    """
+
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def get_key(triples, clause_strs):
+        """
+        Hash identifying a (training triples, clause set) pair.
+        :param triples: Iterable of (s, p, o) triples.
+        :param clause_strs: Iterable of clauses, represented as strings.
+        :return: Hexadecimal digest.
+        """
+        digest = hashlib.sha1()
+        for s, p, o in sorted(set(triples)):
+            digest.update('{}\t{}\t{}\n'.format(s, p, o).encode('utf-8'))
+        digest.update(b'\n')
+        for clause_str in sorted(set(clause_strs)):
+            digest.update('{}\n'.format(clause_str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, '{}.pkl'.format(key))
+
+    def _load_index(self):
+        index_path = os.path.join(self.path, self.INDEX_NAME)
+        if not os.path.isfile(index_path):
+            return {}
+        with open(index_path, 'r') as f:
+            return json.load(f)
+
+    def _dump(self, path, write, mode):
+        # Write to a temporary file first, so that concurrent runs never read partially written entries
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def _load_entry(self, key):
+        with open(self._entry_path(key), 'rb') as f:
+            return pickle.load(f)
+
+    def _store_entry(self, key, triples, clause_strs, closed_triples):
+        entry = {
+            'triples': sorted(triples),
+            'clauses': sorted(clause_strs),
+            'closure': sorted(closed_triples)
+        }
+        self._dump(self._entry_path(key), lambda f: pickle.dump(entry, f), 'wb')
+
+        index = self._load_index()
+        index[key] = {'clauses': entry['clauses'], 'nb_triples': len(entry['triples'])}
+        self._dump(os.path.join(self.path, self.INDEX_NAME), lambda f: json.dump(index, f), 'w')
+
+    def _find_base(self, triples, clause_strs):
+        """
+        Finds the largest cached entry whose triples and clauses are subsets of the given ones.
+        """
+        index = self._load_index()
+        candidate_keys = [key for key, meta in index.items()
+                          if set(meta['clauses']) <= clause_strs and meta['nb_triples'] <= len(triples)]
+        candidate_keys = sorted(candidate_keys, key=lambda k: (len(index[k]['clauses']), index[k]['nb_triples']),
+                                reverse=True)
+        for key in candidate_keys:
+            if not os.path.isfile(self._entry_path(key)):
+                continue
+            entry = self._load_entry(key)
+            if set(entry['triples']) <= triples:
+                return key, entry
+        return None, None
+
+    def get(self, triples, clauses):
+        """
+        Computes (or retrieves) the deductive closure of a set of triples under a set of clauses.
+        :param triples: Iterable of (s, p, o) triples.
+        :param clauses: List of Horn clauses.
+        :return: Set of (s, p, o) triples.
+        """
+        triples = set(triples)
+        str_to_clause = {str(clause): clause for clause in clauses}
+        clause_strs = set(str_to_clause.keys())
+
+        key = self.get_key(triples, clause_strs)
+        if os.path.isfile(self._entry_path(key)):
+            logger.info('Loading the materialized Knowledge Base from {}'.format(self._entry_path(key)))
+            return set(self._load_entry(key)['closure'])
+
+        base_key, base_entry = self._find_base(triples, clause_strs)
+        if base_entry is None:
+            logger.info('No cached closure found, materializing from scratch ..')
+            closed_triples = closure(triples, list(str_to_clause.values()))
+        else:
+            base_triples = set(base_entry['closure'])
+            new_clauses = [str_to_clause[c] for c in sorted(clause_strs - set(base_entry['clauses']))]
+            delta = triples - base_triples
+            logger.info('Extending the cached closure {}: {} new facts, {} new clauses ..'
+                        .format(base_key, len(delta), len(new_clauses)))
+            closed_triples = closure(base_triples, list(str_to_clause.values()),
+                                     delta=delta, new_clauses=new_clauses)
+
+        self._store_entry(key, triples, clause_strs, closed_triples)
+        return closed_triples
+
+    def __call__(self, facts, clauses, parser):
+        """
+        Drop-in replacement for inferbeddings.logic.materialize, returning inferred facts in the same order.
+        """
+        triples = {(f.argument_names[0], f.predicate_name, f.argument_names[1]) for f in facts}
+        closed_triples = self.get(triples, clauses)
+
+        def sort_key(triple):
+            s, p, o = triple
+            return parser.entity_to_index[s], parser.predicate_to_index[p], parser.entity_to_index[o]
+
+        return [Fact(p, [s, o]) for (s, p, o) in sorted(closed_triples, key=sort_key)]
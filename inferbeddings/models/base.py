@@ -10,7 +10,7 @@ import sys
 
 class BaseModel(metaclass=abc.ABCMeta):
     def __init__(self, entity_embeddings=None, predicate_embeddings=None, similarity_function=None,
-                 reuse_variables=False, *args, **kwargs):
+                 reuse_variables=False, walk_mask=None, *args, **kwargs):
         """
         Abstract class inherited by all models.
 
@@ -18,10 +18,12 @@ class BaseModel(metaclass=abc.ABCMeta):
         :param predicate_embeddings: (batch_size, walk_size, predicate_embedding_size) Tensor.
         :param similarity_function: similarity function.
         :param reuse_variables: States whether the variables within the model need to be reused.
+        :param walk_mask: (batch_size, walk_size) Tensor, with 0 for the padding steps of variable-length walks.
         """
         self.entity_embeddings = entity_embeddings
         self.predicate_embeddings = predicate_embeddings
         self.similarity_function = similarity_function
+        self.walk_mask = walk_mask
 
         self.reuse_variables = reuse_variables
 
@@ -48,7 +50,7 @@ class TranslatingModel(BaseModel):
         :return: (batch_size) Tensor containing the scores associated by the models to the walks.
         """
         subject_embedding, object_embedding = self.entity_embeddings[:, 0, :], self.entity_embeddings[:, 1, :]
-        walk_embedding = embeddings.additive_walk_embedding(self.predicate_embeddings)
+        walk_embedding = embeddings.additive_walk_embedding(self.predicate_embeddings, mask=self.walk_mask)
 
         translated_subject_embedding = subject_embedding + walk_embedding
         return self.similarity_function(translated_subject_embedding, object_embedding)
@@ -68,7 +70,7 @@ class BilinearDiagonalModel(BaseModel):
         :return: (batch_size) Tensor containing the scores associated by the models to the walks.
         """
         subject_embedding, object_embedding = self.entity_embeddings[:, 0, :], self.entity_embeddings[:, 1, :]
-        walk_embedding = embeddings.bilinear_diagonal_walk_embedding(self.predicate_embeddings)
+        walk_embedding = embeddings.bilinear_diagonal_walk_embedding(self.predicate_embeddings, mask=self.walk_mask)
 
         scaled_subject_embedding = subject_embedding * walk_embedding
         return self.similarity_function(scaled_subject_embedding, object_embedding)
@@ -90,7 +92,8 @@ class BilinearModel(BaseModel):
         subject_embedding, object_embedding = self.entity_embeddings[:, 0, :], self.entity_embeddings[:, 1, :]
         entity_embedding_size = subject_embedding.get_shape()[-1].value
 
-        walk_embedding = embeddings.bilinear_walk_embedding(self.predicate_embeddings, entity_embedding_size)
+        walk_embedding = embeddings.bilinear_walk_embedding(self.predicate_embeddings, entity_embedding_size,
+                                                            mask=self.walk_mask)
 
         es = tf.expand_dims(subject_embedding, 1)
         sW = tf.matmul(es, walk_embedding)[:, 0, :]
@@ -112,7 +115,7 @@ class ComplexModel(BaseModel):
         :return: (batch_size) Tensor containing the scores associated by the models to the walks.
         """
         subject_embedding, object_embedding = self.entity_embeddings[:, 0, :], self.entity_embeddings[:, 1, :]
-        walk_embedding = embeddings.complex_walk_embedding(self.predicate_embeddings)
+        walk_embedding = embeddings.complex_walk_embedding(self.predicate_embeddings, mask=self.walk_mask)
 
         es_re, es_im = tf.split(value=subject_embedding, num_or_size_splits=2, axis=1)
         eo_re, eo_im = tf.split(value=object_embedding, num_or_size_splits=2, axis=1)
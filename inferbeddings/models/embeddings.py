@@ -3,7 +3,33 @@
 import tensorflow as tf
 
 
-def additive_walk_embedding(predicate_embeddings):
+def masked_scan(fn, transposed_embedding_matrix, initializer, mask=None):
+    """
+    Computes tf.scan(fn, transposed_embedding_matrix, initializer=initializer), where the scan state is left
+    unchanged on the padding steps of a batch of walks, so that padded walks are embedded exactly as their
+    unpadded versions.
+
+    :param fn: Composition function, mapping the current state and a step to the new state.
+    :param transposed_embedding_matrix: (walk_length, batch_size, ..) Tensor containing the walk steps.
+    :param initializer: (batch_size, ..) Tensor, the initial state of the scan.
+    :param mask: (batch_size, walk_length) Tensor, with 1 for actual steps and 0 for padding - if None,
+        no step is masked.
+    :return: (walk_length, batch_size, ..) Tensor containing the states of the scan.
+    """
+    if mask is None:
+        return tf.scan(fn, transposed_embedding_matrix, initializer=initializer)
+
+    # Transpose the (batch_size, walk_length) mask in a (walk_length, batch_size) one
+    transposed_mask = tf.transpose(tf.cast(mask, tf.bool), perm=[1, 0])
+
+    def masked_fn(x, step):
+        y, mask_t = step
+        return tf.where(mask_t, fn(x, y), x)
+
+    return tf.scan(masked_fn, (transposed_embedding_matrix, transposed_mask), initializer=initializer)
+
+
+def additive_walk_embedding(predicate_embeddings, mask=None):
     """
     Takes a walk, represented by a 3D Tensor with shape (batch_size, walk_length, embedding_length),
     and computes its embedding using a simple additive models.
@@ -11,6 +37,7 @@ def additive_walk_embedding(predicate_embeddings):
     > walk_embedding = tf.reduce_prod(predicate_embeddings, axis=1)
 
     :param predicate_embeddings: 3D Tensor containing the embedding of the predicates in the walk.
+    :param mask: (batch_size, walk_length) Tensor, with 0 for the padding steps of variable-length walks.
     :return: 2D tensor of size (batch_size, embedding_length) containing the walk embeddings.
     """
     batch_size, embedding_len = tf.shape(predicate_embeddings)[0], tf.shape(predicate_embeddings)[2]
@@ -23,13 +50,13 @@ def additive_walk_embedding(predicate_embeddings):
 
     # The walk embeddings are given by the sum of the predicate embeddings
     # where zero is the neutral element wrt. the element-wise sum
-    walk_embedding = tf.scan(lambda x, y: x + y, transposed_embedding_matrix, initializer=initializer)
+    walk_embedding = masked_scan(lambda x, y: x + y, transposed_embedding_matrix, initializer, mask=mask)
 
     # Add the initializer as the first step in the scan sequence, in case the walk has zero-length
     return tf.concat(values=[tf.expand_dims(initializer, 0), walk_embedding], axis=0)[-1]
 
 
-def bilinear_diagonal_walk_embedding(predicate_embeddings):
+def bilinear_diagonal_walk_embedding(predicate_embeddings, mask=None):
     """
     Takes a walk, represented by a 3D Tensor with shape (batch_size, walk_length, embedding_length),
     and computes its embedding using a simple bilinear diagonal models.
@@ -37,6 +64,7 @@ def bilinear_diagonal_walk_embedding(predicate_embeddings):
     > walk_embedding = tf.reduce_prod(predicate_embeddings, axis=1)
 
     :param predicate_embeddings: 3D Tensor containing the embedding of the predicates in the walk.
+    :param mask: (batch_size, walk_length) Tensor, with 0 for the padding steps of variable-length walks.
     :return: 2D tensor of size (batch_size, embedding_length) containing the walk embeddings.
     """
     batch_size, embedding_len = tf.shape(predicate_embeddings)[0], tf.shape(predicate_embeddings)[2]
@@ -49,18 +77,19 @@ def bilinear_diagonal_walk_embedding(predicate_embeddings):
     initializer = tf.ones((batch_size, embedding_len), dtype=predicate_embeddings.dtype)
 
     # The walk embeddings are given by the element-wise product of the predicate embeddings
-    walk_embedding = tf.scan(lambda x, y: x * y, transposed_embedding_matrix, initializer=initializer)
+    walk_embedding = masked_scan(lambda x, y: x * y, transposed_embedding_matrix, initializer, mask=mask)
 
     # Add the initializer as the first step in the scan sequence, in case the walk has zero-length
     return tf.concat(values=[tf.expand_dims(initializer, 0), walk_embedding], axis=0)[-1]
 
 
-def bilinear_walk_embedding(predicate_embeddings, entity_embedding_size):
+def bilinear_walk_embedding(predicate_embeddings, entity_embedding_size, mask=None):
     """
     Takes a walk, represented by a 3D Tensor with shape (batch_size, walk_length, embedding_length),
     and computes its embedding using a simple bilinear models.
 
     :param predicate_embeddings: 3D Tensor containing the embedding of the predicates in the walk.
+    :param mask: (batch_size, walk_length) Tensor, with 0 for the padding steps of variable-length walks.
     :param entity_embedding_size: size of the entity embeddings.
     :return: 2D tensor of size (batch_size, entity_embedding_length, entity_embedding_length) containing the walk embeddings.
     """
@@ -81,13 +110,15 @@ def bilinear_walk_embedding(predicate_embeddings, entity_embedding_size):
 
     # The first step in the walk is the identity matrix (the neutral element wrt. the matrix product)'
     transformed_embedding_matrix = tf.concat(values=[tf.expand_dims(initializer, 0), transformed_embedding_matrix], axis=0)
+    if mask is not None:
+        mask = tf.concat(values=[tf.ones((batch_size, 1), dtype=mask.dtype), mask], axis=1)
 
     # The walk embeddings are given by the matrix multiplication of the predicate embeddings
-    walk_embeddings = tf.scan(lambda x, y: tf.matmul(x, y), transformed_embedding_matrix, initializer=initializer)
+    walk_embeddings = masked_scan(lambda x, y: tf.matmul(x, y), transformed_embedding_matrix, initializer, mask=mask)
     return walk_embeddings[-1]
 
 
-def complex_walk_embedding(predicate_embeddings):
+def complex_walk_embedding(predicate_embeddings, mask=None):
     """
     Takes a walk, represented by a 3D Tensor with shape (batch_size, walk_length, embedding_length),
     and returns its [:, 0, :] entry.
@@ -95,6 +126,7 @@ def complex_walk_embedding(predicate_embeddings):
     TODO - find a more clever way of embedding walks using Complex Embeddings.
 
     :param predicate_embeddings: 3D Tensor containing the embedding of the predicates in the walk.
+    :param mask: (batch_size, walk_length) Tensor, with 0 for the padding steps of variable-length walks.
     :return: 2D tensor of size (batch_size, entity_embedding_length, entity_embedding_length) containing the walk embeddings.
     """
     batch_size, embedding_len = tf.shape(predicate_embeddings)[0], tf.shape(predicate_embeddings)[2]
@@ -119,7 +151,7 @@ def complex_walk_embedding(predicate_embeddings):
     initializer = neutral_element
 
     # The walk embeddings are given by the element-wise product of the predicate embeddings
-    walk_embedding = tf.scan(lambda x, y: hermitian_product(x, y), transposed_embedding_matrix, initializer=initializer)
+    walk_embedding = masked_scan(lambda x, y: hermitian_product(x, y), transposed_embedding_matrix, initializer, mask=mask)
 
     # Add the initializer as the first step in the scan sequence, in case the walk has zero-length
     return tf.concat(values=[tf.expand_dims(initializer, 0), walk_embedding], axis=0)[-1]
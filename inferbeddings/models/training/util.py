@@ -14,3 +14,47 @@ def make_batches(size, batch_size):
     nb_batch = int(np.ceil(size / float(batch_size)))
     res = [(i * batch_size, min(size, (i + 1) * batch_size)) for i in range(0, nb_batch)]
     return res
+
+
+def pad_walks(walks, max_length=None, pad_value=0):
+    """
+    Pads a list of variable-length walks to a common length.
+
+    :param walks: List of walks, each given by a sequence of predicate indices.
+    :param max_length: Length of the padded walks - defaults to the length of the longest walk.
+    :param pad_value: Index used for the padding steps.
+    :return: (walk_matrix, mask) pair, where both have shape (nb_walks, max_length), and mask is 1 for
+        actual steps and 0 for padding steps.
+    """
+    lengths = np.array([len(walk) for walk in walks], dtype=np.int64)
+    if max_length is None:
+        max_length = int(lengths.max()) if len(walks) > 0 else 0
+
+    mask = np.arange(max_length)[np.newaxis, :] < lengths[:, np.newaxis]
+    walk_matrix = np.full((len(walks), max_length), pad_value, dtype=np.int32)
+    if len(walks) > 0 and max_length > 0:
+        walk_matrix[mask] = np.concatenate([np.asarray(walk, dtype=np.int32) for walk in walks])
+    return walk_matrix, mask.astype(np.float32)
+
+
+def make_bucketed_batches(lengths, batch_size, random_state=None):
+    """
+    Groups examples with similar lengths in the same batches, so that little computation is spent on padding.
+
+    Examples are sorted by length (ties are broken randomly), split in batches of batch_size examples,
+    and the order of the batches is shuffled.
+
+    :param lengths: Array containing the length of each example.
+    :param batch_size: Batch size.
+    :param random_state: numpy.random.RandomState instance - if None, batches are neither shuffled nor randomised.
+    :return: List of arrays, each containing the indices of the examples in a batch.
+    """
+    lengths = np.asarray(lengths)
+    if random_state is None:
+        order = np.argsort(lengths, kind='mergesort')
+    else:
+        order = np.lexsort((random_state.random_sample(lengths.shape[0]), lengths))
+    batches = [order[batch_start:batch_end] for batch_start, batch_end in make_batches(lengths.shape[0], batch_size)]
+    if random_state is not None:
+        batches = [batches[i] for i in random_state.permutation(len(batches))]
+    return batches
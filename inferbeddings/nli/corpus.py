@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+
+from inferbeddings.nli.util import SNLI
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+LABELS = ['entailment', 'neutral', 'contradiction']
+LABEL_TO_INDEX = {label: index for index, label in enumerate(LABELS)}
+
+CACHE_VERSION = 1
+
+
+def ragged_offsets(lengths):
+    """
+    Offsets of a ragged array: the elements of row i are elements[offsets[i]:offsets[i + 1]].
+    """
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def gather_ragged(elements, lengths, idxs, offsets=None):
+    """
+    Selects rows of a ragged array.
+
+    :param elements: Flat array containing the elements of all rows.
+    :param lengths: Length of each row.
+    :param idxs: Indices of the rows to select.
+    :param offsets: Offsets of the rows, as returned by ragged_offsets - computed from lengths if None.
+    :return: (elements, lengths) pair describing the ragged array containing the selected rows, in the order of idxs.
+    """
+    if offsets is None:
+        offsets = ragged_offsets(lengths)
+    idxs = np.asarray(idxs, dtype=np.int64)
+    selected_lengths = np.asarray(lengths)[idxs]
+    selected_offsets = ragged_offsets(selected_lengths)
+    # Position of each selected element in the original array: start of its row plus its position in the row
+    row_ids = np.repeat(np.arange(len(idxs)), selected_lengths)
+    positions = offsets[idxs][row_ids] + np.arange(selected_offsets[-1]) - selected_offsets[row_ids]
+    return elements[positions], selected_lengths
+
+
+def pad_ragged(elements, lengths, max_len=None, dtype='int32', value=0):
+    """
+    Converts a ragged array to a (nb_rows, max_len) matrix - equivalent to util.pad_sequences with
+    the default 'post' padding and truncating.
+    """
+    lengths = np.asarray(lengths)
+    if max_len is None:
+        max_len = int(lengths.max()) if len(lengths) > 0 else 0
+    matrix = np.full((len(lengths), max_len), value, dtype=dtype)
+    offsets = ragged_offsets(lengths)
+    row_ids = np.repeat(np.arange(len(lengths)), lengths)
+    columns = np.arange(offsets[-1]) - offsets[row_ids]
+    mask = columns < max_len
+    matrix[row_ids[mask], columns[mask]] = elements[mask]
+    return matrix
+
+
+def truncate_ragged(elements, lengths, max_len=None):
+    """
+    Truncates each row of a ragged array to its first max_len elements.
+    :return: (elements, lengths) pair.
+    """
+    if max_len is None:
+        return elements, lengths
+    lengths = np.asarray(lengths)
+    offsets = ragged_offsets(lengths)
+    row_ids = np.repeat(np.arange(len(lengths)), lengths)
+    return elements[np.arange(offsets[-1]) - offsets[row_ids] < max_len], np.minimum(lengths, max_len)
+
+
+def add_markers(elements, lengths, bos_idx=None, eos_idx=None):
+    """
+    Adds a beginning-of-sentence and/or an end-of-sentence marker to each row of a ragged array.
+    :return: (elements, lengths) pair.
+    """
+    nb_markers = (1 if bos_idx is not None else 0) + (1 if eos_idx is not None else 0)
+    if nb_markers == 0:
+        return elements, lengths
+
+    lengths = np.asarray(lengths)
+    offsets, new_lengths = ragged_offsets(lengths), lengths + nb_markers
+    new_offsets = ragged_offsets(new_lengths)
+
+    new_elements = np.empty(new_offsets[-1], dtype=elements.dtype)
+    row_ids = np.repeat(np.arange(len(lengths)), lengths)
+    shift = 1 if bos_idx is not None else 0
+    new_elements[new_offsets[row_ids] + shift + np.arange(offsets[-1]) - offsets[row_ids]] = elements
+    if bos_idx is not None:
+        new_elements[new_offsets[:-1]] = bos_idx
+    if eos_idx is not None:
+        new_elements[new_offsets[1:] - 1] = eos_idx
+    return new_elements, new_lengths
+
+
+class RaggedDataset:
+    """
+    NLI dataset whose sentences are stored as ragged arrays - a flat array containing the token indices of all
+    premises (or hypotheses), and the length of each - rather than as matrices padded to the longest sentence
+    in the corpus. Batches, returned by batch, are only padded to the longest sentence in each batch.
+    """
+    def __init__(self, sentence1, sentence1_length, sentence2, sentence2_length, label):
+        self.sentence1, self.sentence1_length = sentence1, sentence1_length
+        self.sentence2, self.sentence2_length = sentence2, sentence2_length
+        self.label = label
+        self.sentence1_offsets = ragged_offsets(sentence1_length)
+        self.sentence2_offsets = ragged_offsets(sentence2_length)
+
+    @staticmethod
+    def from_padded(dataset):
+        """
+        :param dataset: Dataset in the format of util.instances_to_dataset.
+        :return: RaggedDataset instance.
+        """
+        arrays = {'label': np.asarray(dataset['label'])}
+        for key in ['sentence1', 'sentence2']:
+            sentences = np.asarray(dataset[key])
+            lengths = np.asarray(dataset['{}_length'.format(key)])
+            arrays[key] = sentences[np.arange(sentences.shape[1])[np.newaxis, :] < lengths[:, np.newaxis]]
+            arrays['{}_length'.format(key)] = lengths
+        return RaggedDataset(**arrays)
+
+    def __len__(self):
+        return self.label.shape[0]
+
+    def batch(self, idxs, max_len=None):
+        """
+        :param idxs: Indices of the instances in the batch.
+        :param max_len: Number of columns of the padded sentence matrices - by default, the length of the longest
+            sentence in the batch.
+        :return: Batch, in the format of util.instances_to_dataset.
+        """
+        idxs = np.asarray(idxs, dtype=np.int64)
+        ds = {}
+        for key in ['sentence1', 'sentence2']:
+            lengths = getattr(self, '{}_length'.format(key))
+            tokens, batch_lengths = gather_ragged(getattr(self, key), lengths, idxs,
+                                                  offsets=getattr(self, '{}_offsets'.format(key)))
+            ds[key] = pad_ragged(tokens, batch_lengths, max_len=max_len)
+            ds['{}_length'.format(key)] = batch_lengths
+        ds['label'] = self.label[idxs]
+        return ds
+
+    def to_padded(self, max_len=None):
+        """
+        :return: The whole dataset, with sentences padded to max_len - or to the longest sentence in the dataset.
+        """
+        return self.batch(np.arange(len(self)), max_len=max_len)
+
+
+class TokenizedCorpus:
+    """
+    NLI corpus in array form, as an alternative to the list of instances returned by util.SNLI.parse.
+
+    The parse tokens of all sentences are stored, as indices in vocabulary, in a flat int32 buffer: the tokens of
+    sentence i are vocabulary[tokens[offsets[i]:offsets[i + 1]]], where sentences 2j and 2j + 1 are the premise and
+    the hypothesis of instance j, whose gold label is LABELS[labels[j]]. The texts of the sentences are stored in the
+    same way, as a flat buffer of UTF-8 bytes.
+    """
+    def __init__(self, vocabulary, tokens, offsets, labels, texts, text_offsets):
+        self.vocabulary = vocabulary
+        self.tokens, self.offsets = tokens, offsets
+        self.labels = labels
+        self.texts, self.text_offsets = texts, text_offsets
+
+    @staticmethod
+    def from_instances(instances):
+        """
+        Converts a list of instances, in the format of util.SNLI.parse.
+        """
+        vocabulary, token_to_index = [], {}
+        tokens, lengths, labels, texts = [], [], [], []
+        for instance in instances:
+            for key in ['sentence1', 'sentence2']:
+                sentence_tokens = instance['{}_parse_tokens'.format(key)]
+                for token in sentence_tokens:
+                    if token not in token_to_index:
+                        token_to_index[token] = len(vocabulary)
+                        vocabulary += [token]
+                tokens += [token_to_index[token] for token in sentence_tokens]
+                lengths += [len(sentence_tokens)]
+                texts += [instance[key].encode('utf-8')]
+            labels += [LABEL_TO_INDEX[instance['gold_label']]]
+
+        return TokenizedCorpus(vocabulary=vocabulary,
+                               tokens=np.array(tokens, dtype=np.int32),
+                               offsets=ragged_offsets(lengths),
+                               labels=np.array(labels, dtype=np.int8),
+                               texts=np.frombuffer(b''.join(texts), dtype=np.uint8),
+                               text_offsets=ragged_offsets([len(text) for text in texts]))
+
+    def __len__(self):
+        return self.labels.shape[0]
+
+    @property
+    def lengths(self):
+        """
+        Number of tokens in each sentence.
+        """
+        return np.diff(self.offsets)
+
+    def sentence_tokens(self, sentence_idx):
+        return [self.vocabulary[t] for t in self.tokens[self.offsets[sentence_idx]:self.offsets[sentence_idx + 1]]]
+
+    def sentence_text(self, sentence_idx):
+        return self.texts[self.text_offsets[sentence_idx]:self.text_offsets[sentence_idx + 1]].tobytes().decode('utf-8')
+
+    def instance(self, idx):
+        """
+        Instance idx, in the format of util.SNLI.parse - without the parse trees and the tokenized sentences.
+        """
+        return {
+            'sentence1': self.sentence_text(2 * idx),
+            'sentence1_parse_tokens': self.sentence_tokens(2 * idx),
+            'sentence2': self.sentence_text(2 * idx + 1),
+            'sentence2_parse_tokens': self.sentence_tokens(2 * idx + 1),
+            'gold_label': LABELS[self.labels[idx]]
+        }
+
+    def to_instances(self):
+        return [self.instance(idx) for idx in range(len(self))]
+
+    def token_counts(self):
+        """
+        :return: {token: count} dictionary with the number of occurrences of each token.
+        """
+        counts = np.bincount(self.tokens, minlength=len(self.vocabulary))
+        return {token: int(count) for token, count in zip(self.vocabulary, counts) if count > 0}
+
+    def index_map(self, token_to_index, default=-1):
+        """
+        :return: Array mapping each token index in the corpus to its index in token_to_index, or to default.
+        """
+        return np.array([token_to_index.get(token, default) for token in self.vocabulary], dtype=np.int64)
+
+    def to_ragged_dataset(self, token_to_index, label_to_index,
+                          has_bos=False, has_eos=False, has_unk=False,
+                          bos_idx=1, eos_idx=2, unk_idx=3,
+                          max_len=None):
+        """
+        Maps the corpus to token and label indices, as util.instances_to_dataset, without padding the sentences.
+        :return: RaggedDataset instance.
+        """
+        assert (token_to_index is not None) and (label_to_index is not None)
+
+        mapped_tokens = self.index_map(token_to_index, default=unk_idx if has_unk else -1)[self.tokens]
+
+        # Tokens not in token_to_index are dropped, unless has_unk is True
+        nb_sentences = self.offsets.shape[0] - 1
+        sentence_ids = np.repeat(np.arange(nb_sentences), self.lengths)
+        is_known = mapped_tokens >= 0
+        tokens, lengths = mapped_tokens[is_known], np.bincount(sentence_ids[is_known], minlength=nb_sentences)
+
+        tokens, lengths = add_markers(tokens, lengths,
+                                      bos_idx=bos_idx if has_bos else None, eos_idx=eos_idx if has_eos else None)
+
+        # Sentences longer than max_len are truncated, as by util.pad_sequences
+        tokens, lengths = truncate_ragged(tokens, lengths, max_len=max_len)
+        offsets = ragged_offsets(lengths)
+
+        sentence1, sentence1_length = gather_ragged(tokens, lengths, np.arange(0, nb_sentences, 2), offsets=offsets)
+        sentence2, sentence2_length = gather_ragged(tokens, lengths, np.arange(1, nb_sentences, 2), offsets=offsets)
+
+        label = np.array([label_to_index.get(label, -1) for label in LABELS], dtype=np.int64)[self.labels]
+        assert np.all(label >= 0)
+
+        return RaggedDataset(sentence1=sentence1.astype(np.int32), sentence1_length=sentence1_length,
+                             sentence2=sentence2.astype(np.int32), sentence2_length=sentence2_length,
+                             label=label)
+
+    def to_dataset(self, token_to_index, label_to_index,
+                   has_bos=False, has_eos=False, has_unk=False,
+                   bos_idx=1, eos_idx=2, unk_idx=3,
+                   max_len=None):
+        """
+        Equivalent to util.instances_to_dataset on the instances of the corpus, without iterating over the tokens.
+        """
+        ragged_dataset = self.to_ragged_dataset(token_to_index, label_to_index,
+                                                has_bos=has_bos, has_eos=has_eos, has_unk=has_unk,
+                                                bos_idx=bos_idx, eos_idx=eos_idx, unk_idx=unk_idx,
+                                                max_len=max_len)
+        return ragged_dataset.to_padded(max_len=max_len)
+
+    def save(self, path, source_path=None):
+        """
+        Saves the corpus in a .npz file - if source_path is given, its size and modification time are stored,
+        so that load can detect when the source changed.
+        """
+        source_stat = os.stat(source_path) if source_path is not None else None
+        arrays = dict(version=np.array(CACHE_VERSION),
+                      vocabulary=np.array(self.vocabulary, dtype=str),
+                      tokens=self.tokens, offsets=self.offsets, labels=self.labels,
+                      texts=self.texts, text_offsets=self.text_offsets,
+                      source=np.array([source_stat.st_size, source_stat.st_mtime_ns] if source_stat else [-1, -1]))
+
+        # Write to a temporary file first, so that an interrupted save does not leave a truncated cache
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path, source_path=None):
+        """
+        Loads a corpus saved by save.
+        :return: TokenizedCorpus instance, or None if the file was saved by a different version of the code, or if
+            source_path is given and its size or modification time differ from the ones recorded by save.
+        """
+        with np.load(path) as data:
+            if int(data['version']) != CACHE_VERSION:
+                return None
+            if source_path is not None:
+                source_stat = os.stat(source_path)
+                if data['source'].tolist() != [source_stat.st_size, source_stat.st_mtime_ns]:
+                    return None
+            return TokenizedCorpus(vocabulary=data['vocabulary'].tolist(),
+                                   tokens=data['tokens'], offsets=data['offsets'], labels=data['labels'],
+                                   texts=data['texts'], text_offsets=data['text_offsets'])
+
+
+def cache_path(path, is_lower=False, cache_dir=None):
+    """
+    Path of the cached version of a corpus - by default, in the directory of the corpus.
+    """
+    name = '{}{}.tokens.npz'.format(os.path.basename(path), '.lower' if is_lower else '')
+    return os.path.join(cache_dir if cache_dir is not None else os.path.dirname(path), name)
+
+
+def load_corpus(path, is_lower=False, cache_dir=None, nb_workers=None):
+    """
+    Loads an SNLI/MultiNLI JSONL corpus as a TokenizedCorpus: the first time, the corpus is parsed with util.SNLI.parse
+    and cached; later calls load the cache, as long as the corpus does not change.
+
+    :param path: Path of the .jsonl.gz corpus.
+    :param is_lower: Lowercase the corpus.
+    :param cache_dir: Directory containing the cache - by default, the directory of the corpus.
+    :param nb_workers: Number of processes used by util.SNLI.parse when the corpus is not cached.
+    :return: TokenizedCorpus instance, or None if path is None.
+    """
+    if path is None:
+        return None
+
+    corpus_cache_path = cache_path(path, is_lower=is_lower, cache_dir=cache_dir)
+    if os.path.isfile(corpus_cache_path):
+        corpus = TokenizedCorpus.load(corpus_cache_path, source_path=path)
+        if corpus is not None:
+            logger.debug('Loaded {} from {}'.format(path, corpus_cache_path))
+            return corpus
+        logger.info('Cache {} is stale'.format(corpus_cache_path))
+
+    logger.info('Parsing {} ..'.format(path))
+    corpus = TokenizedCorpus.from_instances(SNLI.parse(path, is_lower=is_lower, nb_workers=nb_workers))
+    try:
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        corpus.save(corpus_cache_path, source_path=path)
+        logger.info('Cached {} in {}'.format(path, corpus_cache_path))
+    except OSError as e:
+        logger.warning('Could not cache {}: {}'.format(path, e))
+    return corpus
+
+
+def load_corpora(train_path='data/snli/snli_1.0_train.jsonl.gz',
+                 valid_path='data/snli/snli_1.0_dev.jsonl.gz',
+                 test_path='data/snli/snli_1.0_test.jsonl.gz',
+                 is_lower=False, cache_dir=None, nb_workers=None):
+    """
+    Cached counterpart of util.SNLI.generate.
+    :return: (train_corpus, dev_corpus, test_corpus) triple of TokenizedCorpus instances.
+    """
+    return tuple(load_corpus(path, is_lower=is_lower, cache_dir=cache_dir, nb_workers=nb_workers)
+                 for path in [train_path, valid_path, test_path])
+
+
+def token_counts(corpora):
+    """
+    :return: {token: count} dictionary with the number of occurrences of each token in the given corpora.
+    """
+    counts = {}
+    for corpus in corpora:
+        for token, count in corpus.token_counts().items():
+            counts[token] = counts.get(token, 0) + count
+    return counts
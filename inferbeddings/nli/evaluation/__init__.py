@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from inferbeddings.nli.evaluation.base import accuracy, stats
+from inferbeddings.nli.evaluation.base import predict, confusion_matrix, accuracy, stats
 from inferbeddings.nli.evaluation.util import evaluate
 
 __all__ = [
+    'predict',
+    'confusion_matrix',
     'accuracy',
     'stats',
     'evaluate'
@@ -3,45 +3,80 @@
 import numpy as np
 
 from inferbeddings.models.training.util import make_batches
+from inferbeddings.nli.corpus import RaggedDataset
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def accuracy(session, dataset, name,
-             sentence1_ph, sentence1_length_ph, sentence2_ph, sentence2_length_ph, label_ph, dropout_keep_prob_ph,
-             predictions_int, labels_int, contradiction_idx, entailment_idx, neutral_idx, batch_size):
+def predict(session, dataset, predictions_op,
+            sentence1_ph, sentence1_length_ph, sentence2_ph, sentence2_length_ph, dropout_keep_prob_ph, batch_size):
+    """
+    Predicts the label of each instance in a dataset: instances are sorted by length before being split in batches,
+    so that each batch is only padded to its longest sentences, and predictions are written in a preallocated array.
 
-    nb_eval_instances = len(dataset['sentence1'])
-    eval_batches = make_batches(size=nb_eval_instances, batch_size=batch_size)
-    p_vals, l_vals = [], []
+    :param dataset: corpus.RaggedDataset instance, or dataset in the format of util.instances_to_dataset.
+    :return: Array containing the predicted label of each instance.
+    """
+    if not isinstance(dataset, RaggedDataset):
+        dataset = RaggedDataset.from_padded(dataset)
 
-    for e_batch_start, e_batch_end in eval_batches:
+    nb_instances = len(dataset)
+    order = np.lexsort((dataset.sentence2_length, dataset.sentence1_length))
+    predictions = np.zeros(nb_instances, dtype=np.int64)
+
+    for batch_start, batch_end in make_batches(size=nb_instances, batch_size=batch_size):
+        idxs = order[batch_start:batch_end]
+        batch = dataset.batch(idxs)
         feed_dict = {
-            sentence1_ph: dataset['sentence1'][e_batch_start:e_batch_end],
-            sentence1_length_ph: dataset['sentence1_length'][e_batch_start:e_batch_end],
-            sentence2_ph: dataset['sentence2'][e_batch_start:e_batch_end],
-            sentence2_length_ph: dataset['sentence2_length'][e_batch_start:e_batch_end],
-            label_ph: dataset['label'][e_batch_start:e_batch_end],
+            sentence1_ph: batch['sentence1'],
+            sentence1_length_ph: batch['sentence1_length'],
+            sentence2_ph: batch['sentence2'],
+            sentence2_length_ph: batch['sentence2_length'],
             dropout_keep_prob_ph: 1.0
         }
+        predictions[idxs] = session.run(predictions_op, feed_dict=feed_dict)
+
+    return predictions
+
 
-        p_val, l_val = session.run([predictions_int, labels_int], feed_dict=feed_dict)
+def confusion_matrix(labels, predictions, nb_classes=3):
+    """
+    :return: Matrix whose (i, j)-th element is the number of instances with label i predicted as j.
+    """
+    labels, predictions = np.asarray(labels, dtype=np.int64), np.asarray(predictions, dtype=np.int64)
+    counts = np.bincount(labels * nb_classes + predictions, minlength=nb_classes * nb_classes)
+    return counts.reshape(nb_classes, nb_classes)
+
+
+def accuracy(session, dataset, name,
+             sentence1_ph, sentence1_length_ph, sentence2_ph, sentence2_length_ph, label_ph, dropout_keep_prob_ph,
+             predictions_int, labels_int, contradiction_idx, entailment_idx, neutral_idx, batch_size):
+    """
+    Overall and per-class accuracy on a dataset - labels are read from the dataset, so label_ph and labels_int
+    are not used.
 
-        p_vals += p_val.tolist()
-        l_vals += l_val.tolist()
+    :return: (accuracy, contradiction accuracy, entailment accuracy, neutral accuracy) tuple.
+    """
+    predictions = predict(session, dataset, predictions_int,
+                          sentence1_ph, sentence1_length_ph, sentence2_ph, sentence2_length_ph, dropout_keep_prob_ph,
+                          batch_size)
 
-    matches = np.equal(p_vals, l_vals)
-    acc = np.mean(matches)
+    label = dataset.label if isinstance(dataset, RaggedDataset) else np.asarray(dataset['label'])
+    nb_classes = max(contradiction_idx, entailment_idx, neutral_idx) + 1
+    confusion = confusion_matrix(label, predictions, nb_classes=nb_classes)
 
-    acc_c = np.mean(matches[np.where(np.array(l_vals) == contradiction_idx)])
-    acc_e = np.mean(matches[np.where(np.array(l_vals) == entailment_idx)])
-    acc_n = np.mean(matches[np.where(np.array(l_vals) == neutral_idx)])
+    with np.errstate(invalid='ignore'):
+        class_acc = np.diag(confusion) / np.sum(confusion, axis=1)
+    acc = np.trace(confusion) / np.sum(confusion)
+    acc_c, acc_e, acc_n = class_acc[contradiction_idx], class_acc[entailment_idx], class_acc[neutral_idx]
 
     if name:
         logger.debug('{0} Accuracy: {1:.4f} - C: {2:.4f}, E: {3:.4f}, N: {4:.4f}'.format(
             name, acc * 100, acc_c * 100, acc_e * 100, acc_n * 100))
+        logger.debug('{0} Confusion Matrix (rows: labels, columns: predictions): {1}'.format(
+            name, confusion.tolist()))
 
     return acc, acc_c, acc_e, acc_n
 
@@ -7,6 +7,19 @@ class AdversarialSets:
     """
     Utility class for generating Adversarial Sets for RTE.
     """
+    # Indices of the (sequence1, sequence2) pairs of sequences whose class probabilities are used by each rule,
+    # so that rule_losses can compute them with a single forward pass of the model
+    rule_to_pairs = {
+        1: [(1, 2), (2, 1)],
+        2: [(1, 2), (2, 3), (1, 3)],
+        3: [(1, 1)],
+        4: [(1, 2), (2, 3), (1, 3)],
+        5: [(1, 2), (2, 3), (1, 3)],
+        6: [(1, 2), (2, 1)],
+        7: [(1, 2), (2, 1)],
+        8: [(1, 2), (2, 1)]
+    }
+
     def __init__(self, model_class, model_kwargs,
                  scope_name='adversary', embedding_size=300, batch_size=1024, sequence_length=10,
                  entailment_idx=0, contradiction_idx=1, neutral_idx=2):
@@ -22,6 +35,9 @@ class AdversarialSets:
         self.contradiction_idx = contradiction_idx
         self.neutral_idx = neutral_idx
 
+        self._sequences = dict()
+        self._pair_to_probabilities = dict()
+
     def _get_sequence(self, name):
         """
         Utility function.
@@ -29,12 +45,15 @@ class AdversarialSets:
         :param name: Name of the Variable
         :return: tf.Variable with shape [batch size, sequence length, embedding size]
         """
-        with tf.variable_scope(self.scope_name):
-            res = tf.get_variable(name=name, shape=[self.batch_size, self.sequence_length, self.embedding_size],
-                                  initializer=tf.contrib.layers.xavier_initializer())
-        return res
-
-    def _probability(self, sequence1, sequence2, predicate_idx):
+        if name not in self._sequences:
+            with tf.variable_scope(self.scope_name):
+                self._sequences[name] = tf.get_variable(name=name,
+                                                        shape=[self.batch_size, self.sequence_length,
+                                                               self.embedding_size],
+                                                        initializer=tf.contrib.layers.xavier_initializer())
+        return self._sequences[name]
+
+    def _probabilities(self, sequence1, sequence2):
         model_kwargs = self.model_kwargs.copy()
 
         batch_size = sequence1.get_shape()[0].value
@@ -46,7 +65,39 @@ class AdversarialSets:
         })
 
         logits = self.model_class(reuse=True, **model_kwargs)()
-        return tf.nn.softmax(logits)[:, predicate_idx]
+        return tf.nn.softmax(logits)
+
+    def _probability(self, sequence1, sequence2, predicate_idx):
+        probabilities = self._pair_to_probabilities.get((sequence1, sequence2))
+        if probabilities is None:
+            probabilities = self._probabilities(sequence1, sequence2)
+        return probabilities[:, predicate_idx]
+
+    def rule_losses(self, rule_idxs):
+        """
+        Adversarial loss terms of several rules, where the class probabilities of all the (sequence1, sequence2) pairs
+        used by the rules are computed by a single forward pass of the model, on the concatenation of the pairs,
+        rather than by one forward pass per pair.
+
+        :param rule_idxs: Indices of the rules, e.g. [1, 2, 6].
+        :return: List of (tf.Tensor, Set[tf.Variable]) pairs, as returned by the rule<idx>_loss methods.
+        """
+        pairs, pair_set = [], set()
+        for rule_idx in rule_idxs:
+            for sequence_idxs in self.rule_to_pairs.get(rule_idx, []):
+                pair = tuple(self._get_sequence(name='rule{}_sequence{}'.format(rule_idx, sequence_idx))
+                             for sequence_idx in sequence_idxs)
+                if pair not in pair_set and pair not in self._pair_to_probabilities:
+                    pairs += [pair]
+                    pair_set.add(pair)
+
+        if len(pairs) > 0:
+            sequences1, sequences2 = zip(*pairs)
+            probabilities = self._probabilities(tf.concat(sequences1, axis=0), tf.concat(sequences2, axis=0))
+            for pair, pair_probabilities in zip(pairs, tf.split(probabilities, len(pairs), axis=0)):
+                self._pair_to_probabilities[pair] = pair_probabilities
+
+        return [getattr(self, 'rule{}_loss'.format(rule_idx))() for rule_idx in rule_idxs]
 
     def rule1_loss(self):
         """
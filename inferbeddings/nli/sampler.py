@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import time
+import itertools
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def length_buckets(lengths, nb_buckets):
+    """
+    Assigns each length to one of (at most) nb_buckets buckets, whose boundaries are quantiles of the lengths.
+
+    :param lengths: Array of lengths.
+    :param nb_buckets: Number of buckets.
+    :return: Array containing the bucket index of each length.
+    """
+    lengths = np.asarray(lengths)
+    if nb_buckets < 2 or lengths.shape[0] == 0:
+        return np.zeros(lengths.shape[0], dtype=np.int64)
+    sorted_lengths = np.sort(lengths)
+    quantile_idxs = (np.arange(1, nb_buckets) * lengths.shape[0]) // nb_buckets
+    # Each bucket contains the lengths in [boundaries[i - 1], boundaries[i])
+    boundaries = np.unique(sorted_lengths[quantile_idxs])
+    boundaries = boundaries[boundaries > sorted_lengths[0]]
+    return np.searchsorted(boundaries, lengths, side='right')
+
+
+def padded_tokens(sizes1, sizes2):
+    """
+    Number of (token and padding) positions in a batch whose sentences are padded to the longest in the batch.
+    """
+    return len(sizes1) * (int(np.max(sizes1)) + int(np.max(sizes2))) if len(sizes1) > 0 else 0
+
+
+class BucketSampler:
+    """
+    Generates batches of sentence pairs with similar lengths, so that little computation is spent on padding.
+
+    Each pair is assigned to a (premise length bucket, hypothesis length bucket) cell, where the boundaries of the
+    buckets are quantiles of the lengths. At each epoch, pairs are shuffled within cells, cells are concatenated
+    and split in batches, and the order of the batches is shuffled. Batches either contain batch_size pairs or,
+    if max_tokens is set, as many pairs as possible such that the padded batch contains at most max_tokens tokens.
+    """
+    def __init__(self, sizes1, sizes2, nb_buckets=10, batch_size=32, max_tokens=None, random_state=None):
+        """
+        :param sizes1: Array containing the length of each premise.
+        :param sizes2: Array containing the length of each hypothesis.
+        :param nb_buckets: Number of length buckets for premises and for hypotheses.
+        :param batch_size: Maximum number of pairs in a batch - ignored if None.
+        :param max_tokens: Maximum number of tokens, including padding, in the premises and hypotheses of a batch.
+        :param random_state: numpy.random.RandomState instance.
+        """
+        assert batch_size is not None or max_tokens is not None
+        self.sizes1, self.sizes2 = np.asarray(sizes1), np.asarray(sizes2)
+        self.nb_buckets = nb_buckets
+        self.batch_size, self.max_tokens = batch_size, max_tokens
+        self.random_state = random_state if random_state is not None else np.random.RandomState(0)
+
+        self.buckets1 = length_buckets(self.sizes1, nb_buckets)
+        self.buckets2 = length_buckets(self.sizes2, nb_buckets)
+
+    def __len__(self):
+        return self.sizes1.shape[0]
+
+    def _split(self, order):
+        if self.max_tokens is None:
+            return [order[start:start + self.batch_size] for start in range(0, order.shape[0], self.batch_size)]
+
+        batches, start, max1, max2 = [], 0, 0, 0
+        sizes1, sizes2 = self.sizes1[order].tolist(), self.sizes2[order].tolist()
+        for i in range(order.shape[0]):
+            new_max1, new_max2 = max(max1, sizes1[i]), max(max2, sizes2[i])
+            nb_pairs = i - start + 1
+            is_full = self.batch_size is not None and nb_pairs > self.batch_size
+            # A pair longer than max_tokens gets a batch on its own
+            if nb_pairs > 1 and (is_full or nb_pairs * (new_max1 + new_max2) > self.max_tokens):
+                batches += [order[start:i]]
+                start, new_max1, new_max2 = i, sizes1[i], sizes2[i]
+            max1, max2 = new_max1, new_max2
+        if start < order.shape[0]:
+            batches += [order[start:]]
+        return batches
+
+    def batches(self):
+        """
+        :return: List of arrays, each containing the indices of the pairs in a batch.
+        """
+        keys = self.random_state.random_sample(len(self))
+        order = np.lexsort((keys, self.buckets2, self.buckets1))
+        batches = self._split(order)
+        return [batches[i] for i in self.random_state.permutation(len(batches))]
+
+
+class BatchPrefetcher:
+    """
+    Iterates over the batches of an epoch, assembled by make_batch (e.g. RaggedDataset.batch) in nb_threads background
+    threads while the training loop runs on the previous ones: at most capacity batches are assembled in advance, and
+    batches are returned in the order of batch_idxs. The time spent waiting for each batch is recorded in wait_seconds.
+    With capacity 0, batches are assembled in the calling thread, and all the assembly time is waiting time.
+    """
+    def __init__(self, make_batch, batch_idxs, capacity=4, nb_threads=1):
+        """
+        :param make_batch: Function mapping an array of instance indices to a batch.
+        :param batch_idxs: List of arrays, each containing the indices of the instances in a batch.
+        :param capacity: Maximum number of batches assembled in advance.
+        :param nb_threads: Number of background threads.
+        """
+        self.make_batch, self.batch_idxs = make_batch, batch_idxs
+        self.capacity, self.nb_threads = capacity, nb_threads
+        self.wait_seconds, self.last_wait_seconds = 0.0, 0.0
+
+    def _wait(self, get_batch):
+        start_time = time.perf_counter()
+        batch = get_batch()
+        self.last_wait_seconds = time.perf_counter() - start_time
+        self.wait_seconds += self.last_wait_seconds
+        return batch
+
+    def __iter__(self):
+        if self.capacity < 1:
+            for idxs in self.batch_idxs:
+                yield self._wait(lambda: self.make_batch(idxs))
+            return
+
+        idxs_iterator = iter(self.batch_idxs)
+        with ThreadPoolExecutor(max_workers=self.nb_threads) as executor:
+            pending = deque(executor.submit(self.make_batch, idxs)
+                            for idxs in itertools.islice(idxs_iterator, self.capacity))
+            while pending:
+                future = pending.popleft()
+                batch = self._wait(future.result)
+                for idxs in itertools.islice(idxs_iterator, 1):
+                    pending.append(executor.submit(self.make_batch, idxs))
+                yield batch
+
+
+class EpochStatistics:
+    """
+    Padding efficiency - the fraction of non-padding positions in the batches - training throughput, and fraction
+    of the training time spent waiting for input batches in an epoch.
+    """
+    def __init__(self):
+        self.nb_pairs, self.nb_tokens, self.nb_padded_tokens = 0, 0, 0
+        self.seconds, self.input_seconds = 0.0, 0.0
+
+    def add(self, sizes1, sizes2, seconds, input_seconds=0.0):
+        """
+        :param sizes1: Lengths of the premises in a batch.
+        :param sizes2: Lengths of the hypotheses in a batch.
+        :param seconds: Time spent on the training step, including waiting for the batch.
+        :param input_seconds: Time spent waiting for the batch.
+        """
+        self.nb_pairs += len(sizes1)
+        self.nb_tokens += int(np.sum(sizes1)) + int(np.sum(sizes2))
+        self.nb_padded_tokens += padded_tokens(sizes1, sizes2)
+        self.seconds += seconds
+        self.input_seconds += input_seconds
+
+    @property
+    def padding_efficiency(self):
+        return self.nb_tokens / self.nb_padded_tokens if self.nb_padded_tokens > 0 else 1.0
+
+    def __str__(self):
+        seconds = max(self.seconds, 1e-9)
+        return ('Padding Efficiency: {0:.2f}%\tThroughput: {1:.1f} pairs/s, {2:.1f} tokens/s\t'
+                'Input Wait: {3:.2f}%'.format(self.padding_efficiency * 100, self.nb_pairs / seconds,
+                                              self.nb_tokens / seconds, 100.0 * self.input_seconds / seconds))
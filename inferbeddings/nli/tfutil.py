@@ -129,3 +129,70 @@ def count_trainable_parameters(var_list=None):
 
 def get_variables_in_scope(scope_name):
     return tf.get_collection(tf.GraphKeys.GLOBAL_VARIABLES, scope=scope_name)
+
+
+def scatter_rows(variable, row_idxs, rows, offset=0):
+    """
+    Assigns rows of a variable in a single update, e.g. the pre-trained embeddings of a set of tokens.
+
+    :param variable: [nb_rows, ..] tf.Variable.
+    :param row_idxs: [n] Tensor of row indices.
+    :param rows: [n, ..] Tensor of row values.
+    :param offset: Index of the first row of variable, e.g. the number of special tokens when variable only
+        contains the embeddings of the words that follow them in the vocabulary.
+    :return: tf.scatter_update operation.
+    """
+    return tf.scatter_update(variable, row_idxs - offset if offset else row_idxs, rows)
+
+
+def gradient_accumulator(optimizer, loss, var_list=None, clip_value=None, name='gradient_accumulator'):
+    """
+    Accumulates the gradients of a loss over several micro-batches, and then updates the variables with their
+    average, weighted by the size of each micro-batch: if loss is the mean loss over a micro-batch, the update is the
+    one for a batch containing all micro-batches, and clip_value is applied as by tf.clip_by_global_norm on the
+    gradients of that batch. Gradients are accumulated in local variables, which are not saved in checkpoints.
+
+    :param optimizer: tf.train.Optimizer instance - the update is created in the current variable scope.
+    :param loss: Loss tensor.
+    :param var_list: Variables to optimise - by default, all trainable variables.
+    :param clip_value: If not None, maximum global norm of the averaged gradients.
+    :param name: Name of the variable scope of the accumulators.
+    :return: (weight_ph, accumulate_op, update_op, reset_op) tuple, where weight_ph is the size of the current
+        micro-batch, accumulate_op adds its weighted gradients to the accumulators, update_op updates the variables
+        and then resets the accumulators, and reset_op resets (or initialises) the accumulators.
+    """
+    grads_and_vars = [(g, v) for g, v in optimizer.compute_gradients(loss, var_list=var_list) if g is not None]
+
+    with tf.variable_scope(name):
+        weight_ph = tf.placeholder(dtype=tf.float32, shape=[], name='weight')
+        accumulators = [tf.Variable(tf.zeros(v.get_shape(), dtype=v.dtype.base_dtype), trainable=False,
+                                    collections=[tf.GraphKeys.LOCAL_VARIABLES], name='accumulator')
+                        for _, v in grads_and_vars]
+        total_weight = tf.Variable(0.0, trainable=False, collections=[tf.GraphKeys.LOCAL_VARIABLES],
+                                   name='total_weight')
+
+        accumulate_ops = [tf.assign_add(total_weight, weight_ph)]
+        for accumulator, (gradient, _) in zip(accumulators, grads_and_vars):
+            if isinstance(gradient, tf.IndexedSlices):
+                # e.g. gradients of embedding lookups, where only the looked-up rows are updated
+                accumulate_ops += [tf.scatter_add(accumulator, gradient.indices, weight_ph * gradient.values)]
+            else:
+                accumulate_ops += [tf.assign_add(accumulator, weight_ph * gradient)]
+        accumulate_op = tf.group(*accumulate_ops)
+
+        def reset():
+            return tf.group(*[tf.assign(variable, tf.zeros_like(variable))
+                              for variable in accumulators + [total_weight]])
+
+        reset_op = reset()
+
+    gradients = [accumulator / total_weight for accumulator in accumulators]
+    if clip_value:
+        gradients, _ = tf.clip_by_global_norm(gradients, clip_value)
+    apply_op = optimizer.apply_gradients(zip(gradients, [v for _, v in grads_and_vars]))
+
+    with tf.control_dependencies([apply_op]):
+        with tf.variable_scope(name):
+            update_op = reset()
+
+    return weight_ph, accumulate_op, update_op, reset_op
@@ -2,6 +2,9 @@
 
 import gzip
 import json
+import itertools
+import multiprocessing
+import os
 
 import numpy as np
 import nltk
@@ -10,6 +13,26 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_treebank_tokenizer = nltk.tokenize.TreebankWordTokenizer()
+
+
+def treebank_tokenize(text):
+    return _treebank_tokenizer.tokenize(text)
+
+
+def _parse_lines(args):
+    lines, tokenize, is_lower = args
+    res = []
+    for line in lines:
+        decoded_line = line.decode('utf-8')
+        if is_lower:
+            decoded_line = decoded_line.lower()
+        obj = json.loads(decoded_line)
+        instance = SNLI.to_instance(obj, tokenize=tokenize)
+        if instance['gold_label'] in {'entailment', 'neutral', 'contradiction'}:
+            res += [instance]
+    return res
+
 
 class SNLI:
     @staticmethod
@@ -45,35 +68,56 @@ class SNLI:
         return instance
 
     @staticmethod
-    def parse(path, tokenize=None, is_lower=False):
+    def parse(path, tokenize=None, is_lower=False, nb_workers=None, chunk_size=10000):
+        """
+        Parses a .jsonl.gz corpus: the file is split in chunks of chunk_size lines, which are parsed by a pool of
+        nb_workers processes (by default, one per CPU) and merged in their original order, so that the result is the
+        same as when parsing the file serially. Files with a single chunk are parsed in the current process.
+
+        :param path: Path of the corpus.
+        :param tokenize: Optional tokenization function, e.g. treebank_tokenize - must be picklable
+            when using more than one worker.
+        :param is_lower: Lowercase the corpus.
+        :param nb_workers: Number of worker processes.
+        :param chunk_size: Number of lines in each chunk.
+        :return: List of instances.
+        """
         res = None
         if path is not None:
+            if nb_workers is None:
+                nb_workers = os.cpu_count() or 1
+            # Processes in a pool (e.g. the ones of a sweep) cannot start their own pool
+            if multiprocessing.current_process().daemon:
+                nb_workers = 1
+
             with gzip.open(path, 'rb') as f:
-                res = []
-                for line in f:
-                    decoded_line = line.decode('utf-8')
-                    if is_lower:
-                        decoded_line = decoded_line.lower()
-                    obj = json.loads(decoded_line)
-                    instance = SNLI.to_instance(obj, tokenize=tokenize)
-                    if instance['gold_label'] in {'entailment', 'neutral', 'contradiction'}:
-                        res += [instance]
+                chunks = iter(lambda: list(itertools.islice(f, chunk_size)), [])
+                first_chunk = next(chunks, [])
+                second_chunk = next(chunks, []) if nb_workers > 1 else []
+
+                if not second_chunk:
+                    res = _parse_lines((first_chunk, tokenize, is_lower))
+                    for chunk in chunks:
+                        res += _parse_lines((chunk, tokenize, is_lower))
+                else:
+                    res = []
+                    with multiprocessing.Pool(processes=nb_workers) as pool:
+                        # Chunks are read and parsed a few at a time, so that the file is never entirely in memory
+                        window = [first_chunk, second_chunk] + list(itertools.islice(chunks, 2 * nb_workers - 2))
+                        while window:
+                            for chunk_res in pool.map(_parse_lines, [(chunk, tokenize, is_lower) for chunk in window]):
+                                res += chunk_res
+                            window = list(itertools.islice(chunks, 2 * nb_workers))
         return res
 
     @staticmethod
     def generate(train_path='data/snli/snli_1.0_train.jsonl.gz',
                  valid_path='data/snli/snli_1.0_dev.jsonl.gz',
                  test_path='data/snli/snli_1.0_test.jsonl.gz',
-                 is_lower=False):
-
-        tokenizer = nltk.tokenize.TreebankWordTokenizer()
-
-        def tokenize(text):
-            return tokenizer.tokenize(text)
-
-        train_corpus = SNLI.parse(train_path, tokenize=tokenize, is_lower=is_lower)
-        dev_corpus = SNLI.parse(valid_path, tokenize=tokenize, is_lower=is_lower)
-        test_corpus = SNLI.parse(test_path, tokenize=tokenize, is_lower=is_lower)
+                 is_lower=False, nb_workers=None):
+        train_corpus = SNLI.parse(train_path, tokenize=treebank_tokenize, is_lower=is_lower, nb_workers=nb_workers)
+        dev_corpus = SNLI.parse(valid_path, tokenize=treebank_tokenize, is_lower=is_lower, nb_workers=nb_workers)
+        test_corpus = SNLI.parse(test_path, tokenize=treebank_tokenize, is_lower=is_lower, nb_workers=nb_workers)
 
         return train_corpus, dev_corpus, test_corpus
 
@@ -216,6 +260,24 @@ def instances_to_dataset(instances, token_to_index, label_to_index,
     return ds
 
 
+def pretrained_embeddings(token_to_index, token_to_embedding, embedding_size):
+    """
+    Stacks pre-trained token embeddings in a matrix, so that they can be assigned to the embedding table at once.
+
+    :param token_to_index: Dictionary mapping tokens to their index in the vocabulary.
+    :param token_to_embedding: Dictionary mapping (a subset of the) tokens to their pre-trained embeddings.
+    :param embedding_size: Embedding size.
+    :return: (token_idxs, embeddings) pair, where embeddings[i] is the pre-trained embedding of token token_idxs[i].
+    """
+    tokens = sorted(token_to_embedding, key=lambda token: token_to_index[token])
+    token_idxs = np.array([token_to_index[token] for token in tokens], dtype=np.int32)
+    embeddings = np.zeros(shape=(len(tokens), embedding_size), dtype=np.float32)
+    for i, token in enumerate(tokens):
+        assert embedding_size == len(token_to_embedding[token])
+        embeddings[i, :] = token_to_embedding[token]
+    return token_idxs, embeddings
+
+
 def semi_sort(sizes1, sizes2):
     batch_1 = np.logical_and(sizes1 < 20, sizes2 < 20)
     batch_2 = np.logical_and(
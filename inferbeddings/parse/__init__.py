@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from inferbeddings.parse.base import parse_clause
+from inferbeddings.parse.base import parse_clause, load_clauses
+from inferbeddings.parse.compiled import CompiledAtom, CompiledClause, compile_clause
 
-__all__ = ['parse_clause']
+__all__ = ['parse_clause',
+           'load_clauses',
+           'CompiledAtom',
+           'CompiledClause',
+           'compile_clause']
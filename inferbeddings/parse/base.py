@@ -1,8 +1,93 @@
 # -*- coding: utf-8 -*-
 
+import re
+
 from inferbeddings.parse import clauses
 
+# Regular expressions mirroring the terminals of clauses.grammar, used by the fast path of parse_clause
+_SPACE = re.compile(r'\s*')
+_ATOM_START = re.compile(r'(!\s*)?([a-z_./][a-z A-Z0-9_./]*|\'[^\']*\'|"[^"]*")\(\s*')
+_CONSTANT = re.compile(r'[a-z_./][a-z A-Z0-9_./]*|\'[^\']*\'|"[^"]*"')
+_VARIABLE = re.compile(r'[A-Z][a-z A-Z0-9_]*')
+_WEIGHT = re.compile(r'<\s*([-]?[0-9]+(\.[0-9]+)?|\?)\s*>')
+
+
+def _parse_atom(text, pos):
+    match = _ATOM_START.match(text, pos)
+    if match is None:
+        return None, pos
+    negated, predicate = match.group(1) is not None, clauses.Predicate(match.group(2))
+    pos, arguments = match.end(), []
+    while True:
+        match = _CONSTANT.match(text, pos)
+        if match is not None:
+            arguments += [clauses.Constant(match.group(0))]
+        else:
+            match = _VARIABLE.match(text, pos)
+            if match is None:
+                return None, pos
+            arguments += [clauses.Variable(match.group(0))]
+        pos = match.end()
+        if text.startswith(',', pos):
+            pos = _SPACE.match(text, pos + 1).end()
+            continue
+        pos = _SPACE.match(text, pos).end()
+        if not text.startswith(')', pos):
+            return None, pos
+        pos = _SPACE.match(text, pos + 1).end()
+        return clauses.Atom(predicate, *arguments, negated=negated), pos
+
+
+def _parse_clause_fast(text):
+    """
+    Parses clauses without building a parse tree, returning None if the text falls outside of the
+    fragment of the grammar supported by this parser.
+    """
+    head, pos = _parse_atom(text, 0)
+    if head is None:
+        return None
+    body = []
+    if text.startswith(':-', pos):
+        pos = _SPACE.match(text, pos + 2).end()
+        while True:
+            atom, pos = _parse_atom(text, pos)
+            if atom is None:
+                return None
+            body += [atom]
+            if not text.startswith(',', pos):
+                break
+            pos = _SPACE.match(text, pos + 1).end()
+    weight = 1.0
+    if pos < len(text):
+        match = _WEIGHT.match(text, pos)
+        if match is None or match.end() != len(text):
+            return None
+        weight = None if match.group(1) == '?' else float(match.group(1))
+    return clauses.Clause(head, *body, weight=weight)
+
 
 def parse_clause(text):
-    parsed = clauses.grammar.parse(text)
-    return clauses.ClauseVisitor().visit(parsed)
+    clause = _parse_clause_fast(text)
+    if clause is None:
+        parsed = clauses.grammar.parse(text)
+        clause = clauses.ClauseVisitor().visit(parsed)
+    return clause
+
+
+def load_clauses(path):
+    """
+    Parses all clauses in a file (e.g. the output of tools/amie-to-clauses.py), one per line.
+    Empty lines are skipped, and repeated lines are only parsed once.
+    :param path: Path of the file containing the clauses.
+    :return: List of clauses.
+    """
+    text_to_clause = {}
+    res = []
+    with open(path, 'r') as f:
+        for line in f:
+            text = line.strip()
+            if len(text) > 0:
+                if text not in text_to_clause:
+                    text_to_clause[text] = parse_clause(text)
+                res += [text_to_clause[text]]
+    return res
@@ -26,10 +26,18 @@ class Expr:
         return self.__dict__.__repr__()
 
     def __eq__(self, other):
-        return isinstance(other, self.__class__) and str(other) == str(self)
+        return isinstance(other, self.__class__) and other._str() == self._str()
 
     def __hash__(self):
-        return self.__str__().__hash__()
+        return self._str().__hash__()
+
+    def _str(self):
+        # Expressions are never modified after being built, so their string representation is computed only once
+        try:
+            return self._cached_str
+        except AttributeError:
+            self._cached_str = str(self)
+            return self._cached_str
 
 
 class Variable(Expr):
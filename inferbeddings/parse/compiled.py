@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+from inferbeddings.parse.clauses import Variable
+
+
+class CompiledAtom:
+    """
+    Immutable representation of an atom p(X, Y), where the predicate is given by its index
+    and each argument by the position of its variable in the enclosing clause.
+    """
+    __slots__ = ('predicate_idx', 'variable_idxs', 'negated', '_hash')
+
+    def __init__(self, predicate_idx, variable_idxs, negated=False):
+        object.__setattr__(self, 'predicate_idx', predicate_idx)
+        object.__setattr__(self, 'variable_idxs', tuple(variable_idxs))
+        object.__setattr__(self, 'negated', negated)
+        object.__setattr__(self, '_hash', hash((predicate_idx, self.variable_idxs, negated)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(self.__class__.__name__))
+
+    def __eq__(self, other):
+        return isinstance(other, CompiledAtom) and self._hash == other._hash and\
+            self.predicate_idx == other.predicate_idx and self.variable_idxs == other.variable_idxs and\
+            self.negated == other.negated
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return '{}{}({})'.format('!' if self.negated else '', self.predicate_idx,
+                                 ', '.join('X{}'.format(idx) for idx in self.variable_idxs))
+
+
+class CompiledClause:
+    """
+    Immutable representation of a clause, where variables are numbered by order of appearance
+    (starting from the head), and predicates are replaced by their indices.
+    """
+    __slots__ = ('head', 'body', 'weight', 'variable_names', '_hash')
+
+    def __init__(self, head, body, weight=1.0, variable_names=None):
+        object.__setattr__(self, 'head', head)
+        object.__setattr__(self, 'body', tuple(body))
+        object.__setattr__(self, 'weight', weight)
+        object.__setattr__(self, 'variable_names', tuple(variable_names) if variable_names is not None else None)
+        object.__setattr__(self, '_hash', hash((head, self.body, weight)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(self.__class__.__name__))
+
+    def __eq__(self, other):
+        return isinstance(other, CompiledClause) and self._hash == other._hash and\
+            self.head == other.head and self.body == other.body and self.weight == other.weight
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return repr(self.head) if len(self.body) == 0 else '{} :- {}'.format(
+            repr(self.head), ', '.join(repr(atom) for atom in self.body))
+
+    @property
+    def nb_variables(self):
+        return 1 + max(idx for atom in (self.head,) + self.body for idx in atom.variable_idxs)
+
+
+def compile_clause(clause, predicate_to_index):
+    """
+    Compiles a clause into a CompiledClause.
+    :param clause: Clause, e.g. as returned by parse_clause.
+    :param predicate_to_index: {predicate_name: predicate_idx} mapping.
+    :return: CompiledClause.
+    """
+    variable_name_to_idx = {}
+
+    def compile_atom(atom):
+        variable_idxs = []
+        for argument in atom.arguments:
+            if not isinstance(argument, Variable):
+                raise ValueError('Only clauses over variables can be compiled, found {} in {}'.format(argument, clause))
+            if argument.name not in variable_name_to_idx:
+                variable_name_to_idx[argument.name] = len(variable_name_to_idx)
+            variable_idxs += [variable_name_to_idx[argument.name]]
+        return CompiledAtom(predicate_to_index[atom.predicate.name], variable_idxs, negated=atom.negated)
+
+    head = compile_atom(clause.head)
+    body = [compile_atom(atom) for atom in clause.body]
+    variable_names = sorted(variable_name_to_idx, key=lambda name: variable_name_to_idx[name])
+    return CompiledClause(head, body, weight=clause.weight, variable_names=variable_names)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from collections import OrderedDict
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name')
+
+    def __init__(self, profiler, name):
+        self.profiler, self.name = profiler, name
+
+    def __enter__(self):
+        self.profiler.start(self.name)
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.stop()
+        return False
+
+
+class PhaseProfiler:
+    """
+    Hierarchical wall-clock timer: phases are timed with
+
+        with profiler.phase('training'):
+            with profiler.phase('session.run'):
+                ..
+
+    or with matching start/stop calls, and identified by their path, e.g. 'training/session.run'.
+    Times are accumulated both in total and for the current epoch, set by set_epoch.
+    When disabled, phase returns a shared no-op context manager, and start/stop return immediately.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.totals, self.counts = OrderedDict(), OrderedDict()
+        self.epoch_totals = OrderedDict()
+        self.epoch = None
+        self._stack = []
+
+    def phase(self, name):
+        return _Phase(self, name) if self.enabled else _NULL_PHASE
+
+    def start(self, name):
+        """
+        Starts timing a phase nested in the current one - equivalent to entering phase(name).
+        """
+        if self.enabled:
+            self._stack.append((name, time.perf_counter()))
+
+    def stop(self):
+        """
+        Stops timing the current phase.
+        """
+        if self.enabled:
+            elapsed = time.perf_counter() - self._stack[-1][1]
+            self._add('/'.join(name for name, _ in self._stack), elapsed)
+            self._stack.pop()
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _add(self, path, elapsed):
+        self.totals[path] = self.totals.get(path, 0.0) + elapsed
+        self.counts[path] = self.counts.get(path, 0) + 1
+        if self.epoch is not None:
+            epoch_totals = self.epoch_totals.setdefault(self.epoch, OrderedDict())
+            epoch_totals[path] = epoch_totals.get(path, 0.0) + elapsed
+
+    @staticmethod
+    def _format(totals, counts=None):
+        lines = []
+        # Sort paths so that each phase follows its parent
+        for path in sorted(totals, key=lambda p: p.split('/')):
+            depth, name = path.count('/'), path.split('/')[-1]
+            parent = path.rsplit('/', 1)[0] if depth > 0 else None
+            share = ''
+            if parent in totals and totals[parent] > 0:
+                share = ' ({:.1f}% of {})'.format(100.0 * totals[path] / totals[parent], parent.split('/')[-1])
+            calls = ' [{} calls]'.format(counts[path]) if counts is not None else ''
+            lines += ['{}{}: {:.4f}s{}{}'.format('  ' * depth, name, totals[path], calls, share)]
+        return lines
+
+    def report(self, per_epoch=True):
+        """
+        Human-readable report, with the total time spent in each phase and, optionally, per-epoch breakdowns.
+        """
+        lines = ['Total:'] + ['  ' + line for line in self._format(self.totals, self.counts)]
+        if per_epoch:
+            for epoch, epoch_totals in self.epoch_totals.items():
+                lines += ['Epoch {}:'.format(epoch)] + ['  ' + line for line in self._format(epoch_totals)]
+        return '\n'.join(lines)
+
+    def log_report(self, per_epoch=True):
+        if self.enabled:
+            for line in self.report(per_epoch=per_epoch).split('\n'):
+                logger.info(line)
+
+    def to_json(self):
+        return {
+            'total': {path: {'seconds': seconds, 'calls': self.counts[path]} for path, seconds in self.totals.items()},
+            'epochs': {str(epoch): dict(epoch_totals) for epoch, epoch_totals in self.epoch_totals.items()}
+        }
@@ -12,14 +12,35 @@ logger = logging.getLogger(__name__)
 
 class EquivalentPredicateRegularizer(metaclass=ABCMeta):
     def __init__(self, x1, x2, is_inverse=False, similarity_name='l2_sqr', *args, **kwargs):
+        """
+        :param x1: Embedding of the head predicate, or (nb_clauses, embedding_size) Tensor of head embeddings.
+        :param x2: Embedding of the body predicate, or (nb_clauses, embedding_size) Tensor of body embeddings.
+        :param is_inverse: Whether the body predicate is the inverse of the head one, or
+            (nb_clauses) boolean array when x1 and x2 contain the embeddings of many clauses.
+        :param similarity_name: Name of the similarity function.
+        """
         self.x1, self.x2 = x1, x2
         self.is_inverse = is_inverse
         self.similarity_name = similarity_name
 
     @abstractmethod
-    def __call__(self):
+    def inverse(self, x):
         pass
 
+    def target(self):
+        """
+        Embedding the head predicate embeddings should be equal to, i.e. the (possibly inverted) body embeddings.
+        """
+        if isinstance(self.is_inverse, bool):
+            return self.inverse(self.x2) if self.is_inverse else self.x2
+        # With one flag per clause, select the rows of the inverted body embeddings where the flag is set
+        return tf.where(tf.convert_to_tensor(self.is_inverse, dtype=tf.bool), self.inverse(self.x2), self.x2)
+
+    def __call__(self):
+        similarity = similarities.get_function(self.similarity_name)
+        loss = - similarity(self.x1, self.target(), axis=-1)
+        return loss
+
 
 class TransEEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
     def __init__(self, *args, **kwargs):
@@ -28,11 +49,6 @@ class TransEEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
     def inverse(self, x):
         return - x
 
-    def __call__(self):
-        similarity = similarities.get_function(self.similarity_name)
-        loss = - similarity(self.x1, self.inverse(self.x2) if self.is_inverse else self.x2, axis=-1)
-        return loss
-
 
 class DistMultEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
     def __init__(self, *args, **kwargs):
@@ -41,11 +57,6 @@ class DistMultEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
     def inverse(self, x):
         return x
 
-    def __call__(self):
-        similarity = similarities.get_function(self.similarity_name)
-        loss = - similarity(self.x1, self.inverse(self.x2) if self.is_inverse else self.x2, axis=-1)
-        return loss
-
 
 class ComplExEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
     def __init__(self, *args, **kwargs):
@@ -56,11 +67,6 @@ class ComplExEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
         x_re, x_im = tf.split(value=x, num_or_size_splits=2, axis=len(x.get_shape()) - 1)
         return tf.concat(values=[x_re, - x_im], axis=-1)
 
-    def __call__(self):
-        similarity = similarities.get_function(self.similarity_name)
-        loss = - similarity(self.x1, self.inverse(self.x2) if self.is_inverse else self.x2, axis=-1)
-        return loss
-
 
 class BilinearEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
     def __init__(self, entity_embedding_size, *args, **kwargs):
@@ -71,8 +77,3 @@ class BilinearEquivalentPredicateRegularizer(EquivalentPredicateRegularizer):
         embedding_matrix = tf.reshape(x, (-1, self.entity_embedding_size, self.entity_embedding_size))
         transposed_embedding_matrix = tf.transpose(embedding_matrix, perm=[0, 2, 1])
         return tf.reshape(transposed_embedding_matrix, (-1, self.entity_embedding_size ** 2))
-
-    def __call__(self):
-        similarity = similarities.get_function(self.similarity_name)
-        loss = - similarity(self.x1, self.inverse(self.x2) if self.is_inverse else self.x2, axis=-1)
-        return loss
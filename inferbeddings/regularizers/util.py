@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import tensorflow as tf
 
 from inferbeddings.regularizers import TransEEquivalentPredicateRegularizer
@@ -31,12 +32,18 @@ def clauses_to_equality_loss(model_name,
                              predicate_embedding_layer,
                              predicate_to_index,
                              entity_embedding_size):
-    loss = 0.0
+    """
+    Sums the equality losses of a set of clauses p(X, Y) :- q(X, Y) and p(X, Y) :- q(Y, X).
 
+    The clauses are first encoded by two arrays, containing the indices of their head and body predicates,
+    and a mask telling which of them are inverse clauses, so that the loss is computed with a single
+    embedding lookup and a single reduction, regardless of the number of clauses.
+    """
     regularizer_class = _model_name_to_regularizer_class(model_name)
     assert regularizer_class is not None
 
     _added_clauses = set()
+    head_predicate_idxs, body_predicate_idxs, inverse_mask = [], [], []
 
     for clause in clauses:
         head, body = clause.head, clause.body
@@ -65,11 +72,19 @@ def clauses_to_equality_loss(model_name,
         if (_head_tuple, _body_tuple) not in _added_clauses:
             _added_clauses |= {(_head_tuple, _body_tuple), (_body_tuple, _head_tuple)}
 
-            head_predicate_embedding = tf.nn.embedding_lookup(predicate_embedding_layer, head_predicate_idx)
-            body_predicate_embedding = tf.nn.embedding_lookup(predicate_embedding_layer, body_predicate_idx)
+            head_predicate_idxs += [head_predicate_idx]
+            body_predicate_idxs += [body_predicate_idx]
+            inverse_mask += [is_inverse]
 
-            regularizer = regularizer_class(x1=head_predicate_embedding, x2=body_predicate_embedding,
-                                            is_inverse=is_inverse, similarity_name=similarity_name,
-                                            entity_embedding_size=entity_embedding_size)
-            loss += regularizer()
-    return loss
+    nb_clauses = len(head_predicate_idxs)
+    if nb_clauses == 0:
+        return 0.0
+
+    predicate_idxs = np.array(head_predicate_idxs + body_predicate_idxs, dtype=np.int32)
+    predicate_embeddings = tf.nn.embedding_lookup(predicate_embedding_layer, predicate_idxs)
+    head_predicate_embeddings, body_predicate_embeddings = predicate_embeddings[:nb_clauses], predicate_embeddings[nb_clauses:]
+
+    regularizer = regularizer_class(x1=head_predicate_embeddings, x2=body_predicate_embeddings,
+                                    is_inverse=np.array(inverse_mask, dtype=bool), similarity_name=similarity_name,
+                                    entity_embedding_size=entity_embedding_size)
+    return tf.reduce_sum(regularizer())
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from inferbeddings.scoring.base import ScoringEngine
+from inferbeddings.scoring.base import TranslatingEngine
+from inferbeddings.scoring.base import BilinearDiagonalEngine
+from inferbeddings.scoring.base import BilinearEngine
+from inferbeddings.scoring.base import ComplexEngine
+from inferbeddings.scoring.base import ERMLPEngine
+from inferbeddings.scoring.base import get_function
+from inferbeddings.scoring.export import export_embeddings, load_embeddings, load_vocabularies, load_engine
+
+__all__ = ['ScoringEngine',
+           'TranslatingEngine',
+           'BilinearDiagonalEngine',
+           'BilinearEngine',
+           'ComplexEngine',
+           'ERMLPEngine',
+           'get_function',
+           'export_embeddings',
+           'load_embeddings',
+           'load_vocabularies',
+           'load_engine']
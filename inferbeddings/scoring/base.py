@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import abc
+
+import numpy as np
+
+from inferbeddings.scoring import similarities
+
+import sys
+
+
+class ScoringEngine(metaclass=abc.ABCMeta):
+    def __init__(self, entity_embeddings, predicate_embeddings, similarity_name='dot', parameters=None):
+        """
+        Abstract class inherited by all NumPy scoring engines, which score triples using trained embeddings
+        in the same way as the corresponding models in inferbeddings.models, without requiring TensorFlow.
+
+        :param entity_embeddings: (nb_entities + 1, entity_embedding_size) array.
+        :param predicate_embeddings: (nb_predicates + 1, predicate_embedding_size) array.
+        :param similarity_name: name of the similarity function.
+        :param parameters: {name: array} dictionary with additional model parameters.
+        """
+        self.entity_embeddings = entity_embeddings
+        self.predicate_embeddings = predicate_embeddings
+        self.similarity_name = similarity_name
+        self.similarity_function = similarities.get_function(similarity_name)
+        self.parameters = parameters if parameters is not None else {}
+
+    def __call__(self, args):
+        """
+        Drop-in replacement of the scoring_function in bin/kbp-cli.py.
+
+        :param args: [walk_inputs, entity_inputs], with shapes (batch_size, walk_length) and (batch_size, 2).
+        :return: (batch_size) array containing the scores associated by the model to the walks.
+        """
+        walk_inputs, entity_inputs = np.asarray(args[0]), np.asarray(args[1])
+        subject_embedding = self.entity_embeddings[entity_inputs[:, 0]]
+        object_embedding = self.entity_embeddings[entity_inputs[:, 1]]
+        predicate_embeddings = self.predicate_embeddings[walk_inputs]
+        return self.score(subject_embedding, object_embedding, predicate_embeddings)
+
+    @abc.abstractmethod
+    def score(self, subject_embedding, object_embedding, predicate_embeddings):
+        raise NotImplementedError
+
+
+class TranslatingEngine(ScoringEngine):
+    def score(self, subject_embedding, object_embedding, predicate_embeddings):
+        walk_embedding = np.sum(predicate_embeddings, axis=1)
+        return self.similarity_function(subject_embedding + walk_embedding, object_embedding)
+
+
+class BilinearDiagonalEngine(ScoringEngine):
+    def score(self, subject_embedding, object_embedding, predicate_embeddings):
+        walk_embedding = np.prod(predicate_embeddings, axis=1)
+        return self.similarity_function(subject_embedding * walk_embedding, object_embedding)
+
+
+class BilinearEngine(ScoringEngine):
+    def score(self, subject_embedding, object_embedding, predicate_embeddings):
+        batch_size, walk_length = predicate_embeddings.shape[0], predicate_embeddings.shape[1]
+        n = subject_embedding.shape[1]
+
+        # The walk embedding is given by the matrix product of the predicate embeddings
+        walk_embedding = np.tile(np.eye(n, dtype=predicate_embeddings.dtype), (batch_size, 1, 1))
+        for predicate_matrix in np.transpose(predicate_embeddings.reshape(batch_size, walk_length, n, n), (1, 0, 2, 3)):
+            walk_embedding = np.matmul(walk_embedding, predicate_matrix)
+
+        sW = np.matmul(subject_embedding[:, np.newaxis, :], walk_embedding)[:, 0, :]
+        return self.similarity_function(sW, object_embedding)
+
+
+class ComplexEngine(ScoringEngine):
+    def score(self, subject_embedding, object_embedding, predicate_embeddings):
+        es_re, es_im = np.split(subject_embedding, 2, axis=1)
+        eo_re, eo_im = np.split(object_embedding, 2, axis=1)
+
+        # The walk embedding is given by the Hermitian product of the predicate embeddings
+        ew_re = np.ones_like(es_re, dtype=predicate_embeddings.dtype)
+        ew_im = np.zeros_like(es_im, dtype=predicate_embeddings.dtype)
+        for step_embedding in np.transpose(predicate_embeddings, (1, 0, 2)):
+            y_re, y_im = np.split(step_embedding, 2, axis=1)
+            ew_re, ew_im = ew_re * y_re + ew_im * y_im, ew_re * y_im - ew_im * y_re
+
+        def dot3(arg1, rel, arg2):
+            return self.similarity_function(arg1 * rel, arg2)
+
+        return dot3(es_re, ew_re, eo_re) + dot3(es_re, ew_im, eo_im) + dot3(es_im, ew_re, eo_im) - dot3(es_im, ew_im, eo_re)
+
+
+class ERMLPEngine(ScoringEngine):
+    def score(self, subject_embedding, object_embedding, predicate_embeddings):
+        # This model is non-compositional, only the first predicate in the walk is considered
+        e_ijk = np.concatenate([subject_embedding, object_embedding, predicate_embeddings[:, 0, :]], axis=1)
+        h_ijk = np.matmul(e_ijk, self.parameters['C'])
+        return np.matmul(np.tanh(h_ijk), self.parameters['w'])[:, 0]
+
+
+# Aliases, using the same names as in inferbeddings.models.base
+TransE = TranslatingEmbeddings = TranslatingModel = TranslatingEngine
+DistMult = BilinearDiagonal = BilinearDiagonalModel = BilinearDiagonalEngine
+RESCAL = Bilinear = BilinearModel = BilinearEngine
+ComplEx = ComplexE = ComplexModel = ComplexEngine
+ER_MLP = ERMLP = ERMLPEngine
+
+
+def get_function(function_name):
+    this_module = sys.modules[__name__]
+    if not hasattr(this_module, function_name) or\
+            not (isinstance(getattr(this_module, function_name), type) and
+                 issubclass(getattr(this_module, function_name), ScoringEngine)):
+        raise ValueError('Unknown model: {}'.format(function_name))
+    return getattr(this_module, function_name)
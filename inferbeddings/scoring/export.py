@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+
+import numpy as np
+
+from inferbeddings.scoring.base import get_function
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = 'inferbeddings-embeddings'
+FORMAT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def export_embeddings(path, model_name, similarity_name, entity_embeddings, predicate_embeddings,
+                      entity_to_index=None, predicate_to_index=None, parameters=None, metadata=None):
+    """
+    Exports trained embeddings in a directory containing a manifest.json file, describing the model,
+    and one .npy file per matrix, which can be memory-mapped by load_embeddings.
+
+    :param path: Path of the export directory - created if it does not exist.
+    :param model_name: Name of the model, e.g. 'ComplEx'.
+    :param similarity_name: Name of the similarity function, e.g. 'dot'.
+    :param entity_embeddings: (nb_entities + 1, entity_embedding_size) array.
+    :param predicate_embeddings: (nb_predicates + 1, predicate_embedding_size) array.
+    :param entity_to_index: {entity_name: entity_idx} dictionary.
+    :param predicate_to_index: {predicate_name: predicate_idx} dictionary.
+    :param parameters: {name: array} dictionary with additional model parameters, e.g. the ER-MLP weights.
+    :param metadata: JSON-serializable object stored in the manifest, e.g. the command line.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    arrays = {'entities': entity_embeddings, 'predicates': predicate_embeddings}
+    for name, value in (parameters if parameters is not None else {}).items():
+        arrays['parameters/{}'.format(name)] = value
+
+    manifest = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'model': model_name,
+        'similarity': similarity_name,
+        'nb_entities': int(entity_embeddings.shape[0]) - 1,
+        'nb_predicates': int(predicate_embeddings.shape[0]) - 1,
+        'entity_embedding_size': int(entity_embeddings.shape[1]),
+        'predicate_embedding_size': int(predicate_embeddings.shape[1]),
+        'arrays': {},
+        'metadata': metadata
+    }
+
+    for name, value in arrays.items():
+        value = np.ascontiguousarray(value)
+        file_name = '{}.npy'.format(name.replace('/', '.'))
+        np.save(os.path.join(path, file_name), value)
+        manifest['arrays'][name] = {'file': file_name, 'dtype': value.dtype.str, 'shape': list(value.shape)}
+
+    for key, file_name, vocabulary in [('entity_vocabulary', 'entities.vocab.json', entity_to_index),
+                                       ('predicate_vocabulary', 'predicates.vocab.json', predicate_to_index)]:
+        if vocabulary is not None:
+            with open(os.path.join(path, file_name), 'w') as f:
+                json.dump(vocabulary, f)
+            manifest[key] = file_name
+
+    # The manifest is written last, so that its presence marks a complete export
+    with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    logger.info('Embeddings exported in {}'.format(path))
+
+
+def load_manifest(path):
+    """
+    Reads and validates the manifest of an export directory.
+    """
+    with open(os.path.join(path, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_NAME:
+        raise ValueError('{} does not contain exported embeddings'.format(path))
+    if manifest.get('version', 0) > FORMAT_VERSION:
+        raise ValueError('Unsupported export format version: {} (supported up to {})'
+                         .format(manifest.get('version'), FORMAT_VERSION))
+    return manifest
+
+
+def load_embeddings(path, mmap_mode='r'):
+    """
+    Loads the matrices of an export directory.
+
+    :param path: Path of the export directory.
+    :param mmap_mode: Memory-map mode passed to numpy.load - with the default 'r', matrices are read-only
+        and their pages are shared by all processes loading the same export.
+    :return: (manifest, {name: array}) pair, with the names used by export_embeddings.
+    """
+    manifest = load_manifest(path)
+    arrays = {}
+    for name, array_manifest in manifest['arrays'].items():
+        array = np.load(os.path.join(path, array_manifest['file']), mmap_mode=mmap_mode)
+        if array.dtype.str != array_manifest['dtype'] or list(array.shape) != array_manifest['shape']:
+            raise ValueError('{} does not match the manifest in {}'.format(array_manifest['file'], path))
+        arrays[name] = array
+    return manifest, arrays
+
+
+def load_vocabularies(path):
+    """
+    Loads the entity and predicate vocabularies of an export directory.
+    :return: (entity_to_index, predicate_to_index) pair, where missing vocabularies are None.
+    """
+    manifest = load_manifest(path)
+    vocabularies = []
+    for key in ['entity_vocabulary', 'predicate_vocabulary']:
+        vocabulary = None
+        if key in manifest:
+            with open(os.path.join(path, manifest[key]), 'r') as f:
+                vocabulary = json.load(f)
+        vocabularies += [vocabulary]
+    return tuple(vocabularies)
+
+
+def load_engine(path, mmap_mode='r'):
+    """
+    Rebuilds the scoring engine of the model exported in a directory, without requiring TensorFlow.
+    :param path: Path of the export directory.
+    :param mmap_mode: Memory-map mode passed to numpy.load.
+    :return: inferbeddings.scoring.ScoringEngine instance.
+    """
+    manifest, arrays = load_embeddings(path, mmap_mode=mmap_mode)
+    engine_class = get_function(manifest['model'])
+    parameters = {name[len('parameters/'):]: value for name, value in arrays.items() if name.startswith('parameters/')}
+    return engine_class(arrays['entities'], arrays['predicates'],
+                        similarity_name=manifest['similarity'], parameters=parameters)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import sys
+
+
+def negative_l1_distance(x1, x2, axis=1):
+    """
+    Negative L1 Distance - NumPy version of inferbeddings.models.similarities.negative_l1_distance.
+
+    :param x1: First term.
+    :param x2: Second term.
+    :param axis: Reduction Indices.
+    :return: Similarity Value.
+    """
+    return - np.sum(np.abs(x1 - x2), axis=axis)
+
+
+def negative_l2_distance(x1, x2, axis=1):
+    """
+    Negative L2 Distance - NumPy version of inferbeddings.models.similarities.negative_l2_distance.
+
+    :param x1: First term.
+    :param x2: Second term.
+    :param axis: Reduction Indices.
+    :return: Similarity Value.
+    """
+    return - np.sqrt(np.sum(np.square(x1 - x2), axis=axis))
+
+
+def negative_square_l2_distance(x1, x2, axis=1):
+    """
+    Negative Square L2 Distance - NumPy version of inferbeddings.models.similarities.negative_square_l2_distance.
+
+    :param x1: First term.
+    :param x2: Second term.
+    :param axis: Reduction Indices.
+    :return: Similarity Value.
+    """
+    return - np.sum(np.square(x1 - x2), axis=axis)
+
+
+def dot_product(x1, x2, axis=1):
+    """
+    Dot Product - NumPy version of inferbeddings.models.similarities.dot_product.
+
+    :param x1: First term.
+    :param x2: Second term.
+    :param axis: Reduction Indices.
+    :return: Similarity Value.
+    """
+    return np.sum(x1 * x2, axis=axis)
+
+
+# Aliases
+l1 = L1 = negative_l1_distance
+l2 = L2 = negative_l2_distance
+l2_sqr = L2_SQR = negative_square_l2_distance
+dot = DOT = dot_product
+
+
+def get_function(function_name):
+    this_module = sys.modules[__name__]
+    if not hasattr(this_module, function_name):
+        raise ValueError('Unknown similarity function: {}'.format(function_name))
+    return getattr(this_module, function_name)
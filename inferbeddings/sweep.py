@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import shlex
+import itertools
+import traceback
+import multiprocessing
+
+from collections import namedtuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Arguments of kbp-cli.py whose values are triple files, read once by the runner before starting the trials
+DATA_ARGUMENTS = {'--train', '-t', '--valid', '-v', '--test', '-T', '--valid-neg', '--test-neg'}
+
+Trial = namedtuple('Trial', ['name', 'configuration', 'argv', 'log_path', 'results_path'])
+
+
+def cartesian_product(dicts):
+    return list(dict(zip(dicts, x)) for x in itertools.product(*dicts.values()))
+
+
+def summary(configuration):
+    kvs = sorted([(k, v) for k, v in configuration.items()], key=lambda e: e[0])
+    return '_'.join([('%s=%s' % (k, v)) for (k, v) in kvs])
+
+
+def command_to_argv(command):
+    """
+    Converts a kbp-cli.py command line, e.g. one generated by the to_cmd functions in scripts/,
+    to the list of its arguments.
+    """
+    tokens = shlex.split(command)
+    for i, token in enumerate(tokens):
+        if token.endswith('.py'):
+            return tokens[i + 1:]
+    return tokens
+
+
+def data_paths(argv):
+    """
+    Paths of the triple files used by a kbp-cli.py command line.
+    """
+    paths = []
+    for i, arg in enumerate(argv):
+        name, has_value, value = arg.partition('=')
+        if name in DATA_ARGUMENTS:
+            if not has_value:
+                value = argv[i + 1] if i + 1 < len(argv) else None
+            if value is not None:
+                paths += [value]
+    return paths
+
+
+def flatten_results(results, prefix=''):
+    """
+    Flattens the results saved by kbp-cli.py --results-json, e.g. {'valid': {'filtered': {'global': {'mrr': ..}}}}
+    becomes {'valid/filtered/global/mrr': ..}.
+    """
+    flat = {}
+    for key, value in results.items():
+        path = '{}{}'.format(prefix, key)
+        if isinstance(value, dict):
+            flat.update(flatten_results(value, prefix='{}/'.format(path)))
+        else:
+            flat[path] = value
+    return flat
+
+
+_main = None
+
+
+def _init_worker(main):
+    global _main
+    _main = main
+
+
+def _run_trial(trial):
+    """
+    Runs a trial in a pool worker, appending its output to its log file.
+    :return: (name, error) pair, where error is None if the trial saved its results.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    # Redirect stdout and stderr, including the output of native libraries such as TensorFlow, to the log file;
+    # workers are not reused across trials, so the redirection does not need to be undone
+    with open(trial.log_path, 'a') as f:
+        os.dup2(f.fileno(), sys.stdout.fileno())
+        os.dup2(f.fileno(), sys.stderr.fileno())
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    error = None
+    try:
+        _main(trial.argv + ['--results-json', trial.results_path])
+    except BaseException:
+        # Also catch SystemExit, raised e.g. by argparse on invalid arguments
+        error = traceback.format_exc()
+        logger.error(error)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    if error is None and not os.path.isfile(trial.results_path):
+        error = 'No results saved in {}'.format(trial.results_path)
+    return trial.name, error
+
+
+class SweepRunner:
+    """
+    Runs the trials of a hyperparameter sweep in a pool of worker processes.
+
+    Each trial runs main (e.g. the main function of kbp-cli.py) on the arguments of a configuration, writing its
+    output in <log_dir>/<prefix><summary>.log and its results in the corresponding .json file; trials whose results
+    already exist are skipped, so that an interrupted sweep can be resumed.
+    The triple files used by the trials are read once, before starting the workers, and stored in read-only numpy
+    arrays (see inferbeddings.io.cache_triples): workers are forked from the runner, and hence share the pages of
+    these arrays rather than reading and parsing the files in each trial. To avoid forking a process running
+    TensorFlow threads, main should only import TensorFlow when it is called, i.e. in the workers.
+    """
+    def __init__(self, main, to_argv, log_dir, prefix='', nb_workers=None, cache_data=True):
+        """
+        :param main: Function taking the list of command line arguments of a trial.
+        :param to_argv: Function mapping a configuration dictionary to the list of command line arguments of a trial.
+        :param log_dir: Directory containing the logs and results of the trials - created if it does not exist.
+        :param prefix: Prefix of the log and results file names.
+        :param nb_workers: Number of worker processes - by default, the number of CPUs.
+        :param cache_data: Read the triple files used by the trials once, and share them across workers.
+        """
+        self.main, self.to_argv = main, to_argv
+        self.log_dir, self.prefix = log_dir, prefix
+        self.nb_workers = nb_workers if nb_workers is not None else os.cpu_count()
+        self.cache_data = cache_data
+
+    def trials(self, configurations):
+        name_to_trial = {}
+        for configuration in configurations:
+            name = '{}{}'.format(self.prefix, summary(configuration))
+            path = os.path.join(self.log_dir, name)
+            name_to_trial[name] = Trial(name, configuration, list(self.to_argv(configuration)),
+                                        '{}.log'.format(path), '{}.json'.format(path))
+        return [name_to_trial[name] for name in sorted(name_to_trial)]
+
+    @staticmethod
+    def is_completed(trial):
+        return os.path.isfile(trial.results_path)
+
+    def run(self, configurations):
+        """
+        Runs all trials not completed yet.
+
+        :param configurations: List of configuration dictionaries.
+        :return: List of (trial, error) pairs, one for each trial that was run.
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        trials = self.trials(configurations)
+        pending_trials = [trial for trial in trials if not self.is_completed(trial)]
+        logger.info('Trials: {}, already completed: {}'.format(len(trials), len(trials) - len(pending_trials)))
+
+        if not pending_trials:
+            return []
+
+        paths = sorted({path for trial in pending_trials for path in data_paths(trial.argv)})
+        if self.cache_data and paths:
+            from inferbeddings.io import cache_triples
+            logger.info('Reading {} triple files ..'.format(len(paths)))
+            cache_triples(paths)
+
+        name_to_trial = {trial.name: trial for trial in pending_trials}
+        outcomes = []
+
+        # Workers are forked, so that they share the arrays of cached triples, and only run one trial each,
+        # so that every trial starts from a clean state (e.g. an empty TensorFlow graph)
+        context = multiprocessing.get_context('fork')
+        nb_workers = min(self.nb_workers, len(pending_trials))
+        with context.Pool(processes=nb_workers, initializer=_init_worker, initargs=(self.main,),
+                          maxtasksperchild=1) as pool:
+            for name, error in pool.imap_unordered(_run_trial, pending_trials):
+                outcomes += [(name_to_trial[name], error)]
+                if error is None:
+                    logger.info('[{}/{}] Completed: {}'.format(len(outcomes), len(pending_trials), name))
+                else:
+                    logger.warning('[{}/{}] Failed: {} (see {})'
+                                   .format(len(outcomes), len(pending_trials), name, name_to_trial[name].log_path))
+        return outcomes
+
+    def results_table(self, configurations, metrics=None):
+        """
+        Gathers the results of the completed trials.
+
+        :param configurations: List of configuration dictionaries.
+        :param metrics: If not None, only report the global results for the given metrics, e.g. ['mrr', 'hits@10'].
+        :return: (columns, rows) pair, where each row is a {column: value} dictionary, containing the configuration
+            and the results of a trial.
+        """
+        trials = [trial for trial in self.trials(configurations) if self.is_completed(trial)]
+
+        configuration_columns, result_columns, rows = [], [], []
+        for trial in trials:
+            with open(trial.results_path, 'r') as f:
+                results = flatten_results(json.load(f)['results'])
+            if metrics is not None:
+                results = {path: value for path, value in results.items()
+                           if path.split('/')[-1] in metrics and not {'left', 'right'} & set(path.split('/'))}
+
+            configuration_columns += [c for c in sorted(trial.configuration) if c not in configuration_columns]
+            result_columns += [c for c in sorted(results) if c not in result_columns]
+
+            row = dict(trial.configuration)
+            row.update(results)
+            rows += [row]
+
+        return configuration_columns + result_columns, rows
+
+
+def format_table(columns, rows):
+    """
+    Formats a results table, as returned by SweepRunner.results_table, as tab-separated values.
+    """
+    lines = ['\t'.join(columns)]
+    lines += ['\t'.join(str(row.get(column, '')) for column in columns) for row in rows]
+    return '\n'.join(lines) + '\n'
+
+
+def write_table(path, columns, rows):
+    with open(path, 'w') as f:
+        f.write(format_table(columns, rows))
+    logger.info('Results table saved in {}'.format(path))
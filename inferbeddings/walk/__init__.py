@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
 
 from inferbeddings.walk.base import AWalker, BidirectionalWalker
+from inferbeddings.walk.queries import PathQuerySampler, adjacency_matrices, path_query_answers, held_out_path_queries
 
-__all__ = ['AWalker', 'BidirectionalWalker']
+__all__ = ['AWalker',
+           'BidirectionalWalker',
+           'PathQuerySampler',
+           'adjacency_matrices',
+           'path_query_answers',
+           'held_out_path_queries']
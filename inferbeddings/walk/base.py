@@ -2,7 +2,7 @@
 
 import abc
 
-import random
+import numpy as np
 
 
 class AWalker(metaclass=abc.ABCMeta):
@@ -15,44 +15,118 @@ class AWalker(metaclass=abc.ABCMeta):
 
 
 class BidirectionalWalker(AWalker):
-    def __init__(self, triples, seed=None):
+    """
+    Samples random walks over a Knowledge Graph, where each step can follow an edge in either direction.
+
+    At each step, a predicate is sampled uniformly among the predicates of the edges involving the current entity,
+    and then an edge is sampled uniformly among the edges involving the current entity with such a predicate.
+
+    The graph is stored in CSR form: the edges involving each entity, i.e. its outgoing and inverted incoming edges,
+    are grouped by predicate, so that many walks can be sampled at once with a few array operations per step.
+    """
+    def __init__(self, triples, seed=None, entity_to_index=None, predicate_to_index=None):
+        """
+        :param triples: List of (s, p, o) triples.
+        :param seed: Seed of the random number generator.
+        :param entity_to_index: {entity: index} mapping used for the walks returned by sample, e.g. the
+            one in KnowledgeBaseParser - by default, entities are identified by their position in self.entities.
+        :param predicate_to_index: {predicate: index} mapping used for the walks returned by sample - by default,
+            predicates are identified by their position in self.predicates.
+        """
         super().__init__()
         self.triples = triples
-        self.random_state = random.Random(seed if seed is not None else 0)
+        self.random_state = np.random.RandomState(seed if seed is not None else 0)
+
+        unique_triples = sorted(set(triples))
+
+        self.entities = sorted({s for (s, _, _) in unique_triples} | {o for (_, _, o) in unique_triples})
+        self.predicates = sorted({p for (_, p, _) in unique_triples})
+
+        _entity_to_pos = {e: i for i, e in enumerate(self.entities)}
+        _predicate_to_pos = {p: i for i, p in enumerate(self.predicates)}
+
+        self.entity_indices = np.array([entity_to_index[e] for e in self.entities] if entity_to_index
+                                       else range(len(self.entities)), dtype=np.int64)
+        self.predicate_indices = np.array([predicate_to_index[p] for p in self.predicates] if predicate_to_index
+                                          else range(len(self.predicates)), dtype=np.int64)
+
+        triple_array = np.array([(_entity_to_pos[s], _predicate_to_pos[p], _entity_to_pos[o])
+                                 for (s, p, o) in unique_triples], dtype=np.int64).reshape(-1, 3)
+        s, p, o = triple_array[:, 0], triple_array[:, 1], triple_array[:, 2]
+
+        # Each triple (s, p, o) yields the edge s -p-> o and the inverse edge o -p^-1-> s;
+        # a self-loop (e, p, e) yields a single inverse edge, as in the original set-based walker
+        is_loop = s == o
+        edge_source = np.concatenate([s[~is_loop], o])
+        edge_predicate = np.concatenate([p[~is_loop], p])
+        edge_target = np.concatenate([o[~is_loop], s])
+        edge_inverse = np.concatenate([np.zeros(np.sum(~is_loop), dtype=bool), np.ones(len(o), dtype=bool)])
+
+        # Sort edges by (source, predicate) and identify the (source, predicate) groups
+        order = np.lexsort((edge_predicate, edge_source))
+        edge_source, edge_predicate = edge_source[order], edge_predicate[order]
+        self.edge_target, self.edge_inverse = edge_target[order], edge_inverse[order]
+
+        is_group_start = np.ones(len(edge_source), dtype=bool)
+        is_group_start[1:] = (edge_source[1:] != edge_source[:-1]) | (edge_predicate[1:] != edge_predicate[:-1])
+        group_starts = np.flatnonzero(is_group_start)
+
+        # group_ptr[g]:group_ptr[g + 1] are the edges in group g,
+        # entity_ptr[e]:entity_ptr[e + 1] are the groups of entity e
+        self.group_ptr = np.append(group_starts, len(edge_source))
+        self.group_predicate = edge_predicate[group_starts]
+        self.entity_ptr = np.searchsorted(edge_source[group_starts], np.arange(len(self.entities) + 1))
+
+    def sample(self, nb_walks, length):
+        """
+        Samples a batch of walks.
+
+        :param nb_walks: Number of walks.
+        :param length: Length of each walk.
+        :return: (steps, entities) pair, where steps is a (nb_walks, length, 2) array whose [:, :, 0] entries are
+            predicate indices and [:, :, 1] entries are 1 for inverse steps, and entities is a (nb_walks, 2) array
+            containing the source and target of each walk - i.e. steps[:, :, 0] and entities are in the format
+            of the walk_inputs and entity_inputs of the models in inferbeddings.models.
+        """
+        rs = self.random_state
+
+        # Sample the source entities
+        source = rs.randint(len(self.entities), size=nb_walks)
+        current = source
+
+        steps = np.zeros((nb_walks, length, 2), dtype=np.int64)
+        for i in range(length):
+            # Sample a predicate among the incoming and outgoing edges of each entity
+            nb_groups = self.entity_ptr[current + 1] - self.entity_ptr[current]
+            group = self.entity_ptr[current] + (rs.random_sample(nb_walks) * nb_groups).astype(np.int64)
 
-        self.entities = {s for (s, p, o) in triples} | {o for (s, p, o) in triples}
-        self.predicates = {p for (s, p, o) in triples}
+            # Uniformly sample an edge involving the entity and the predicate
+            nb_edges = self.group_ptr[group + 1] - self.group_ptr[group]
+            edge = self.group_ptr[group] + (rs.random_sample(nb_walks) * nb_edges).astype(np.int64)
 
-        self.entity_to_triples = {e: set() for e in self.entities}
+            steps[:, i, 0] = self.predicate_indices[self.group_predicate[group]]
+            steps[:, i, 1] = self.edge_inverse[edge]
+            current = self.edge_target[edge]
 
-        for (s, p, o) in self.triples:
-            self.entity_to_triples[s].add((s, p, o))
-            self.entity_to_triples[o].add((s, p, o))
+        entities = np.stack([self.entity_indices[source], self.entity_indices[current]], axis=1)
+        return steps, entities
 
     def __call__(self, length):
-        # Sample a source entity
-        source = self.random_state.sample(population=self.entities, k=1)[0]
+        """
+        Samples a single walk.
 
-        target = source
-        e = source
+        :param length: Length of the walk.
+        :return: (steps, [source, target]) pair, where steps is a list of (predicate, is_inverse) pairs,
+            and predicates and entities are the ones in the triples.
+        """
+        rs = self.random_state
+        source = current = rs.randint(len(self.entities))
 
         steps = []
         for i in range(length):
-            e_triples = self.entity_to_triples[e]
-
-            # Sample a predicate among its incoming and outgoing edges
-            e_predicates = {p for (s, p, o) in e_triples}
-            predicate = self.random_state.sample(population=e_predicates, k=1)[0]
-
-            # Uniformly sample a triple involving entity e and predicate p
-            e_p_triples = {(s, p, o) for (s, p, o) in e_triples if predicate == p}
-
-            # Uniformly sample a new node e
-            (s, p, o) = self.random_state.sample(population=e_p_triples, k=1)[0]
-            (e, is_inverse) = (s, True) if e == o else (o, False)
-
-            steps += [(predicate, is_inverse)]
-
-            target = e
+            group = self.entity_ptr[current] + rs.randint(self.entity_ptr[current + 1] - self.entity_ptr[current])
+            edge = self.group_ptr[group] + rs.randint(self.group_ptr[group + 1] - self.group_ptr[group])
+            steps += [(self.predicates[self.group_predicate[group]], bool(self.edge_inverse[edge]))]
+            current = self.edge_target[edge]
 
-        return steps, [source, target]
+        return steps, [self.entities[source], self.entities[current]]
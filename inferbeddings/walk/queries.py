@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import scipy.sparse as sp
+
+from inferbeddings.walk.base import BidirectionalWalker
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PathQuerySampler:
+    """
+    Samples path queries (s, [p_1, .., p_n], o) from a Knowledge Graph, i.e. walks following n edges
+    s -p_1-> e_1 -p_2-> .. -p_n-> o in their direction, in the walk_inputs/entity_inputs format of the models.
+    """
+    def __init__(self, triples, seed=None, max_rounds=100):
+        """
+        :param triples: List of (s, p, o) triples, where entities and predicates are indices.
+        :param seed: Seed of the random number generator.
+        :param max_rounds: Maximum number of batches of walks sampled by each call.
+        """
+        entities = {s for (s, _, _) in triples} | {o for (_, _, o) in triples}
+        predicates = {p for (_, p, _) in triples}
+        self.walker = BidirectionalWalker(triples, seed=seed,
+                                          entity_to_index={e: e for e in entities},
+                                          predicate_to_index={p: p for p in predicates})
+        self.max_rounds = max_rounds
+
+    def __call__(self, nb_queries, length):
+        """
+        Samples path queries.
+
+        :param nb_queries: Number of path queries.
+        :param length: Number of edges in each path.
+        :return: (walks, entities) pair, with shapes (nb_queries, length) and (nb_queries, 2) - fewer queries
+            are returned if the graph does not contain enough paths of the given length.
+        """
+        walks_lst, entities_lst, nb_sampled = [], [], 0
+        for _ in range(self.max_rounds):
+            if nb_sampled >= nb_queries:
+                break
+            # Walks are sampled in both directions, keeping only the ones not traversing any edge backwards
+            steps, entities = self.walker.sample(nb_walks=max(2 * (nb_queries - nb_sampled), 1024), length=length)
+            is_forward = np.all(steps[:, :, 1] == 0, axis=1)
+            walks_lst += [steps[is_forward, :, 0]]
+            entities_lst += [entities[is_forward]]
+            nb_sampled += int(np.sum(is_forward))
+
+        if nb_sampled < nb_queries:
+            logger.warning('Only {} of {} path queries of length {} could be sampled'
+                           .format(nb_sampled, nb_queries, length))
+
+        walks = np.concatenate(walks_lst, axis=0)[:nb_queries] if walks_lst else np.zeros((0, length), dtype=np.int64)
+        entities = np.concatenate(entities_lst, axis=0)[:nb_queries] if entities_lst else np.zeros((0, 2), dtype=np.int64)
+        return walks, entities
+
+
+def adjacency_matrices(triples, nb_entities):
+    """
+    Sparse adjacency matrix of each predicate.
+    :param triples: List of (s, p, o) triples, where entities and predicates are indices.
+    :param nb_entities: Number of entities - indices are in [0, nb_entities].
+    :return: {predicate: (nb_entities + 1, nb_entities + 1) CSR matrix} dictionary.
+    """
+    triples = np.array(sorted(set(triples)), dtype=np.int64).reshape(-1, 3)
+    predicate_to_adjacency = {}
+    for p in np.unique(triples[:, 1]):
+        p_triples = triples[triples[:, 1] == p]
+        data = np.ones(p_triples.shape[0], dtype=np.float32)
+        predicate_to_adjacency[int(p)] = sp.csr_matrix((data, (p_triples[:, 0], p_triples[:, 2])),
+                                                       shape=(nb_entities + 1, nb_entities + 1))
+    return predicate_to_adjacency
+
+
+def path_query_answers(predicate_to_adjacency, walks, sources, nb_entities, inverse=False):
+    """
+    Computes the answers of path queries, i.e. all entities reachable from each source by following its walk.
+
+    Rather than traversing the graph once per query, at each step all queries are advanced at once, with one
+    sparse matrix product per distinct predicate.
+
+    :param predicate_to_adjacency: Adjacency matrices, as returned by adjacency_matrices.
+    :param walks: (nb_queries, length) array of predicate indices.
+    :param sources: (nb_queries) array of source entity indices.
+    :param nb_entities: Number of entities.
+    :param inverse: If True, walks are followed backwards from their last step, i.e. the answers are the
+        entities from which each source can be reached by following its walk.
+    :return: (nb_queries, nb_entities + 1) CSR matrix, whose non-zero entries in row i are the answers of query i.
+    """
+    walks, sources = np.asarray(walks), np.asarray(sources)
+    nb_queries, length = walks.shape
+
+    data = np.ones(nb_queries, dtype=np.float32)
+    reached = sp.csr_matrix((data, (np.arange(nb_queries), sources)), shape=(nb_queries, nb_entities + 1))
+    empty = sp.csr_matrix((0, nb_entities + 1), dtype=np.float32)
+
+    for step in (reversed(range(length)) if inverse else range(length)):
+        parts, part_rows = [], []
+        for p in np.unique(walks[:, step]):
+            rows = np.flatnonzero(walks[:, step] == p)
+            adjacency = predicate_to_adjacency.get(int(p))
+            if adjacency is None:
+                parts += [sp.csr_matrix((len(rows), nb_entities + 1), dtype=np.float32)]
+            else:
+                parts += [reached[rows].dot(adjacency.T if inverse else adjacency)]
+            part_rows += [rows]
+        reached = sp.vstack(parts + [empty], format='csr')
+        reached = reached[np.argsort(np.concatenate(part_rows + [np.zeros(0, dtype=np.int64)]))]
+        # Only reachability matters, so keep entries binary to avoid counting paths
+        reached.data[:] = 1.0
+
+    reached.eliminate_zeros()
+    return reached
+
+
+def held_out_path_queries(train_triples, triples, nb_queries, length, nb_entities, seed=None):
+    """
+    Samples path queries for evaluation from the graph of all given triples, keeping only the ones whose target
+    cannot be reached from the source by following the walk in the graph of training triples.
+
+    :param train_triples: List of (s, p, o) training triples.
+    :param triples: List of (s, p, o) triples, including the training ones, used for sampling queries.
+    :param nb_queries: Number of path queries to sample before removing the ones answered by training triples.
+    :param length: Number of edges in each path.
+    :param nb_entities: Number of entities.
+    :param seed: Seed of the random number generator.
+    :return: (walks, entities) pair, with shapes (nb_held_out_queries, length) and (nb_held_out_queries, 2).
+    """
+    walks, entities = PathQuerySampler(triples, seed=seed)(nb_queries, length)
+    answers = path_query_answers(adjacency_matrices(train_triples, nb_entities), walks, entities[:, 0], nb_entities)
+    is_answered = np.asarray(answers[np.arange(entities.shape[0]), entities[:, 1]]).reshape(-1) > 0
+    return walks[~is_answered], entities[~is_answered]
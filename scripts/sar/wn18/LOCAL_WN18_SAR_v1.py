@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+# Sweep file for tools/sweep.py - the UCL_ARRAY_WN18_SAR_v1.py experiments, run on the local machine:
+#
+#   $ ./tools/sweep.py scripts/sar/wn18/LOCAL_WN18_SAR_v1.py --logs logs/sar/local_wn18_sar_v1/ --table wn18_sar_v1.tsv
+
+name = 'local_wn18_SAR_v1.'
+
+hyperparameters = [
+    dict(
+        epochs=[1000],
+        model=['DistMult', 'ComplEx'],
+        similarity=['dot'],
+        margin=[1],
+        embedding_size=[20, 50, 100, 150, 200],
+        unit_cube=[True, False],
+        sar_weight=[0, .0001, .01, 1, 100, 10000, 1000000],
+        sar_similarity=['l2_sqr'],
+        loss=['pairwise_hinge', 'hinge'],
+        clauses=['clauses_equivalencies.pl', 'clauses_equivalencies_notsame.pl']
+    ),
+    dict(
+        epochs=[1000],
+        model=['TransE'],
+        similarity=['l1', 'l2'],
+        margin=[1],
+        embedding_size=[20, 50, 100, 150, 200],
+        unit_cube=[True, False],
+        sar_weight=[0, .0001, .01, 1, 100, 10000, 1000000],
+        sar_similarity=['l2_sqr'],
+        loss=['pairwise_hinge', 'hinge'],
+        clauses=['clauses_equivalencies.pl', 'clauses_equivalencies_notsame.pl']
+    )
+]
+
+
+def to_argv(c):
+    argv = ['--train', 'data/wn18/wordnet-mlj12-train.txt',
+            '--valid', 'data/wn18/wordnet-mlj12-valid.txt',
+            '--test', 'data/wn18/wordnet-mlj12-test.txt',
+            '--clauses', 'data/wn18/clauses/{}'.format(c['clauses']),
+            '--nb-epochs', str(c['epochs']),
+            '--nb-batches', '10',
+            '--model', c['model'],
+            '--similarity', c['similarity'],
+            '--margin', str(c['margin']),
+            '--embedding-size', str(c['embedding_size']),
+            '--sar-weight', str(c['sar_weight']),
+            '--sar-similarity', c['sar_similarity']]
+    if c['loss'] == 'hinge':
+        argv += ['--loss', 'hinge']
+    elif c['loss'] == 'pairwise_hinge':
+        argv += ['--pairwise-loss', 'hinge']
+    if c['unit_cube']:
+        argv += ['--unit-cube']
+    return argv
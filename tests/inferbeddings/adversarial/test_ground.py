@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from inferbeddings.knowledgebase import Fact, KnowledgeBaseParser
+from inferbeddings.parse import parse_clause, compile_clause
+
+from inferbeddings.adversarial.ground import GroundLoss
+
+import pytest
+
+
+@pytest.mark.light
+def test_ground_loss():
+    triples = [
+        ('john', 'friendOf', 'mark'),
+        ('mark', 'friendOf', 'aleksi'),
+        ('mark', 'likes', 'john')
+    ]
+
+    parser = KnowledgeBaseParser([Fact(predicate_name=p, argument_names=[s, o]) for s, p, o in triples])
+    idx_triples = {(parser.entity_to_index[s], parser.predicate_to_index[p], parser.entity_to_index[o])
+                   for s, p, o in triples}
+
+    def scoring_function(args):
+        [[p_idx]], [[s_idx, o_idx]] = args
+        return 1.0 if (s_idx, p_idx, o_idx) in idx_triples else 0.0
+
+    clauses = [parse_clause('likes(Y, X) :- friendOf(X, Y)'),
+               parse_clause('friendOf(X, Z) :- friendOf(X, Y), friendOf(Y, Z)')]
+    ground_loss = GroundLoss(clauses=clauses, parser=parser, scoring_function=scoring_function)
+
+    john, mark, aleksi = [parser.entity_to_index[name] for name in ['john', 'mark', 'aleksi']]
+
+    # likes(mark, john) holds, likes(aleksi, mark) does not
+    assert ground_loss.zero_one_error(clauses[0], {'X': john, 'Y': mark}) == 0
+    assert ground_loss.zero_one_error(clauses[0], {'X': 'mark', 'Y': 'aleksi'}) == 1
+    assert ground_loss.continuous_error(clauses[0], {'X': mark, 'Y': aleksi}) == 1.0
+
+    # friendOf(john, aleksi) does not hold
+    feed_dicts = [{'X': john, 'Y': mark, 'Z': aleksi}, {'X': mark, 'Y': aleksi, 'Z': john}]
+    assert ground_loss.zero_one_errors(clauses[1], feed_dicts) == 1
+
+    # Compiled clauses, and clauses that are not part of the loss, are scored in the same way
+    compiled_clause = compile_clause(clauses[1], parser.predicate_to_index)
+    assert ground_loss.zero_one_errors(compiled_clause, feed_dicts) == 1
+    assert ground_loss.zero_one_errors(parse_clause('friendOf(A, C) :- friendOf(A, B), friendOf(B, C)'),
+                                       [{'A': john, 'B': mark, 'C': aleksi}]) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
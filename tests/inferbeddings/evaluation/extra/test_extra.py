@@ -142,5 +142,26 @@ def test_ap():
     np.testing.assert_allclose(value, 0.78333, rtol=1e-2)
 
 
+@pytest.mark.light
+def test_vectorized_auc():
+    random_state = np.random.RandomState(0)
+    for _ in range(2 ** 3):
+        y = random_state.randint(2, size=512)
+        scores = np.round(random_state.rand(512), 2)
+        n_pos = np.sum(y == 1)
+
+        order = np.argsort(scores)[::-1]
+        true_positives, false_positives = davis.pn_curve(y[order])
+
+        metric = davis.AUC(n_pos, len(y) - n_pos)
+        metric.set_pn_points([davis.PNPoint(tp, fp) for tp, fp in zip(true_positives, false_positives)])
+        metric.interpolate()
+
+        assert len(metric.pn_points) == len(true_positives)
+        assert davis.calculate_auc_pr(true_positives, false_positives, n_pos) == metric.calculate_auc_pr()
+        assert davis.calculate_auc_roc(true_positives, false_positives, n_pos, len(y) - n_pos) ==\
+            metric.calculate_auc_roc()
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -3,7 +3,10 @@
 import pytest
 
 import numpy as np
-from inferbeddings.evaluation import metrics, ranking_summary
+from inferbeddings.evaluation import metrics, ranking_summary, ranking_summaries, evaluate_ranks
+from inferbeddings.evaluation.util import apk, average_precision, ScoreHistogram
+from inferbeddings.evaluation.parallel import ParallelRanker
+from inferbeddings.scoring import BilinearDiagonalEngine
 
 import logging
 
@@ -68,5 +71,190 @@ def test_ranking_score():
 
     ranking_summary((err_subj, err_obj), n=1, tag='{} raw'.format('rankings'))
 
+
+@pytest.mark.light
+def test_mean_average_precision():
+    rs = np.random.RandomState(0)
+    W = rs.randn(10, 10, 5)
+
+    def random_scoring_function(args):
+        Xr, Xe = args[0], args[1]
+        return np.round(W[Xe[:, 0], Xe[:, 1], Xr[:, 0]], 1)
+
+    pos_triples = [tuple(t) for t in rs.randint(1, 5, size=(32, 3))]
+    neg_triples = [tuple(t) for t in rs.randint(1, 5, size=(128, 3))]
+
+    # Reference implementation: score the triples of each predicate separately, and use apk
+    average_precisions = []
+    for p_idx in sorted({p for (_, p, _) in pos_triples + neg_triples}):
+        p_triples = [t for t in pos_triples if t[1] == p_idx] + [t for t in neg_triples if t[1] == p_idx]
+        nb_pos = len([t for t in pos_triples if t[1] == p_idx])
+        Xr = np.array([[p] for (_, p, _) in p_triples])
+        Xe = np.array([[s, o] for (s, _, o) in p_triples])
+        predicted = 1 + np.argsort(random_scoring_function([Xr, Xe]))[::-1]
+        average_precisions += [apk(actual=range(1, nb_pos + 1), predicted=predicted, k=len(p_triples))]
+
+    _map = metrics.MeanAveragePrecision(random_scoring_function)
+    assert _map(pos_triples, neg_triples) == np.mean(average_precisions)
+
+
+@pytest.mark.light
+def test_average_precision():
+    assert average_precision([True, False, True]) == apk([1, 3], [1, 2, 3], k=3)
+    assert average_precision([False, False]) == 0.0
+    assert average_precision([True, True]) == 1.0
+
+
+@pytest.mark.light
+def test_ranking_summaries():
+    rs = np.random.RandomState(0)
+    ranks_l, ranks_r = rs.randint(1, 20, size=64), rs.randint(1, 20, size=64)
+    groups = rs.randint(1, 5, size=64)
+
+    summary = ranking_summaries((ranks_l, ranks_r))
+    ranks_g = np.concatenate([ranks_l, ranks_r])
+    for n in range(1, 10 + 1):
+        assert summary['global']['hits@{}'.format(n)] == np.mean(ranks_g <= n) * 100
+    assert summary['left']['mean'] == np.mean(ranks_l)
+    assert summary['right']['median'] == np.median(ranks_r)
+    assert summary['global']['mrr'] == np.mean(1. / ranks_g)
+
+    group_to_summary = ranking_summaries((ranks_l, ranks_r), groups=groups)
+    assert sorted(group_to_summary.keys()) == sorted(set(groups.tolist()))
+    for group, group_summary in group_to_summary.items():
+        mask = groups == group
+        group_ranks_g = np.concatenate([ranks_l[mask], ranks_r[mask]])
+        np.testing.assert_allclose(group_summary['left']['mean'], np.mean(ranks_l[mask]))
+        np.testing.assert_allclose(group_summary['right']['median'], np.median(ranks_r[mask]))
+        np.testing.assert_allclose(group_summary['global']['median'], np.median(group_ranks_g))
+        np.testing.assert_allclose(group_summary['global']['mrr'], np.mean(1. / group_ranks_g))
+        np.testing.assert_allclose(group_summary['global']['hits@3'], np.mean(group_ranks_g <= 3) * 100)
+
+
+@pytest.mark.light
+def test_evaluate_ranks_results():
+    results = dict()
+    evaluate_ranks(scoring_function, [(1, 1, 1), (1, 1, 2), (2, 1, 1)], 4, tag='valid', verbose=True,
+                   index_to_predicate={1: 'p'}, results=results)
+
+    assert results['valid']['raw']['left']['mean'] == 2.0
+    np.testing.assert_allclose(results['valid']['raw']['right']['hits@2'], 100. / 3)
+    assert results['valid']['predicates']['p']['raw'] == results['valid']['raw']
+    assert isinstance(results['valid']['filtered']['global']['mrr'], float)
+
+
+@pytest.mark.light
+def test_streaming_auc():
+    rs = np.random.RandomState(0)
+    W = rs.randn(32, 32, 4)
+
+    def random_scoring_function(args):
+        Xr, Xe = np.asarray(args[0]), np.asarray(args[1])
+        return W[Xe[:, 0], Xe[:, 1], Xr[:, 0]]
+
+    pos_triples = [(s, p, o) for (s, p, o) in rs.randint(0, 32, size=(256, 3)) % [32, 4, 32]]
+    neg_triples = [(s, p, o) for (s, p, o) in rs.randint(0, 32, size=(2048, 3)) % [32, 4, 32]]
+
+    auc = metrics.AUC(random_scoring_function, nb_entities=32, nb_predicates=4)
+    aucroc_value, aucpr_value = auc(pos_triples, neg_triples)
+
+    # Exact mode
+    streaming_auc = metrics.StreamingAUC(random_scoring_function, batch_size=100)
+    assert streaming_auc(pos_triples, iter(neg_triples)) == (aucroc_value, aucpr_value)
+
+    # Histogram mode
+    streaming_auc = metrics.StreamingAUC(random_scoring_function, batch_size=100, max_exact_size=0, nb_bins=2 ** 12)
+    streaming_aucroc_value, streaming_aucpr_value = streaming_auc(pos_triples, neg_triples)
+    np.testing.assert_allclose(streaming_aucroc_value, aucroc_value, atol=1e-3)
+    np.testing.assert_allclose(streaming_aucpr_value, aucpr_value, atol=1e-3)
+
+
+@pytest.mark.light
+def test_score_histogram():
+    histogram = ScoreHistogram(nb_bins=8)
+    histogram.update([0., 1.], [True, False])
+    histogram.update([-10., 20.], [False, True])
+
+    assert histogram.low <= -10. and histogram.high > 20.
+    assert histogram.counts.sum() == 4
+
+    labels, scores, weights = histogram.to_weighted_samples()
+    assert sorted(labels.tolist()) == [0, 0, 1, 1] and weights.sum() == 4
+    # The order of the scores is preserved across bins
+    assert scores[labels == 1].max() > scores[labels == 0].max()
+
+
+@pytest.mark.light
+def test_parallel_ranker():
+    rs = np.random.RandomState(0)
+    nb_entities, nb_predicates = 20, 3
+    engine = BilinearDiagonalEngine(rs.randn(nb_entities + 1, 5).astype(np.float32),
+                                    rs.randn(nb_predicates + 1, 5).astype(np.float32))
+
+    triples = [(s, p, o) for s, p, o in zip(rs.randint(1, nb_entities + 1, 50),
+                                            rs.randint(1, nb_predicates + 1, 50),
+                                            rs.randint(1, nb_entities + 1, 50))]
+    true_triples = triples + [(s, p, o) for s, p, o in zip(rs.randint(1, nb_entities + 1, 100),
+                                                           rs.randint(1, nb_predicates + 1, 100),
+                                                           rs.randint(1, nb_entities + 1, 100))]
+
+    ranker = metrics.Ranker(engine, nb_entities, true_triples=true_triples)
+    ranks, filtered_ranks = ranker(triples)
+
+    with ParallelRanker(engine, nb_entities, true_triples=true_triples, nb_workers=3, shard_size=7) as parallel_ranker:
+        parallel_ranks, parallel_filtered_ranks = parallel_ranker(triples)
+        pool = parallel_ranker._pool
+
+        # The worker processes are reused by the following calls
+        parallel_ranks_half, parallel_filtered_ranks_half = parallel_ranker(triples[:len(triples) // 2])
+        assert parallel_ranker._pool is pool
+    assert parallel_ranker._pool is None
+
+    for a, b in zip(ranks + filtered_ranks, parallel_ranks + parallel_filtered_ranks):
+        np.testing.assert_array_equal(a, b)
+    for a, b in zip(ranks + filtered_ranks, parallel_ranks_half + parallel_filtered_ranks_half):
+        np.testing.assert_array_equal(a[:len(triples) // 2], b)
+
+    # Filtering with the indexed true triples matches a linear scan over all true triples
+    for (s, p, o), rank_s, rank_o in zip(triples, *filtered_ranks):
+        Xr = np.full((nb_entities, 1), p)
+        Xe_o = np.array([[e, o] for e in range(1, nb_entities + 1)])
+        Xe_s = np.array([[s, e] for e in range(1, nb_entities + 1)])
+        scores_o, scores_s = engine([Xr, Xe_o]), engine([Xr, Xe_s])
+        scores_o[[_s - 1 for (_s, _p, _o) in true_triples if _o == o and _p == p and _s != s]] = - np.inf
+        scores_s[[_o - 1 for (_s, _p, _o) in true_triples if _s == s and _p == p and _o != o]] = - np.inf
+        assert rank_s == 1 + np.argsort(np.argsort(- scores_o))[s - 1]
+        assert rank_o == 1 + np.argsort(np.argsort(- scores_s))[o - 1]
+
+
+@pytest.mark.light
+def test_path_ranker():
+    rs = np.random.RandomState(0)
+    nb_entities, nb_predicates = 10, 2
+    engine = BilinearDiagonalEngine(rs.randn(nb_entities + 1, 5), rs.randn(nb_predicates + 1, 5))
+    true_triples = [(1, 1, 2), (2, 2, 3), (2, 2, 4), (5, 1, 2), (6, 1, 7)]
+
+    ranker = metrics.PathRanker(engine, nb_entities, true_triples=true_triples)
+    walks, entities = np.array([[1, 2], [1, 2]]), np.array([[1, 3], [5, 4]])
+    (err_subj, err_obj), (filtered_err_subj, filtered_err_obj) = ranker(walks, entities)
+
+    for i, (s, o) in enumerate(entities):
+        Xr = np.tile(walks[i:i + 1], (nb_entities, 1))
+        scores_o = engine([Xr, np.array([[e, o] for e in range(1, nb_entities + 1)])])
+        scores_s = engine([Xr, np.array([[s, e] for e in range(1, nb_entities + 1)])])
+        assert err_subj[i] == 1 + np.sum(scores_o > scores_o[s - 1])
+        assert err_obj[i] == 1 + np.sum(scores_s > scores_s[o - 1])
+
+        # Both 1 and 5 reach 3 and 4 through the walk [1, 2]
+        other_s, other_o = 6 - s, 7 - o
+        scores_o[other_s - 1], scores_s[other_o - 1] = - np.inf, - np.inf
+        assert filtered_err_subj[i] == 1 + np.sum(scores_o > scores_o[s - 1])
+        assert filtered_err_obj[i] == 1 + np.sum(scores_s > scores_s[o - 1])
+
+    # Scoring the queries in several batches does not change the ranks
+    batch_ranker = metrics.PathRanker(engine, nb_entities, true_triples=true_triples, batch_size=1)
+    assert batch_ranker(walks, entities) == ((err_subj, err_obj), (filtered_err_subj, filtered_err_obj))
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -6,7 +6,9 @@ import os
 
 import numpy as np
 
-from inferbeddings.io import load_glove, load_word2vec
+from inferbeddings.io import load_glove, load_word2vec, load_glove_words, load_word2vec_words
+from inferbeddings.io import read_triples, cache_triples
+from inferbeddings.io import embeddings
 
 
 @pytest.mark.light
@@ -47,5 +49,69 @@ def test_load_glove():
         assert 0.60136 < model['house'][0] < 0.60138
 
 
+@pytest.mark.light
+def test_embeddings_cache(tmpdir):
+    glove_path = str(tmpdir.join('glove.txt'))
+    with open(glove_path, 'w') as f:
+        f.write('the 0.1 0.2 0.3\nhouse 0.60137 -1.5 2\nat home 1 2 3\nthe 0.4 0.5 0.6\nbad 1 x 3\ncat -1 -2 -3\n')
+
+    cache_dir = str(tmpdir.join('cache'))
+    word_to_embedding = load_glove(glove_path, words={'the', 'house', 'dog'}, cache_dir=cache_dir)
+    assert os.path.isfile(embeddings.cache_paths(glove_path, cache_dir=cache_dir)[0])
+
+    assert set(word_to_embedding.keys()) == {'the', 'house'}
+    for word, embedding in load_glove(glove_path, words={'the', 'house', 'dog'}).items():
+        np.testing.assert_allclose(word_to_embedding[word], embedding, rtol=1e-6)
+
+    # Words containing spaces are supported by the cache, and malformed lines are skipped
+    assert load_glove_words(glove_path, cache_dir=cache_dir) == {'the', 'house', 'at home', 'cat'}
+    vocabulary, vectors = embeddings.load_embeddings_cache(glove_path, cache_dir=cache_dir)
+    assert vocabulary == ['the', 'house', 'at home', 'the', 'cat'] and vectors.shape == (5, 3)
+
+    # The cache is rebuilt when the embeddings file changes
+    with open(glove_path, 'a') as f:
+        f.write('dog 7 8 9\n')
+    assert embeddings.load_embeddings_cache(glove_path, cache_dir=cache_dir) is None
+    np.testing.assert_allclose(load_glove(glove_path, words={'dog'}, cache_dir=cache_dir)['dog'], [7, 8, 9])
+
+    word2vec_path = str(tmpdir.join('word2vec.bin'))
+    word2vec_vectors = np.array([[0.5, -0.25], [1.0, 2.0]], dtype='<f4')
+    with open(word2vec_path, 'wb') as f:
+        f.write(b'2 2\n')
+        for word, vector in zip([b'machine', b'learning'], word2vec_vectors):
+            f.write(word + b' ' + vector.tobytes() + b'\n')
+
+    assert load_word2vec_words(word2vec_path, words={'machine', 'deep'}) == {'machine'}
+    word_to_embedding = load_word2vec(word2vec_path, words={'learning'}, cache_dir=cache_dir)
+    np.testing.assert_array_equal(word_to_embedding['learning'], [1.0, 2.0])
+    assert load_word2vec_words(word2vec_path, cache_dir=cache_dir) == {'machine', 'learning'}
+
+
+@pytest.mark.light
+def test_cache_triples(tmpdir):
+    path = str(tmpdir.join('triples.txt'))
+    with open(path, 'w') as f:
+        f.write('a\tp\tb\nb\tq\tc\n')
+
+    cache_triples([path])
+
+    # Cached triples are returned even if the file changes, and callers can modify them safely
+    with open(path, 'w') as f:
+        f.write('c\tr\td\n')
+    pos_triples, neg_triples = read_triples(path)
+    assert pos_triples == [('a', 'p', 'b'), ('b', 'q', 'c')] and neg_triples is None
+
+    pos_triples += [('c', 'r', 'd')]
+    assert read_triples(path)[0] == [('a', 'p', 'b'), ('b', 'q', 'c')]
+
+    labelled_path = str(tmpdir.join('labelled_triples.txt'))
+    with open(labelled_path, 'w') as f:
+        f.write('a\tp\tb\t1\nb\tp\ta\t0\n')
+    expected = read_triples(labelled_path)
+
+    cache_triples([labelled_path])
+    assert read_triples(labelled_path) == expected == ([('a', 'p', 'b')], [('b', 'p', 'a')])
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from inferbeddings.knowledgebase import Fact, KnowledgeBaseParser
+from inferbeddings.parse import parse_clause
+
+from inferbeddings.logic import closure, MaterializationCache
+
+
+def chain_triples(n):
+    return {('{}'.format(idx), 'q', '{}'.format(idx + 1)) for idx in range(n)}
+
+
+def expected_closure(n):
+    res = set()
+    for i in range(n + 1):
+        for j in range(i + 1, n + 1):
+            res |= {(str(i), 'q', str(j)), (str(i), 'p', str(j))}
+    return res
+
+
+@pytest.mark.light
+def test_closure():
+    clauses = [
+        parse_clause('q(X, Z) :- q(X, Y), q(Y, Z)'),
+        parse_clause('p(X, Y) :- q(X, Y)')
+    ]
+    assert closure(chain_triples(16), clauses) == expected_closure(16)
+
+    # Clauses with repeated variables and constants
+    clauses = [
+        parse_clause('r(X, X) :- q(X, Y), q(Y, X)'),
+        parse_clause('s(X, a) :- q(X, b)')
+    ]
+    triples = {('a', 'q', 'b'), ('b', 'q', 'a'), ('c', 'q', 'b')}
+    assert closure(triples, clauses) == triples | {('a', 'r', 'a'), ('b', 'r', 'b'),
+                                                    ('a', 's', 'a'), ('c', 's', 'a')}
+
+
+@pytest.mark.light
+def test_closure_incremental():
+    transitivity = parse_clause('q(X, Z) :- q(X, Y), q(Y, Z)')
+    implication = parse_clause('p(X, Y) :- q(X, Y)')
+
+    closed = closure(chain_triples(8), [transitivity])
+
+    # Adding facts
+    delta = chain_triples(16) - chain_triples(8)
+    assert closure(closed, [transitivity], delta=delta) == closure(chain_triples(16), [transitivity])
+
+    # Adding facts and clauses
+    res = closure(closed, [transitivity, implication], delta=delta, new_clauses=[implication])
+    assert res == expected_closure(16)
+
+
+@pytest.mark.light
+def test_materialization_cache(tmpdir):
+    clauses = [
+        parse_clause('q(X, Z) :- q(X, Y), q(Y, Z)'),
+        parse_clause('p(X, Y) :- q(X, Y)')
+    ]
+
+    facts = [Fact('q', [s, o]) for (s, _, o) in sorted(chain_triples(16))]
+    parser = KnowledgeBaseParser(facts)
+    parser.predicate_to_index['p'] = 2
+
+    cache = MaterializationCache(str(tmpdir))
+
+    small_facts = [Fact('q', [s, o]) for (s, _, o) in sorted(chain_triples(8))]
+    small_inferred_facts = cache(small_facts, clauses[:1], parser)
+    assert len(small_inferred_facts) == len(set(small_inferred_facts))
+
+    key = MaterializationCache.get_key(chain_triples(8), [str(clauses[0])])
+    assert tmpdir.join('{}.pkl'.format(key)).check()
+
+    # Incremental update, starting from the cached closure
+    inferred_facts = cache(facts, clauses, parser)
+    inferred_triples = {(f.argument_names[0], f.predicate_name, f.argument_names[1]) for f in inferred_facts}
+    assert inferred_triples == expected_closure(16)
+
+    # Exact cache hit
+    assert cache(facts, clauses, parser) == inferred_facts
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -95,5 +95,42 @@ def test_bilinear_walk_embedding():
 
     tf.reset_default_graph()
 
+
+@pytest.mark.light
+def test_masked_walk_embeddings():
+    batch_size = 6
+    embedding_size = 16
+    max_walk_length = 4
+
+    rs = np.random.RandomState(0)
+    P = rs.rand(batch_size, max_walk_length, embedding_size)
+    # Lengths 1 and 3 leave an odd number of padding steps
+    lengths = np.array([1, 2, 3, 4, 3, 1])
+    mask = (np.arange(max_walk_length)[np.newaxis, :] < lengths[:, np.newaxis]).astype(P.dtype)
+
+    functions = [
+        embeddings.additive_walk_embedding,
+        embeddings.bilinear_diagonal_walk_embedding,
+        lambda x, **kwargs: embeddings.bilinear_walk_embedding(x, int(np.sqrt(embedding_size)), **kwargs),
+        embeddings.complex_walk_embedding
+    ]
+
+    vP = tf.Variable(P, name='P')
+    vM = tf.constant(mask)
+
+    init_op = tf.global_variables_initializer()
+    with tf.Session() as session:
+        session.run(init_op)
+
+        for function in functions:
+            masked_walk_embeddings = session.run(function(vP, mask=vM))
+            for i, length in enumerate(lengths):
+                # A padded walk is embedded exactly as its unpadded version
+                walk_embedding = session.run(function(tf.constant(P[i:i + 1, :length, :])))
+                assert(np.allclose(masked_walk_embeddings[i:i + 1], walk_embedding))
+
+    tf.reset_default_graph()
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
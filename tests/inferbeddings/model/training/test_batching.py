@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+from inferbeddings.models.training.util import pad_walks, make_bucketed_batches
+
+
+@pytest.mark.light
+def test_pad_walks():
+    walk_matrix, mask = pad_walks([[1, 2], [3], [4, 5, 6]])
+    np.testing.assert_array_equal(walk_matrix, [[1, 2, 0], [3, 0, 0], [4, 5, 6]])
+    np.testing.assert_array_equal(mask, [[1, 1, 0], [1, 0, 0], [1, 1, 1]])
+
+
+@pytest.mark.light
+def test_make_bucketed_batches():
+    rs = np.random.RandomState(0)
+    lengths = rs.randint(1, 4, size=100)
+
+    batches = make_bucketed_batches(lengths, batch_size=10, random_state=rs)
+    assert sorted(np.concatenate(batches).tolist()) == list(range(100))
+
+    # Batches are homogeneous in length, except for at most one batch per boundary between lengths
+    nb_mixed = sum(len(set(lengths[batch])) > 1 for batch in batches)
+    assert nb_mixed <= len(set(lengths)) - 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
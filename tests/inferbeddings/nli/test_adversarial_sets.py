@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from inferbeddings.nli.regularizers.adversarial import AdversarialSets
+
+import pytest
+
+
+class BagOfWordsModel:
+    nb_calls = 0
+
+    def __init__(self, sequence1, sequence1_length, sequence2, sequence2_length, reuse=False, **kwargs):
+        self.sequence1, self.sequence2 = sequence1, sequence2
+        self.reuse = reuse
+        BagOfWordsModel.nb_calls += 1
+
+    def __call__(self):
+        with tf.variable_scope('model', reuse=self.reuse):
+            w1 = tf.get_variable('w1', shape=[4, 3], initializer=tf.random_normal_initializer(seed=0))
+            w2 = tf.get_variable('w2', shape=[4, 3], initializer=tf.random_normal_initializer(seed=1))
+        h1, h2 = tf.reduce_sum(self.sequence1, axis=1), tf.reduce_sum(self.sequence2, axis=1)
+        return tf.matmul(h1, w1) * tf.matmul(h2, w2)
+
+
+@pytest.mark.light
+def test_adversarial_rule_losses():
+    tf.reset_default_graph()
+    rule_idxs = list(range(1, 9))
+
+    # Creating the parameters of the model, reused by the adversarial sets
+    BagOfWordsModel(tf.ones([1, 3, 4]), None, tf.ones([1, 3, 4]), None)()
+
+    kwargs = dict(embedding_size=4, batch_size=5, sequence_length=3)
+    BagOfWordsModel.nb_calls = 0
+    fused = AdversarialSets(BagOfWordsModel, {}, scope_name='fused', **kwargs)
+    fused_losses = fused.rule_losses(rule_idxs)
+    # A single forward pass for all rules
+    assert BagOfWordsModel.nb_calls == 1
+
+    adversarial = AdversarialSets(BagOfWordsModel, {}, scope_name='adversary', **kwargs)
+    losses = [getattr(adversarial, 'rule{}_loss'.format(rule_idx))() for rule_idx in rule_idxs]
+
+    assign_ops = [tf.assign(var, fused_var) for (_, rule_vars), (_, fused_rule_vars) in zip(losses, fused_losses)
+                  for var, fused_var in zip(sorted(rule_vars, key=lambda v: v.name),
+                                            sorted(fused_rule_vars, key=lambda v: v.name))]
+
+    with tf.Session() as session:
+        session.run(tf.global_variables_initializer())
+        session.run(assign_ops)
+
+        loss_values = session.run([loss for loss, _ in losses])
+        fused_loss_values = session.run([loss for loss, _ in fused_losses])
+
+    for loss_value, fused_loss_value in zip(loss_values, fused_loss_values):
+        assert loss_value.shape == (5,)
+        np.testing.assert_allclose(loss_value, fused_loss_value, rtol=1e-5, atol=1e-6)
+
+    tf.reset_default_graph()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
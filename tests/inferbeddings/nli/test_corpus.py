@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import os
+
+import numpy as np
+
+import inferbeddings.nli.util as util
+from inferbeddings.nli import corpus
+
+import pytest
+
+INSTANCES = [
+    ('(ROOT (S (NP (DT A) (NN man)) (VP (VBZ sleeps)) (. .)))',
+     '(ROOT (S (NP (DT A) (NN person)) (VP (VBZ rests)) (. .)))', 'entailment'),
+    ('(ROOT (S (NP (DT The) (NN dog)) (VP (VBZ runs))))',
+     '(ROOT (S (NP (DT A) (NN cat)) (VP (VBZ sleeps) (ADVP (RB soundly))) (. .)))', 'contradiction'),
+    ('(ROOT (NP (NN Dogs)))', '(ROOT (NP (NNS Cats)))', '-'),
+    ('(ROOT (S (NP (DT A) (NN man)) (VP (VBZ runs))))', '(ROOT (S (NP (PRP He)) (VP (VBZ runs) (ADVP (RB fast)))))',
+     'neutral')
+]
+
+
+def _write_corpus(path, instances=INSTANCES):
+    with gzip.open(path, 'wt') as f:
+        for parse1, parse2, gold_label in instances:
+            f.write(json.dumps({'sentence1': parse1, 'sentence1_parse': parse1,
+                                'sentence2': parse2, 'sentence2_parse': parse2,
+                                'gold_label': gold_label}) + '\n')
+
+
+@pytest.mark.light
+def test_corpus_cache(tmpdir):
+    path = str(tmpdir.join('corpus.jsonl.gz'))
+    cache_dir = str(tmpdir.join('cache'))
+    _write_corpus(path)
+
+    instances = util.SNLI.parse(path)
+    data_corpus = corpus.load_corpus(path, cache_dir=cache_dir)
+    assert os.path.isfile(corpus.cache_path(path, cache_dir=cache_dir))
+
+    cached_corpus = corpus.load_corpus(path, cache_dir=cache_dir)
+    assert len(data_corpus) == len(cached_corpus) == len(instances) == 3
+    assert cached_corpus.tokens.dtype == np.int32
+
+    for instance, cached_instance in zip(instances, cached_corpus.to_instances()):
+        for key in ['sentence1', 'sentence2', 'sentence1_parse_tokens', 'sentence2_parse_tokens', 'gold_label']:
+            assert instance[key] == cached_instance[key]
+
+    token_counts = corpus.token_counts([cached_corpus, cached_corpus])
+    assert token_counts['A'] == 8 and token_counts['runs'] == 6
+
+    # Lowercased corpora are cached separately
+    lower_corpus = corpus.load_corpus(path, is_lower=True, cache_dir=cache_dir)
+    assert 'a' in lower_corpus.vocabulary and 'A' not in lower_corpus.vocabulary
+
+    # The cache is rebuilt when the corpus changes
+    _write_corpus(path, instances=INSTANCES[:-1])
+    os.utime(path, ns=(0, 0))
+    assert len(corpus.load_corpus(path, cache_dir=cache_dir)) == 2
+
+
+@pytest.mark.light
+def test_corpus_to_dataset(tmpdir):
+    path = str(tmpdir.join('corpus.jsonl.gz'))
+    _write_corpus(path)
+
+    instances = util.SNLI.parse(path)
+    data_corpus = corpus.TokenizedCorpus.from_instances(instances)
+
+    token_to_index = {token: index for index, token in enumerate(['A', 'man', 'runs', '.', 'sleeps'], start=4)}
+    label_to_index = {'entailment': 0, 'neutral': 1, 'contradiction': 2}
+
+    for has_bos, has_eos, has_unk, max_len in [(False, False, False, None), (True, True, True, None),
+                                               (True, True, False, 3), (False, True, True, 2)]:
+        args = dict(has_bos=has_bos, has_eos=has_eos, has_unk=has_unk, max_len=max_len)
+        dataset = util.instances_to_dataset(instances, token_to_index, label_to_index, **args)
+        corpus_dataset = data_corpus.to_dataset(token_to_index, label_to_index, **args)
+        for key, value in dataset.items():
+            assert value.dtype == corpus_dataset[key].dtype
+            np.testing.assert_array_equal(value, corpus_dataset[key])
+
+
+@pytest.mark.light
+def test_ragged_dataset(tmpdir):
+    path = str(tmpdir.join('corpus.jsonl.gz'))
+    _write_corpus(path)
+
+    instances = util.SNLI.parse(path)
+    data_corpus = corpus.TokenizedCorpus.from_instances(instances)
+
+    token_to_index = {token: index for index, token in enumerate(['A', 'man', 'runs', '.', 'sleeps'], start=4)}
+    label_to_index = {'entailment': 0, 'neutral': 1, 'contradiction': 2}
+
+    args = dict(has_bos=True, has_eos=True, has_unk=True, max_len=4)
+    dataset = util.instances_to_dataset(instances, token_to_index, label_to_index, **args)
+    ragged_dataset = data_corpus.to_ragged_dataset(token_to_index, label_to_index, **args)
+
+    assert len(ragged_dataset) == len(instances)
+
+    # Batches are only padded to their longest sentence
+    for idxs in [[1], [1, 0], [0, 1, 1]]:
+        batch = ragged_dataset.batch(idxs)
+        for key in ['sentence1', 'sentence2']:
+            max_len = np.max(dataset['{}_length'.format(key)][idxs])
+            assert batch[key].shape == (len(idxs), max_len)
+            np.testing.assert_array_equal(batch[key], dataset[key][idxs, :max_len])
+        for key in ['sentence1_length', 'sentence2_length', 'label']:
+            np.testing.assert_array_equal(batch[key], dataset[key][idxs])
+
+    padded_dataset = ragged_dataset.to_padded()
+    for key, value in dataset.items():
+        np.testing.assert_array_equal(value, padded_dataset[key])
+
+    from_padded_dataset = corpus.RaggedDataset.from_padded(dataset)
+    for key in ['sentence1', 'sentence1_length', 'sentence2', 'sentence2_length', 'label']:
+        np.testing.assert_array_equal(getattr(from_padded_dataset, key), getattr(ragged_dataset, key))
+
+
+@pytest.mark.light
+def test_parallel_parse(tmpdir):
+    path = str(tmpdir.join('corpus.jsonl.gz'))
+    _write_corpus(path, instances=INSTANCES * 5)
+
+    for tokenize, is_lower in [(None, False), (util.treebank_tokenize, True)]:
+        serial_instances = util.SNLI.parse(path, tokenize=tokenize, is_lower=is_lower, nb_workers=1)
+        assert len(serial_instances) == 15
+        for chunk_size in [1, 3, 100]:
+            instances = util.SNLI.parse(path, tokenize=tokenize, is_lower=is_lower, nb_workers=2, chunk_size=chunk_size)
+            assert instances == serial_instances
+
+
+@pytest.mark.light
+def test_ragged():
+    elements, lengths = np.array([1, 2, 3, 4, 5, 6]), np.array([2, 0, 3, 1])
+
+    gathered, gathered_lengths = corpus.gather_ragged(elements, lengths, [2, 0, 1])
+    np.testing.assert_array_equal(gathered, [3, 4, 5, 1, 2])
+    np.testing.assert_array_equal(gathered_lengths, [3, 2, 0])
+
+    truncated, truncated_lengths = corpus.truncate_ragged(elements, lengths, max_len=2)
+    np.testing.assert_array_equal(truncated, [1, 2, 3, 4, 6])
+    np.testing.assert_array_equal(truncated_lengths, [2, 0, 2, 1])
+
+    marked, marked_lengths = corpus.add_markers(elements, lengths, bos_idx=-1, eos_idx=-2)
+    np.testing.assert_array_equal(marked, [-1, 1, 2, -2, -1, -2, -1, 3, 4, 5, -2, -1, 6, -2])
+
+    np.testing.assert_array_equal(corpus.pad_ragged(elements, lengths),
+                                  util.pad_sequences([[1, 2], [], [3, 4, 5], [6]]))
+    np.testing.assert_array_equal(corpus.pad_ragged(elements, lengths, max_len=2),
+                                  util.pad_sequences([[1, 2], [], [3, 4, 5], [6]], max_len=2))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from inferbeddings.nli import tfutil
+
+import pytest
+
+
+def _train(micro_batches, clip_value=None, nb_accumulation_steps=1):
+    tf.reset_default_graph()
+
+    token_ph = tf.placeholder(dtype=tf.int32, shape=[None], name='token')
+    target_ph = tf.placeholder(dtype=tf.float32, shape=[None], name='target')
+
+    embeddings = tf.get_variable('embeddings', initializer=np.arange(20, dtype=np.float32).reshape(10, 2) / 10.0)
+    weights = tf.get_variable('weights', initializer=np.array([0.5, -1.0], dtype=np.float32))
+    scores = tf.reduce_sum(tf.nn.embedding_lookup(embeddings, token_ph) * weights, axis=1)
+    loss = tf.reduce_mean(tf.square(scores - target_ph))
+
+    optimizer = tf.train.GradientDescentOptimizer(learning_rate=0.1)
+    with tf.variable_scope('optimizer'):
+        if nb_accumulation_steps > 1:
+            weight_ph, accumulate_op, update_op, reset_op = \
+                tfutil.gradient_accumulator(optimizer, loss, clip_value=clip_value)
+        else:
+            gradients, v = zip(*optimizer.compute_gradients(loss))
+            if clip_value:
+                gradients, _ = tf.clip_by_global_norm(gradients, clip_value)
+            training_step = optimizer.apply_gradients(zip(gradients, v))
+
+    # Accumulators are local variables, hence they are not saved in checkpoints
+    assert set(tf.global_variables()) == {embeddings, weights}
+
+    with tf.Session() as session:
+        session.run(tf.global_variables_initializer())
+        if nb_accumulation_steps > 1:
+            session.run(reset_op)
+            for tokens, targets in micro_batches:
+                session.run(accumulate_op, feed_dict={token_ph: tokens, target_ph: targets,
+                                                      weight_ph: tokens.shape[0]})
+            session.run(update_op)
+        else:
+            tokens, targets = [np.concatenate(arrays) for arrays in zip(*micro_batches)]
+            session.run(training_step, feed_dict={token_ph: tokens, target_ph: targets})
+        return session.run([embeddings, weights])
+
+
+@pytest.mark.light
+def test_gradient_accumulation():
+    rs = np.random.RandomState(0)
+    # Micro-batches of different sizes, with repeated tokens
+    micro_batches = [(rs.randint(0, 10, size), rs.normal(size=size).astype(np.float32)) for size in [5, 3, 8]]
+
+    for clip_value in [None, 0.1]:
+        expected_embeddings, expected_weights = _train(micro_batches, clip_value=clip_value)
+        embeddings, weights = _train(micro_batches, clip_value=clip_value, nb_accumulation_steps=3)
+
+        np.testing.assert_allclose(embeddings, expected_embeddings, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(weights, expected_weights, rtol=1e-5, atol=1e-6)
+
+    tf.reset_default_graph()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from inferbeddings.nli.corpus import RaggedDataset
+from inferbeddings.nli.evaluation import accuracy, predict, confusion_matrix
+
+import pytest
+
+
+def _dataset(nb_instances=100, seed=0):
+    rs = np.random.RandomState(seed)
+    sentence1_length, sentence2_length = rs.randint(1, 20, nb_instances), rs.randint(1, 10, nb_instances)
+    return RaggedDataset(sentence1=rs.randint(1, 50, sentence1_length.sum()).astype(np.int32),
+                         sentence1_length=sentence1_length,
+                         sentence2=rs.randint(1, 50, sentence2_length.sum()).astype(np.int32),
+                         sentence2_length=sentence2_length,
+                         label=rs.randint(0, 3, nb_instances))
+
+
+@pytest.mark.light
+def test_nli_predict():
+    dataset = _dataset()
+    padded_dataset = dataset.to_padded()
+
+    sentence1_ph = tf.placeholder(dtype=tf.int32, shape=[None, None], name='sentence1')
+    sentence2_ph = tf.placeholder(dtype=tf.int32, shape=[None, None], name='sentence2')
+    sentence1_len_ph = tf.placeholder(dtype=tf.int32, shape=[None], name='sentence1_length')
+    sentence2_len_ph = tf.placeholder(dtype=tf.int32, shape=[None], name='sentence2_length')
+    label_ph = tf.placeholder(dtype=tf.int32, shape=[None], name='label')
+    dropout_keep_prob_ph = tf.placeholder(tf.float32, name='dropout_keep_prob')
+
+    # Predictions that do not depend on the padding of the batches
+    predictions_int = tf.mod(tf.reduce_sum(sentence1_ph, axis=1) + tf.reduce_sum(sentence2_ph, axis=1), 3)
+    labels_int = tf.cast(label_ph, tf.int32)
+
+    expected = (padded_dataset['sentence1'].sum(axis=1) + padded_dataset['sentence2'].sum(axis=1)) % 3
+
+    with tf.Session() as session:
+        placeholders = [sentence1_ph, sentence1_len_ph, sentence2_ph, sentence2_len_ph, dropout_keep_prob_ph]
+        for eval_dataset in [dataset, padded_dataset]:
+            predictions = predict(session, eval_dataset, predictions_int, *placeholders, batch_size=16)
+            np.testing.assert_array_equal(predictions, expected)
+
+        acc, acc_c, acc_e, acc_n = accuracy(session, dataset, 'Test',
+                                            sentence1_ph, sentence1_len_ph, sentence2_ph, sentence2_len_ph,
+                                            label_ph, dropout_keep_prob_ph, predictions_int, labels_int,
+                                            2, 0, 1, 16)
+
+    matches = expected == dataset.label
+    assert acc == pytest.approx(np.mean(matches))
+    for class_acc, class_idx in [(acc_c, 2), (acc_e, 0), (acc_n, 1)]:
+        assert class_acc == pytest.approx(np.mean(matches[dataset.label == class_idx]))
+
+    tf.reset_default_graph()
+
+
+@pytest.mark.light
+def test_nli_confusion_matrix():
+    confusion = confusion_matrix([0, 0, 1, 2, 2, 2], [0, 1, 1, 2, 0, 2], nb_classes=3)
+    np.testing.assert_array_equal(confusion, [[1, 1, 0], [0, 1, 0], [1, 0, 2]])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+import inferbeddings.nli.util as util
+from inferbeddings.nli import tfutil
+
+import pytest
+
+
+@pytest.mark.light
+def test_scatter_rows():
+    token_to_index = {'cat': 5, 'dog': 4, 'fish': 6}
+    token_to_embedding = {'fish': [3.0, 3.0], 'dog': [1.0, 2.0]}
+    token_idxs, embeddings = util.pretrained_embeddings(token_to_index, token_to_embedding, embedding_size=2)
+
+    nb_special_tokens = 3
+    initial_values = np.random.RandomState(0).rand(7, 2).astype(np.float32)
+
+    tf.reset_default_graph()
+
+    token_idx_ph = tf.placeholder(dtype=tf.int32, name='word_idx')
+    token_embedding_ph = tf.placeholder(dtype=tf.float32, shape=[None], name='word_embedding')
+    token_idxs_ph = tf.placeholder(dtype=tf.int32, shape=[None], name='word_idxs')
+    token_embeddings_ph = tf.placeholder(dtype=tf.float32, shape=[None, 2], name='word_embeddings')
+
+    # A single table, as in nli-simple-cli.py and nli-cli.py
+    embedding_layer = tf.get_variable('embeddings', initializer=initial_values)
+    expected_embedding_layer = tf.get_variable('expected_embeddings', initializer=initial_values)
+
+    assign_token_embeddings = tfutil.scatter_rows(embedding_layer, token_idxs_ph, token_embeddings_ph)
+    assign_token_embedding = expected_embedding_layer[token_idx_ph, :].assign(token_embedding_ph)
+
+    # Separate tables for special tokens and words, as in nli-cli.py --train-special-token-embeddings
+    def make_split_embedding_layer(name):
+        special = tf.get_variable('{}_special'.format(name), initializer=initial_values[:nb_special_tokens])
+        words = tf.get_variable('{}_words'.format(name), initializer=initial_values[nb_special_tokens:])
+        return words, tf.concat(values=[special, words], axis=0)
+
+    embedding_layer_words, split_embedding_layer = make_split_embedding_layer('split')
+    expected_embedding_layer_words, expected_split_embedding_layer = make_split_embedding_layer('expected_split')
+
+    assign_word_embeddings = tfutil.scatter_rows(embedding_layer_words, token_idxs_ph, token_embeddings_ph,
+                                                 offset=nb_special_tokens)
+    assign_word_embedding = \
+        expected_embedding_layer_words[token_idx_ph - nb_special_tokens, :].assign(token_embedding_ph)
+
+    with tf.Session() as session:
+        session.run(tf.global_variables_initializer())
+
+        feed_dict = {token_idxs_ph: token_idxs, token_embeddings_ph: embeddings}
+        session.run([assign_token_embeddings, assign_word_embeddings], feed_dict=feed_dict)
+
+        # The per-token assignments replaced by the single scatter update
+        for token, embedding in token_to_embedding.items():
+            feed_dict = {token_idx_ph: token_to_index[token], token_embedding_ph: embedding}
+            session.run([assign_token_embedding, assign_word_embedding], feed_dict=feed_dict)
+
+        values, expected_values, split_values, expected_split_values = session.run(
+            [embedding_layer, expected_embedding_layer, split_embedding_layer, expected_split_embedding_layer])
+
+    for actual, expected in [(values, expected_values), (split_values, expected_split_values)]:
+        np.testing.assert_array_equal(actual, expected)
+        np.testing.assert_array_equal(actual[[4, 6]], [[1.0, 2.0], [3.0, 3.0]])
+        # Rows without a pre-trained embedding keep their initial values
+        np.testing.assert_array_equal(actual[[0, 1, 2, 3, 5]], initial_values[[0, 1, 2, 3, 5]])
+
+    tf.reset_default_graph()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
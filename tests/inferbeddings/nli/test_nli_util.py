@@ -62,6 +62,18 @@ def test_nli_util():
     np.testing.assert_allclose(np.array(train_dataset_v2['sentence1_length']) + 2, train_dataset_v1['sentence1_length'])
     np.testing.assert_allclose(np.array(train_dataset_v2['sentence2_length']) + 2, train_dataset_v1['sentence2_length'])
 
+
+@pytest.mark.light
+def test_pretrained_embeddings():
+    token_to_index = {'cat': 5, 'dog': 4, 'fish': 6}
+    token_to_embedding = {'fish': [3.0, 3.0], 'dog': [1.0, 2.0]}
+
+    token_idxs, embeddings = util.pretrained_embeddings(token_to_index, token_to_embedding, embedding_size=2)
+    np.testing.assert_array_equal(token_idxs, [4, 6])
+    np.testing.assert_array_equal(embeddings, [[1.0, 2.0], [3.0, 3.0]])
+    assert embeddings.dtype == np.float32
+
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)
     pytest.main([__file__])
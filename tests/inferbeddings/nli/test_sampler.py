@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+import numpy as np
+
+from inferbeddings.nli.sampler import BucketSampler, BatchPrefetcher, EpochStatistics
+from inferbeddings.nli.sampler import length_buckets, padded_tokens
+
+import pytest
+
+
+@pytest.mark.light
+def test_length_buckets():
+    lengths = np.arange(100)
+    buckets = length_buckets(lengths, nb_buckets=4)
+    np.testing.assert_array_equal(np.bincount(buckets), [25, 25, 25, 25])
+    assert np.all(np.diff(buckets) >= 0)
+
+    np.testing.assert_array_equal(length_buckets(lengths, nb_buckets=1), np.zeros(100))
+    # Repeated lengths yield fewer buckets
+    assert np.max(length_buckets(np.array([1] * 90 + [2] * 10), nb_buckets=10)) == 1
+
+
+@pytest.mark.light
+def test_bucket_sampler():
+    rs = np.random.RandomState(0)
+    sizes1, sizes2 = rs.randint(1, 64, 1000), rs.randint(1, 32, 1000)
+
+    sampler = BucketSampler(sizes1, sizes2, nb_buckets=5, batch_size=32, random_state=rs)
+    batches = sampler.batches()
+    assert sorted(len(batch) for batch in batches)[1:] == [32] * (len(batches) - 1)
+    np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(1000))
+
+    # Batches are shuffled across epochs
+    assert not np.array_equal(np.concatenate(batches), np.concatenate(sampler.batches()))
+
+    # Bucketing reduces the number of padding positions
+    order = rs.permutation(1000)
+    random_batches = [order[start:start + 32] for start in range(0, 1000, 32)]
+    nb_padded = sum(padded_tokens(sizes1[batch], sizes2[batch]) for batch in batches)
+    nb_random_padded = sum(padded_tokens(sizes1[batch], sizes2[batch]) for batch in random_batches)
+    assert nb_padded < nb_random_padded
+
+
+@pytest.mark.light
+def test_bucket_sampler_max_tokens():
+    rs = np.random.RandomState(0)
+    sizes1, sizes2 = rs.randint(1, 64, 1000), rs.randint(1, 32, 1000)
+    sizes1[0] = 1000
+
+    sampler = BucketSampler(sizes1, sizes2, nb_buckets=5, batch_size=None, max_tokens=512, random_state=rs)
+    batches = sampler.batches()
+    np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(1000))
+
+    for batch in batches:
+        # Pairs longer than the budget get a batch on their own
+        assert padded_tokens(sizes1[batch], sizes2[batch]) <= 512 or len(batch) == 1
+    assert [0] in [batch.tolist() for batch in batches]
+
+    sampler = BucketSampler(sizes1, sizes2, nb_buckets=5, batch_size=4, max_tokens=512, random_state=rs)
+    assert max(len(batch) for batch in sampler.batches()) == 4
+
+
+@pytest.mark.light
+def test_batch_prefetcher():
+    batch_idxs = [np.arange(i, i + 3) for i in range(0, 30, 3)]
+
+    def make_batch(idxs):
+        time.sleep(0.001 * (idxs[0] % 4))
+        return idxs * 2
+
+    for capacity, nb_threads in [(0, 1), (1, 1), (4, 1), (4, 3)]:
+        prefetcher = BatchPrefetcher(make_batch, batch_idxs, capacity=capacity, nb_threads=nb_threads)
+        batches = list(prefetcher)
+        # Batches are returned in order, even when assembled by several threads
+        assert len(batches) == len(batch_idxs)
+        for batch, idxs in zip(batches, batch_idxs):
+            np.testing.assert_array_equal(batch, idxs * 2)
+        assert prefetcher.wait_seconds >= prefetcher.last_wait_seconds >= 0.0
+
+    def failing_make_batch(idxs):
+        raise ValueError(str(idxs[0]))
+
+    with pytest.raises(ValueError):
+        list(BatchPrefetcher(failing_make_batch, batch_idxs, capacity=2))
+
+
+@pytest.mark.light
+def test_epoch_statistics():
+    epoch_stats = EpochStatistics()
+    epoch_stats.add(np.array([2, 4]), np.array([1, 1]), 1.0, 0.5)
+    epoch_stats.add(np.array([3]), np.array([3]), 1.0)
+
+    assert epoch_stats.nb_pairs == 3
+    assert epoch_stats.padding_efficiency == pytest.approx(14 / 16)
+    assert 'Padding Efficiency: 87.50%' in str(epoch_stats)
+    assert '1.5 pairs/s' in str(epoch_stats)
+    assert 'Input Wait: 25.00%' in str(epoch_stats)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
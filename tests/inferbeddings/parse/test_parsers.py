@@ -3,6 +3,7 @@
 import pytest
 
 import inferbeddings.parse.clauses as clauses
+from inferbeddings.parse import parse_clause, load_clauses, compile_clause
 
 
 @pytest.mark.light
@@ -92,5 +93,57 @@ def test_parse_clauses_two():
     assert clause.weight == 1.0
 
 
+@pytest.mark.light
+def test_parse_clause_fast():
+    clause_strs = [
+        'p(x, y) :- p(x, z), q(z, a), r(a, y)',
+        '"P"(x, y) :- p(x, z), q(z, a), "R"(a, y)',
+        '/a/b./c(X0, X2) :- /d(X1, X0), /e_f(X2, X1)',
+        '!p(X,Y) :- !q(Y ,X) < ? >',
+        'p(X, y) :- r(X,Z), q(X) < -1.2 >'
+    ]
+    for clause_str in clause_strs:
+        clause = parse_clause(clause_str)
+        expected = clauses.ClauseVisitor().visit(clauses.grammar.parse(clause_str))
+
+        assert clause == expected
+        assert clause.weight == expected.weight
+        for atom, expected_atom in zip((clause.head,) + clause.body, (expected.head,) + expected.body):
+            assert atom.negated == expected_atom.negated
+            assert [type(a) for a in atom.arguments] == [type(a) for a in expected_atom.arguments]
+
+
+@pytest.mark.light
+def test_compile_clause():
+    predicate_to_index = {'p': 1, 'q': 2}
+
+    clause = compile_clause(parse_clause('p(X, Z) :- q(X, Y), q(Y, Z)'), predicate_to_index)
+    assert clause.head.predicate_idx == 1 and clause.head.variable_idxs == (0, 1)
+    assert [(a.predicate_idx, a.variable_idxs) for a in clause.body] == [(2, (0, 2)), (2, (2, 1))]
+    assert clause.variable_names == ('X', 'Z', 'Y')
+    assert clause.nb_variables == 3
+
+    # Variable renaming does not change the compiled clause
+    renamed_clause = compile_clause(parse_clause('p(A, C) :- q(A, B), q(B, C)'), predicate_to_index)
+    assert clause == renamed_clause and hash(clause) == hash(renamed_clause)
+    assert len({clause, renamed_clause}) == 1
+
+    with pytest.raises(AttributeError):
+        clause.weight = 0.5
+
+    with pytest.raises(ValueError):
+        compile_clause(parse_clause('p(X, a) :- q(X, a)'), predicate_to_index)
+
+
+@pytest.mark.light
+def test_load_clauses(tmpdir):
+    path = tmpdir.join('clauses.pl')
+    path.write('p(X, Y) :- q(Y, X)\n\nq(X, Y) :- p(Y, X)\np(X, Y) :- q(Y, X)\n')
+
+    loaded_clauses = load_clauses(str(path))
+    assert len(loaded_clauses) == 3
+    assert loaded_clauses[0] == loaded_clauses[2] == parse_clause('p(X, Y) :- q(Y, X)')
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
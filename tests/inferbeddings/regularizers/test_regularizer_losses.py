@@ -66,5 +66,48 @@ def test_losses():
 
     tf.reset_default_graph()
 
+
+@pytest.mark.light
+def test_vectorized_losses():
+    rs = np.random.RandomState(0)
+    entity_embedding_size = 4
+    predicate_names = ['p{}'.format(i) for i in range(8)]
+    predicate_to_index = {name: idx + 1 for idx, name in enumerate(predicate_names)}
+
+    clause_strs = ['p0(X, Y) :- p1(X, Y)', 'p1(X, Y) :- p0(X, Y)', 'p2(X, Y) :- p3(Y, X)',
+                   'p4(X, Y) :- p5(Y, X)', 'p6(X, Y) :- p7(X, Y)', 'p3(X, Y) :- p4(Y, X)']
+    clauses = [parse_clause(clause_str) for clause_str in clause_strs]
+
+    for model_name in ['TransE', 'DistMult', 'ComplEx', 'RESCAL']:
+        embedding_size = entity_embedding_size ** 2 if model_name == 'RESCAL' else entity_embedding_size
+        P = rs.randn(len(predicate_names) + 1, embedding_size)
+        predicate_embedding_layer = tf.Variable(P, name='predicates')
+
+        loss = clauses_to_equality_loss(model_name, clauses, 'l2_sqr', predicate_embedding_layer, predicate_to_index,
+                                        entity_embedding_size=entity_embedding_size)
+
+        def inverse(x):
+            if model_name == 'TransE':
+                return - x
+            elif model_name == 'ComplEx':
+                return np.concatenate([x[:entity_embedding_size // 2], - x[entity_embedding_size // 2:]])
+            elif model_name == 'RESCAL':
+                return x.reshape(entity_embedding_size, entity_embedding_size).T.reshape(-1)
+            return x
+
+        # p1(X, Y) :- p0(X, Y) is equivalent to the first clause, and only counted once
+        expected_loss = 0.0
+        for clause in clauses[:1] + clauses[2:]:
+            head, body = P[predicate_to_index[clause.head.predicate.name]], P[predicate_to_index[clause.body[0].predicate.name]]
+            is_inverse = clause.head.arguments[0].name != clause.body[0].arguments[0].name
+            expected_loss += np.square(head - (inverse(body) if is_inverse else body)).sum()
+
+        with tf.Session() as session:
+            session.run(tf.global_variables_initializer())
+            np.testing.assert_allclose(session.run(loss), expected_loss, rtol=1e-6)
+
+        tf.reset_default_graph()
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
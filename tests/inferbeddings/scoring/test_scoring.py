@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+
+import pytest
+
+import numpy as np
+
+from inferbeddings import scoring
+
+
+def _inputs(random_state, nb_entities=8, nb_predicates=4, walk_length=2, batch_size=16):
+    Xr = random_state.randint(1, nb_predicates + 1, size=(batch_size, walk_length))
+    Xe = random_state.randint(1, nb_entities + 1, size=(batch_size, 2))
+    return Xr, Xe
+
+
+@pytest.mark.light
+def test_compositional_engines():
+    rs = np.random.RandomState(0)
+    k = 6
+    E, P = rs.randn(9, k), rs.randn(5, k)
+    Xr, Xe = _inputs(rs)
+
+    for i in range(Xr.shape[0]):
+        s, o, p1, p2 = E[Xe[i, 0]], E[Xe[i, 1]], P[Xr[i, 0]], P[Xr[i, 1]]
+
+        score = scoring.get_function('TransE')(E, P, similarity_name='l1')([Xr[i:i + 1], Xe[i:i + 1]])[0]
+        np.testing.assert_allclose(score, - np.sum(np.abs(s + p1 + p2 - o)))
+
+        score = scoring.get_function('DistMult')(E, P)([Xr[i:i + 1], Xe[i:i + 1]])[0]
+        np.testing.assert_allclose(score, np.sum(s * p1 * p2 * o))
+
+        # ComplEx: Re(<s, w, conj(o)>), where w is the Hermitian product of the predicate embeddings
+        cs, co = s[:3] + 1j * s[3:], o[:3] + 1j * o[3:]
+        cw = np.conj(p1[:3] + 1j * p1[3:]) * (p2[:3] + 1j * p2[3:])
+        score = scoring.get_function('ComplEx')(E, P)([Xr[i:i + 1], Xe[i:i + 1]])[0]
+        np.testing.assert_allclose(score, np.real(np.sum(cs * cw * np.conj(co))))
+
+
+@pytest.mark.light
+def test_bilinear_engines():
+    rs = np.random.RandomState(0)
+    k, h = 3, 5
+    E, P = rs.randn(9, k), rs.randn(5, k * k)
+    Xr, Xe = _inputs(rs)
+
+    scores = scoring.get_function('RESCAL')(E, P)([Xr, Xe])
+    for i in range(Xr.shape[0]):
+        W = np.dot(P[Xr[i, 0]].reshape(k, k), P[Xr[i, 1]].reshape(k, k))
+        np.testing.assert_allclose(scores[i], np.dot(np.dot(E[Xe[i, 0]], W), E[Xe[i, 1]]))
+
+    P = rs.randn(5, k)
+    C, w = rs.randn(3 * k, h), rs.randn(h, 1)
+    scores = scoring.get_function('ERMLP')(E, P, parameters={'C': C, 'w': w})([Xr, Xe])
+    for i in range(Xr.shape[0]):
+        e = np.concatenate([E[Xe[i, 0]], E[Xe[i, 1]], P[Xr[i, 0]]])
+        np.testing.assert_allclose(scores[i], np.dot(np.tanh(np.dot(e, C)), w)[0])
+
+    with pytest.raises(ValueError):
+        scoring.get_function('TransR')
+
+
+@pytest.mark.light
+def test_export(tmpdir):
+    rs = np.random.RandomState(0)
+    k, h = 4, 3
+    E, P = rs.randn(9, k).astype(np.float32), rs.randn(5, k).astype(np.float32)
+    C, w = rs.randn(3 * k, h).astype(np.float32), rs.randn(h, 1).astype(np.float32)
+    Xr, Xe = _inputs(rs, walk_length=1)
+
+    path = str(tmpdir.join('export'))
+    scoring.export_embeddings(path, 'ERMLP', 'dot', E, P,
+                              entity_to_index={'a': 1, 'b': 2}, predicate_to_index={'p': 1},
+                              parameters={'C': C, 'w': w}, metadata={'command_line': ['--model', 'ERMLP']})
+
+    manifest, arrays = scoring.load_embeddings(path)
+    assert manifest['nb_entities'] == 8 and manifest['predicate_embedding_size'] == k
+    assert isinstance(arrays['entities'], np.memmap) and not arrays['entities'].flags.writeable
+    np.testing.assert_array_equal(arrays['parameters/C'], C)
+    assert scoring.load_vocabularies(path) == ({'a': 1, 'b': 2}, {'p': 1})
+
+    engine = scoring.load_engine(path)
+    expected = scoring.get_function('ERMLP')(E, P, parameters={'C': C, 'w': w})([Xr, Xe])
+    np.testing.assert_array_equal(engine([Xr, Xe]), expected)
+
+    # Exports written by later versions of the format are rejected
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(dict(manifest, version=manifest['version'] + 1), f)
+    with pytest.raises(ValueError):
+        scoring.load_engine(path)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
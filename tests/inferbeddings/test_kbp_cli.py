@@ -58,5 +58,27 @@ def test_nations_cli():
     # Hits@10 should be at least 85% even after a limited number of epochs
     assert float(err.split()[-1][:-1]) > 85.0
 
+
+@pytest.mark.light
+def test_nations_path_queries_cli():
+    # Variable-length path queries are scored by a masked copy of the model, sharing its parameters
+    for model_name in ['ComplEx', 'ERMLP']:
+        cmd = ['./bin/kbp-cli.py',
+               '--train', 'data/nations/stratified_folds/0/nations_train.tsv.gz',
+               '--valid', 'data/nations/stratified_folds/0/nations_valid.tsv.gz',
+               '--lr', '0.1',
+               '--model', model_name,
+               '--similarity', 'dot',
+               '--margin', '1',
+               '--embedding-size', '10',
+               '--hidden-size', '10',
+               '--nb-epochs', '2',
+               '--path-lengths', '1', '2', '3',
+               '--nb-path-queries', '100',
+               '--path-eval-queries', '20']
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = p.communicate()
+        assert p.returncode == 0, err.decode('utf-8')
+
 if __name__ == '__main__':
     pytest.main([__file__])
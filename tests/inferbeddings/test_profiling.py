@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from inferbeddings.profiling import PhaseProfiler
+
+
+@pytest.mark.light
+def test_phase_profiler():
+    profiler = PhaseProfiler()
+
+    with profiler.phase('data loading'):
+        pass
+
+    for epoch in range(1, 3):
+        profiler.set_epoch(epoch)
+        for _ in range(3):
+            profiler.start('training')
+            with profiler.phase('session.run'):
+                pass
+            with profiler.phase('projection'):
+                pass
+            profiler.stop()
+    profiler.set_epoch(None)
+
+    with profiler.phase('evaluation'):
+        pass
+
+    assert list(profiler.totals.keys()) == ['data loading', 'training/session.run', 'training/projection',
+                                            'training', 'evaluation']
+    assert profiler.counts['data loading'] == 1
+    assert profiler.counts['training'] == profiler.counts['training/session.run'] == 6
+    assert profiler.totals['training'] >= profiler.totals['training/session.run'] + profiler.totals['training/projection']
+
+    # Phases outside of epochs are only accounted for in the totals
+    assert sorted(profiler.epoch_totals.keys()) == [1, 2]
+    assert set(profiler.epoch_totals[1].keys()) == {'training', 'training/session.run', 'training/projection'}
+
+    report = profiler.report().split('\n')
+    assert report[0] == 'Total:'
+    assert report[1].startswith('  data loading: ')
+    assert report[4].startswith('    projection: ') and '% of training)' in report[4]
+    assert 'Epoch 2:' in report
+
+    profile = json.loads(json.dumps(profiler.to_json()))
+    assert profile['total']['training/session.run']['calls'] == 6
+    assert set(profile['epochs'].keys()) == {'1', '2'}
+
+
+@pytest.mark.light
+def test_disabled_phase_profiler():
+    profiler = PhaseProfiler(enabled=False)
+
+    profiler.set_epoch(1)
+    with profiler.phase('training'):
+        profiler.start('session.run')
+        profiler.stop()
+
+    assert profiler.totals == {} and profiler.epoch_totals == {}
+    assert profiler.phase('a') is profiler.phase('b')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import numpy as np
+
+import pytest
+
+from inferbeddings.evaluation import evaluate_ranks
+from inferbeddings.scoring import BilinearDiagonalEngine
+from inferbeddings.sweep import SweepRunner, cartesian_product, command_to_argv, data_paths, flatten_results
+
+
+def _main(argv):
+    # Stands in for kbp-cli.py: fails for lr=0, and saves the results JSON otherwise
+    args = dict(zip(argv[::2], argv[1::2]))
+    print('Running with {}'.format(argv))
+    lr = float(args['--lr'])
+    if lr == 0:
+        raise ValueError('Invalid learning rate')
+    results = {'valid': {'filtered': {'global': {'mrr': lr, 'hits@10': 2 * lr},
+                                      'left': {'mrr': 0.0, 'hits@10': 0.0}}}}
+    with open(args['--results-json'], 'w') as f:
+        json.dump({'command_line': argv, 'results': results}, f)
+
+
+def _evaluate(nb_workers):
+    rs = np.random.RandomState(0)
+    nb_entities, nb_predicates = 20, 3
+    engine = BilinearDiagonalEngine(rs.randn(nb_entities + 1, 5), rs.randn(nb_predicates + 1, 5))
+    triples = [(int(s), int(p), int(o)) for s, p, o in zip(rs.randint(1, nb_entities + 1, 30),
+                                                            rs.randint(1, nb_predicates + 1, 30),
+                                                            rs.randint(1, nb_entities + 1, 30))]
+    results = {}
+    evaluate_ranks(engine, triples, nb_entities, true_triples=triples, tag='test', results=results,
+                   nb_workers=nb_workers)
+    return results
+
+
+def _ranking_main(argv):
+    # Stands in for kbp-cli.py --eval-workers: ranks triples using a pool of worker processes
+    args = dict(zip(argv[::2], argv[1::2]))
+    results = _evaluate(int(args['--eval-workers']))
+    with open(args['--results-json'], 'w') as f:
+        json.dump({'command_line': argv, 'results': results}, f)
+
+
+def _to_argv(c):
+    return ['--model', c['model'], '--lr', str(c['lr'])]
+
+
+@pytest.mark.light
+def test_sweep_utils():
+    configurations = cartesian_product(dict(model=['TransE', 'DistMult'], lr=[0.1, 1]))
+    assert len(configurations) == 4 and dict(model='DistMult', lr=1) in configurations
+
+    argv = command_to_argv('python3 /path/bin/kbp-cli.py --train /data/train.txt --valid=/data/valid.txt --lr 0.1')
+    assert argv == ['--train', '/data/train.txt', '--valid=/data/valid.txt', '--lr', '0.1']
+    assert data_paths(argv) == ['/data/train.txt', '/data/valid.txt']
+
+    assert flatten_results({'valid': {'filtered': {'mrr': 1.0}}, 'test': {'map': 0.5}}) == \
+        {'valid/filtered/mrr': 1.0, 'test/map': 0.5}
+
+
+@pytest.mark.light
+def test_sweep_runner(tmpdir):
+    log_dir = str(tmpdir.join('logs'))
+    configurations = cartesian_product(dict(model=['TransE', 'DistMult'], lr=[0, 0.1, 1]))
+
+    runner = SweepRunner(_main, _to_argv, log_dir, prefix='test.', nb_workers=2)
+    outcomes = runner.run(configurations)
+
+    assert len(outcomes) == 6
+    failed = {trial.configuration['lr'] for trial, error in outcomes if error is not None}
+    assert failed == {0}
+
+    # The output of each trial is in its log file
+    trial = runner.trials([dict(model='TransE', lr=0.1)])[0]
+    with open(trial.log_path, 'r') as f:
+        assert 'Running with' in f.read()
+    assert os.path.basename(trial.log_path) == 'test.lr=0.1_model=TransE.log'
+
+    # Completed trials are skipped, failed ones are run again
+    outcomes = runner.run(configurations)
+    assert sorted(trial.configuration['model'] for trial, _ in outcomes) == ['DistMult', 'TransE']
+
+    columns, rows = runner.results_table(configurations, metrics=['mrr', 'hits@10'])
+    assert columns == ['lr', 'model', 'valid/filtered/global/hits@10', 'valid/filtered/global/mrr']
+    assert len(rows) == 4
+    assert {(row['model'], row['lr'], row['valid/filtered/global/mrr']) for row in rows} == \
+        {('TransE', 0.1, 0.1), ('TransE', 1, 1.0), ('DistMult', 0.1, 0.1), ('DistMult', 1, 1.0)}
+
+
+@pytest.mark.light
+def test_sweep_runner_eval_workers(tmpdir):
+    log_dir = str(tmpdir.join('logs'))
+    configurations = cartesian_product(dict(model=['DistMult'], lr=[0.1, 1]))
+
+    def to_argv(c):
+        return _to_argv(c) + ['--eval-workers', '2']
+
+    # Trials run in daemonic pool workers, which rank the triples themselves rather than starting a pool
+    runner = SweepRunner(_ranking_main, to_argv, log_dir, nb_workers=2)
+    outcomes = runner.run(configurations)
+    assert [error for _, error in outcomes] == [None, None]
+
+    _, rows = runner.results_table(configurations, metrics=['mrr'])
+    expected_mrr = _evaluate(nb_workers=2)['test']['filtered']['global']['mrr']
+    assert [row['test/filtered/global/mrr'] for row in rows] == [expected_mrr, expected_mrr]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
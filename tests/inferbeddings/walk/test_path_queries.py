@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import numpy as np
+
+from inferbeddings.walk import PathQuerySampler, adjacency_matrices, path_query_answers, held_out_path_queries
+
+
+def _brute_force_answers(triples, walk, source, inverse=False):
+    reached = {source}
+    for p in (reversed(walk) if inverse else walk):
+        if inverse:
+            reached = {s for (s, _p, o) in triples if _p == p and o in reached}
+        else:
+            reached = {o for (s, _p, o) in triples if _p == p and s in reached}
+    return reached
+
+
+@pytest.mark.light
+def test_path_queries():
+    rs = np.random.RandomState(0)
+    nb_entities, nb_predicates = 30, 3
+    triples = sorted({(int(s), int(p), int(o)) for s, p, o in zip(rs.randint(1, nb_entities + 1, 120),
+                                                                 rs.randint(1, nb_predicates + 1, 120),
+                                                                 rs.randint(1, nb_entities + 1, 120))})
+
+    walks, entities = PathQuerySampler(triples, seed=0)(nb_queries=200, length=3)
+    assert walks.shape == (200, 3) and entities.shape == (200, 2)
+
+    predicate_to_adjacency = adjacency_matrices(triples, nb_entities)
+    objects = path_query_answers(predicate_to_adjacency, walks, entities[:, 0], nb_entities)
+    subjects = path_query_answers(predicate_to_adjacency, walks, entities[:, 1], nb_entities, inverse=True)
+
+    for i, (walk, (s, o)) in enumerate(zip(walks.tolist(), entities.tolist())):
+        objects_i = set(objects.indices[objects.indptr[i]:objects.indptr[i + 1]].tolist())
+        subjects_i = set(subjects.indices[subjects.indptr[i]:subjects.indptr[i + 1]].tolist())
+
+        # Sampled queries follow edges in their direction, so their target is always an answer
+        assert o in objects_i and s in subjects_i
+        assert objects_i == _brute_force_answers(triples, walk, s)
+        assert subjects_i == _brute_force_answers(triples, walk, o, inverse=True)
+
+    train_triples, test_triples = triples[:80], triples[80:]
+    walks, entities = held_out_path_queries(train_triples, triples, nb_queries=200, length=2,
+                                            nb_entities=nb_entities, seed=0)
+    assert walks.shape[0] > 0
+    for walk, (s, o) in zip(walks.tolist(), entities.tolist()):
+        assert o in _brute_force_answers(triples, walk, s)
+        assert o not in _brute_force_answers(train_triples, walk, s)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -2,6 +2,8 @@
 
 import pytest
 
+import numpy as np
+
 from inferbeddings.walk import BidirectionalWalker
 
 
@@ -18,5 +20,43 @@ def test_walker():
     assert len(walk) == 2
 
 
+@pytest.mark.light
+def test_walker_consistency():
+    triples = [
+        ('A', 'p', 'B'),
+        ('B', 'p', 'C'),
+        ('B', 'q', 'B'),
+        ('C', 'q', 'A'),
+        ('C', 'r', 'D')
+    ]
+
+    walker = BidirectionalWalker(triples=triples)
+    for _ in range(100):
+        [(p, is_inverse)], [s, o] = walker(length=1)
+        assert ((o, p, s) if is_inverse else (s, p, o)) in triples
+
+    steps, [s, o] = walker(length=0)
+    assert steps == [] and s == o
+
+    entity_to_index = {'A': 1, 'B': 2, 'C': 3, 'D': 4}
+    predicate_to_index = {'p': 1, 'q': 2, 'r': 3}
+    index_triples = {(entity_to_index[s], predicate_to_index[p], entity_to_index[o]) for (s, p, o) in triples}
+
+    walker = BidirectionalWalker(triples=triples, entity_to_index=entity_to_index,
+                                 predicate_to_index=predicate_to_index)
+    steps, entities = walker.sample(nb_walks=1000, length=1)
+    assert steps.shape == (1000, 1, 2) and entities.shape == (1000, 2)
+
+    for (p, is_inverse), (s, o) in zip(steps[:, 0, :], entities):
+        assert ((o, p, s) if is_inverse else (s, p, o)) in index_triples
+
+    # From B, predicates p and q are equally likely, and so are the edges B -p^-1-> A and B -p-> C
+    from_b = steps[entities[:, 0] == 2, 0, :]
+    nb_q = np.sum(from_b[:, 0] == 2)
+    assert 0.35 < nb_q / len(from_b) < 0.65
+    nb_inverse_p = np.sum((from_b[:, 0] == 1) & (from_b[:, 1] == 1))
+    assert 0.35 < nb_inverse_p / (len(from_b) - nb_q) < 0.65
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks the hot paths of the Knowledge Base pipeline on synthetic Knowledge Bases, e.g.:
+
+    $ ./tools/benchmark.py run --scales small medium --output after.json
+    $ ./tools/benchmark.py compare before.json after.json --threshold 0.1
+
+The synthetic Knowledge Bases only depend on the scale and on the seed, so that runs are comparable across
+machines and revisions; benchmarks whose dependencies (e.g. TensorFlow) are missing are marked as skipped.
+"""
+
+import contextlib
+import datetime
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from collections import OrderedDict
+
+import argparse
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+SCALES = OrderedDict([
+    ('small', dict(nb_entities=1000, nb_predicates=20, nb_triples=10000, nb_test_triples=100)),
+    ('medium', dict(nb_entities=10000, nb_predicates=100, nb_triples=100000, nb_test_triples=200)),
+    ('large', dict(nb_entities=50000, nb_predicates=500, nb_triples=1000000, nb_test_triples=200))
+])
+
+# Clauses used by the materialization and the GroundLoss benchmarks
+CLAUSES = [
+    'p1(X, Y) :- p0(X, Y)',
+    'p2(X, Y) :- p3(Y, X)',
+    'p4(X, Z) :- p5(X, Y), p6(Y, Z)'
+]
+
+MODEL_NAMES = ['TransE', 'DistMult', 'ComplEx', 'RESCAL', 'ERMLP']
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """
+    Registers a benchmark: the decorated function receives a KnowledgeBase and returns
+    a function without arguments, whose execution time is measured. Setups that hold resources
+    (e.g. temporary files) yield the function instead, and release them once the runs are over.
+    """
+    def decorator(setup):
+        def generator_setup(kb):
+            yield setup(kb)
+        BENCHMARKS[name] = contextlib.contextmanager(setup if inspect.isgeneratorfunction(setup) else generator_setup)
+        return setup
+    return decorator
+
+
+class KnowledgeBase:
+    def __init__(self, nb_entities, nb_predicates, nb_triples, nb_test_triples, seed=0):
+        """
+        Synthetic Knowledge Base, where predicate frequencies follow a Zipf-like distribution.
+        """
+        rs = np.random.RandomState(seed)
+        predicate_probabilities = 1.0 / np.arange(1, nb_predicates + 1)
+        predicate_probabilities /= predicate_probabilities.sum()
+
+        s = rs.randint(nb_entities, size=nb_triples + nb_test_triples)
+        p = rs.choice(nb_predicates, size=nb_triples + nb_test_triples, p=predicate_probabilities)
+        o = rs.randint(nb_entities, size=nb_triples + nb_test_triples)
+
+        triples = list(OrderedDict.fromkeys(('e{}'.format(_s), 'p{}'.format(_p), 'e{}'.format(_o))
+                                            for _s, _p, _o in zip(s, p, o)))
+        self.train_triples, self.test_triples = triples[:-nb_test_triples], triples[-nb_test_triples:]
+
+        self.nb_entities, self.nb_predicates = nb_entities, nb_predicates
+        self.seed = seed
+
+        # Index triples, where entities and predicates are numbered from 1 as in KnowledgeBaseParser
+        def to_idx(triple):
+            return int(triple[0][1:]) + 1, int(triple[1][1:]) + 1, int(triple[2][1:]) + 1
+        self.train_idx_triples = [to_idx(t) for t in self.train_triples]
+        self.test_idx_triples = [to_idx(t) for t in self.test_triples]
+
+    def engine(self, model_name='DistMult', embedding_size=20):
+        from inferbeddings import scoring
+        rs = np.random.RandomState(self.seed)
+        predicate_embedding_size = embedding_size ** 2 if model_name == 'RESCAL' else embedding_size
+        return scoring.get_function(model_name)(
+            rs.randn(self.nb_entities + 1, embedding_size).astype(np.float32),
+            rs.randn(self.nb_predicates + 1, predicate_embedding_size).astype(np.float32))
+
+
+@benchmark('read_triples')
+def read_triples_benchmark(kb):
+    from inferbeddings.io import read_triples
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'train.tsv')
+        with open(path, 'w') as f:
+            f.writelines('{}\t{}\t{}\n'.format(s, p, o) for s, p, o in kb.train_triples)
+        yield lambda: read_triples(path)
+
+
+@benchmark('parser')
+def parser_benchmark(kb):
+    from inferbeddings.knowledgebase import Fact, KnowledgeBaseParser
+    facts = [Fact(predicate_name=p, argument_names=[s, o]) for s, p, o in kb.train_triples]
+
+    def run():
+        parser = KnowledgeBaseParser(facts)
+        parser.facts_to_sequences(facts)
+    return run
+
+
+@benchmark('corruption')
+def corruption_benchmark(kb):
+    from inferbeddings.models.training import corrupt, index
+    Xr = np.array([[p] for (_, p, _) in kb.train_idx_triples])
+    Xe = np.array([[s, o] for (s, _, o) in kb.train_idx_triples])
+    index_gen = index.GlorotIndexGenerator()
+    candidate_indices = np.arange(1, kb.nb_entities + 1)
+    subject_corruptor = corrupt.SimpleCorruptor(index_generator=index_gen, candidate_indices=candidate_indices,
+                                                corrupt_objects=False)
+    object_corruptor = corrupt.SimpleCorruptor(index_generator=index_gen, candidate_indices=candidate_indices,
+                                               corrupt_objects=True)
+
+    def run():
+        subject_corruptor(Xr, Xe)
+        object_corruptor(Xr, Xe)
+    return run
+
+
+def training_epoch_benchmark(model_name, nb_batches=10, embedding_size=20):
+    def setup(kb):
+        import tensorflow as tf
+        from inferbeddings.models import base as models
+        from inferbeddings.models import similarities
+        from inferbeddings.models.training import pairwise_losses
+        from inferbeddings.models.training.util import make_batches
+
+        tf.reset_default_graph()
+        tf.set_random_seed(kb.seed)
+        rs = np.random.RandomState(kb.seed)
+
+        predicate_embedding_size = embedding_size ** 2 if model_name == 'RESCAL' else embedding_size
+        entity_inputs = tf.placeholder(tf.int32, shape=[None, 2])
+        walk_inputs = tf.placeholder(tf.int32, shape=[None, None])
+        entity_embedding_layer = tf.get_variable('entities', shape=[kb.nb_entities + 1, embedding_size],
+                                                 initializer=tf.contrib.layers.xavier_initializer())
+        predicate_embedding_layer = tf.get_variable('predicates', shape=[kb.nb_predicates + 1, predicate_embedding_size],
+                                                    initializer=tf.contrib.layers.xavier_initializer())
+
+        model = models.get_function(model_name)(
+            entity_embeddings=tf.nn.embedding_lookup(entity_embedding_layer, entity_inputs),
+            predicate_embeddings=tf.nn.embedding_lookup(predicate_embedding_layer, walk_inputs),
+            similarity_function=similarities.get_function('dot'), hidden_size=embedding_size)
+        score = model()
+
+        # Each positive example is followed by a negative one
+        positive_scores, negative_scores = tf.split(axis=1, num_or_size_splits=2, value=tf.reshape(score, [-1, 2]))
+        loss = pairwise_losses.get_function('hinge')(positive_scores, negative_scores, margin=1.0)
+        training_step = tf.train.AdagradOptimizer(learning_rate=0.1).minimize(loss)
+
+        Xr = np.array([[p] for (_, p, _) in kb.train_idx_triples])
+        Xe = np.array([[s, o] for (s, _, o) in kb.train_idx_triples])
+        Xe_neg = np.copy(Xe)
+        Xe_neg[:, 1] = rs.randint(1, kb.nb_entities + 1, size=Xe.shape[0])
+
+        session = tf.Session()
+        session.run(tf.global_variables_initializer())
+
+        def run():
+            for batch_start, batch_end in make_batches(Xr.shape[0], int(np.ceil(Xr.shape[0] / nb_batches))):
+                Xr_batch = np.repeat(Xr[batch_start:batch_end], 2, axis=0)
+                Xe_batch = np.zeros((2 * (batch_end - batch_start), 2), dtype=Xe.dtype)
+                Xe_batch[0::2], Xe_batch[1::2] = Xe[batch_start:batch_end], Xe_neg[batch_start:batch_end]
+                session.run(training_step, feed_dict={walk_inputs: Xr_batch, entity_inputs: Xe_batch})
+        return run
+    return setup
+
+
+for _model_name in MODEL_NAMES:
+    benchmark('train_epoch_{}'.format(_model_name))(training_epoch_benchmark(_model_name))
+
+
+@benchmark('ranker')
+def ranker_benchmark(kb):
+    from inferbeddings.evaluation import metrics
+    ranker = metrics.Ranker(scoring_function=kb.engine(), nb_entities=kb.nb_entities,
+                            true_triples=kb.train_idx_triples + kb.test_idx_triples)
+    return lambda: ranker(kb.test_idx_triples)
+
+
+def _negative_triples(kb):
+    rs = np.random.RandomState(kb.seed)
+    return [(s, p, int(o)) for (s, p, _), o in zip(kb.test_idx_triples,
+                                                    rs.randint(1, kb.nb_entities + 1, len(kb.test_idx_triples)))]
+
+
+@benchmark('map')
+def map_benchmark(kb):
+    from inferbeddings.evaluation import metrics
+    mean_average_precision = metrics.MeanAveragePrecision(scoring_function=kb.engine())
+    neg_triples = _negative_triples(kb)
+    return lambda: mean_average_precision(kb.test_idx_triples, neg_triples)
+
+
+@benchmark('auc')
+def auc_benchmark(kb):
+    from inferbeddings.evaluation import metrics
+    auc = metrics.AUC(scoring_function=kb.engine(), nb_entities=kb.nb_entities, nb_predicates=kb.nb_predicates)
+    neg_triples = _negative_triples(kb)
+    return lambda: auc(kb.test_idx_triples, neg_triples)
+
+
+@benchmark('ground_loss')
+def ground_loss_benchmark(kb, sample_size=1024):
+    from inferbeddings.adversarial.ground import GroundLoss
+    from inferbeddings.parse import parse_clause
+    from inferbeddings.knowledgebase import Fact, KnowledgeBaseParser
+
+    parser = KnowledgeBaseParser([Fact(predicate_name=p, argument_names=[s, o]) for s, p, o in kb.train_triples])
+    clauses = [parse_clause(clause_str) for clause_str in CLAUSES]
+    ground_loss = GroundLoss(clauses=clauses, parser=parser, scoring_function=kb.engine())
+    entity_indices = sorted(parser.index_to_entity.keys())
+    clause_to_feed_dicts = {clause: GroundLoss.sample_mappings(GroundLoss.get_variable_names(clause),
+                                                               entities=entity_indices, sample_size=sample_size)
+                            for clause in clauses}
+
+    def run():
+        for clause in clauses:
+            ground_loss.zero_one_errors(clause=clause, feed_dicts=clause_to_feed_dicts[clause])
+    return run
+
+
+@benchmark('materialization')
+def materialization_benchmark(kb):
+    from inferbeddings.logic import closure
+    from inferbeddings.parse import parse_clause
+    clauses = [parse_clause(clause_str) for clause_str in CLAUSES]
+    return lambda: closure(kb.train_triples, clauses)
+
+
+def measure(run, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        times += [time.perf_counter() - t0]
+    return {
+        'times': times,
+        'min': float(np.min(times)),
+        'median': float(np.median(times)),
+        'mean': float(np.mean(times))
+    }
+
+
+def metadata(argv):
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'command_line': argv,
+        'timestamp': datetime.datetime.now().isoformat(),
+        'commit': commit,
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__
+    }
+
+
+def run_benchmarks(args, argv):
+    names = args.benchmarks if args.benchmarks else list(BENCHMARKS.keys())
+    unknown_names = set(names) - set(BENCHMARKS.keys())
+    if unknown_names:
+        raise ValueError('Unknown benchmarks: {}'.format(', '.join(sorted(unknown_names))))
+
+    results = OrderedDict()
+    for scale in args.scales:
+        kb = KnowledgeBase(seed=args.seed, **SCALES[scale])
+        logger.info('Scale: {} ({} training triples)'.format(scale, len(kb.train_triples)))
+
+        for name in names:
+            key = '{}/{}'.format(scale, name)
+            with contextlib.ExitStack() as stack:
+                try:
+                    run = stack.enter_context(BENCHMARKS[name](kb))
+                except ImportError as e:
+                    logger.warning('{}: skipped ({})'.format(key, e))
+                    results[key] = {'skipped': str(e)}
+                    continue
+
+                results[key] = measure(run, repeat=args.repeat)
+            logger.info('{}: median {:.4f}s, min {:.4f}s'.format(key, results[key]['median'], results[key]['min']))
+
+    with open(args.output, 'w') as f:
+        json.dump({'metadata': metadata(argv), 'results': results}, f, indent=2)
+    logger.info('Results saved in {}'.format(args.output))
+
+
+def compare_benchmarks(args):
+    with open(args.before, 'r') as f:
+        before = json.load(f)['results']
+    with open(args.after, 'r') as f:
+        after = json.load(f)['results']
+
+    nb_regressions = 0
+    print('{:<40} {:>12} {:>12} {:>8}'.format('benchmark', 'before (s)', 'after (s)', 'ratio'))
+    for key in [key for key in before if key in after]:
+        if 'median' not in before[key] or 'median' not in after[key]:
+            continue
+        ratio = after[key]['median'] / before[key]['median'] if before[key]['median'] > 0 else float('inf')
+        flag = ''
+        if ratio > 1.0 + args.threshold:
+            flag, nb_regressions = 'REGRESSION', nb_regressions + 1
+        elif ratio < 1.0 / (1.0 + args.threshold):
+            flag = 'improvement'
+        print('{:<40} {:>12.4f} {:>12.4f} {:>8.2f} {}'.format(key, before[key]['median'], after[key]['median'],
+                                                              ratio, flag))
+
+    print('Regressions: {}'.format(nb_regressions))
+    return 1 if nb_regressions > 0 else 0
+
+
+def main(argv):
+    def formatter(prog):
+        return argparse.HelpFormatter(prog, max_help_position=100, width=200)
+
+    argparser = argparse.ArgumentParser('Benchmark suite for the Knowledge Base pipeline', formatter_class=formatter)
+    subparsers = argparser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks', formatter_class=formatter)
+    run_parser.add_argument('--scales', nargs='+', choices=list(SCALES.keys()), default=['small'],
+                            help='Scales of the synthetic Knowledge Bases')
+    run_parser.add_argument('--benchmarks', '-b', nargs='+', type=str, default=None,
+                            help='Benchmarks to run (default: all) - {}'.format(', '.join(BENCHMARKS.keys())))
+    run_parser.add_argument('--repeat', '-r', action='store', type=int, default=3, help='Repetitions per benchmark')
+    run_parser.add_argument('--seed', '-S', action='store', type=int, default=0, help='Seed of the synthetic KBs')
+    run_parser.add_argument('--output', '-o', action='store', type=str, required=True, help='JSON results file')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two runs', formatter_class=formatter)
+    compare_parser.add_argument('before', type=str, help='JSON results of the baseline run')
+    compare_parser.add_argument('after', type=str, help='JSON results of the new run')
+    compare_parser.add_argument('--threshold', '-t', action='store', type=float, default=0.1,
+                                help='Relative slowdown of the median time flagged as a regression')
+
+    args = argparser.parse_args(argv)
+
+    if args.command == 'run':
+        run_benchmarks(args, argv)
+    elif args.command == 'compare':
+        sys.exit(compare_benchmarks(args))
+    else:
+        argparser.print_help()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import glob
+import json
+import os
+import sys
+
+import argparse
+import logging
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def main(argv):
+    def formatter(prog):
+        return argparse.HelpFormatter(prog, max_help_position=100, width=200)
+
+    argparser = argparse.ArgumentParser('Parse the JSON results generated by kbp-cli.py --results-json',
+                                        formatter_class=formatter)
+    argparser.add_argument('paths', nargs='+', type=str, help='JSON result files, or directories containing them')
+    argparser.add_argument('--setting', '-s', action='store', type=str, default='filtered', help='raw or filtered')
+    argparser.add_argument('--metric', '-m', action='store', type=str, default='mrr',
+                           help='Metric used for model selection on the validation set '
+                                '(mrr, mean, median, hits@N, or auc_roc, auc_pr, map for --auc/--map results)')
+    args = argparser.parse_args(argv)
+
+    file_paths = []
+    for path in args.paths:
+        file_paths += sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+
+    setting, metric = args.setting, args.metric
+
+    def global_results(tag_results):
+        # AUC and MAP summaries are {metric: value} dictionaries, while rank summaries are
+        # {setting: {'global': {metric: value}, ..}} dictionaries
+        if setting in tag_results and isinstance(tag_results[setting], dict):
+            return tag_results[setting].get('global', {})
+        return {name: value for name, value in tag_results.items() if not isinstance(value, dict)}
+
+    path_to_results, available_metrics = {}, set()
+    for file_path in file_paths:
+        with open(file_path, 'r') as f:
+            results = json.load(f)['results']
+        if 'valid' in results and 'test' in results:
+            valid_results, test_results = global_results(results['valid']), global_results(results['test'])
+            available_metrics |= set(valid_results) & set(test_results)
+            if metric in valid_results and metric in test_results:
+                path_to_results[file_path] = (valid_results, test_results)
+
+    if len(path_to_results) == 0 and len(available_metrics) > 0:
+        argparser.error('No results report the {} metric ({}) - available metrics: {}'
+                        .format(metric, setting, ', '.join(sorted(available_metrics))))
+
+    print('Files: {}'.format(len(path_to_results)))
+    if len(path_to_results) == 0:
+        return
+
+    def valid_value(_path):
+        return path_to_results[_path][0][metric]
+
+    # Lower is better for the mean rank, higher is better for all other metrics
+    select = min if metric in {'mean', 'median'} else max
+    best_path = select(path_to_results, key=valid_value)
+
+    print('Best {} ({}): {}'.format(metric, setting, best_path))
+
+    test_results = path_to_results[best_path][1]
+    rank_metrics = ['mean', 'median', 'mrr', 'hits@1', 'hits@3', 'hits@5', 'hits@10']
+    for name in [name for name in rank_metrics if name in test_results] or sorted(test_results):
+        print('Test - {} {}: {}'.format(setting, name, test_results[name]))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
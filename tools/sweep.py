@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Runs a hyperparameter sweep of kbp-cli.py on the local machine, e.g.:
+
+    $ ./tools/sweep.py scripts/sar/wn18/LOCAL_WN18_SAR_v1.py --logs logs/local_wn18_sar_v1 --table results.tsv
+
+The sweep file is a Python file defining the configurations, either as a list of dictionaries named
+configurations or as one (or a list of) hyperparameter spaces named hyperparameters, whose Cartesian products
+are the configurations, and how to turn each configuration into a command line, either as a to_argv(c) function
+returning the list of kbp-cli.py arguments or as a to_cmd(c, _path=None) function as in the scripts in scripts/.
+It can also define the prefix of the names of the log files, as name.
+"""
+
+import importlib.util
+import os
+import runpy
+import sys
+
+import argparse
+import logging
+
+from inferbeddings import sweep
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def load_kbp_cli_main():
+    spec = importlib.util.spec_from_file_location('kbp_cli', os.path.join(ROOT_PATH, 'bin', 'kbp-cli.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.main
+
+
+def kbp_cli_main(argv):
+    # kbp-cli.py, and hence TensorFlow, is only loaded in the worker processes, after they are forked
+    return load_kbp_cli_main()(argv)
+
+
+def load_sweep(path, root_path):
+    """
+    Loads a sweep file.
+    :return: (name, configurations, to_argv) triple.
+    """
+    definitions = runpy.run_path(path)
+
+    if 'configurations' not in definitions and 'hyperparameters' not in definitions:
+        raise ValueError('{} defines neither configurations nor hyperparameters'.format(path))
+    if 'to_argv' not in definitions and 'to_cmd' not in definitions:
+        raise ValueError('{} defines neither to_argv nor to_cmd'.format(path))
+
+    configurations = definitions.get('configurations')
+    if configurations is None:
+        spaces = definitions['hyperparameters']
+        for space in (spaces if isinstance(spaces, list) else [spaces]):
+            configurations = (configurations or []) + sweep.cartesian_product(space)
+
+    to_argv = definitions.get('to_argv')
+    if to_argv is None:
+        to_cmd = definitions['to_cmd']
+
+        def to_argv(c):
+            return sweep.command_to_argv(to_cmd(c, _path=root_path))
+
+    name = definitions.get('name', os.path.splitext(os.path.basename(path))[0].lower() + '.')
+    return name, configurations, to_argv
+
+
+def main(argv):
+    def formatter(prog):
+        return argparse.HelpFormatter(prog, max_help_position=100, width=200)
+
+    argparser = argparse.ArgumentParser('Run a hyperparameter sweep of kbp-cli.py locally', formatter_class=formatter)
+    argparser.add_argument('sweep', action='store', type=str, help='Sweep file')
+    argparser.add_argument('--logs', '-l', required=True, action='store', type=str,
+                           help='Directory containing the logs and results of the trials')
+    argparser.add_argument('--path', '-p', action='store', type=str, default=ROOT_PATH,
+                           help='Path of the repository, passed to to_cmd')
+    argparser.add_argument('--nb-workers', '-w', action='store', type=int, default=None,
+                           help='Number of trials run in parallel (default: number of CPUs)')
+    argparser.add_argument('--no-cache', action='store_true', help='Read the triple files in each trial')
+    argparser.add_argument('--table', '-t', action='store', type=str, default=None,
+                           help='Path of the tab-separated results table')
+    argparser.add_argument('--metrics', '-m', nargs='+', type=str,
+                           default=['mrr', 'hits@1', 'hits@3', 'hits@10', 'map', 'auc_roc', 'auc_pr'],
+                           help='Metrics reported in the results table')
+    argparser.add_argument('--dry-run', action='store_true', help='Only list the trials that are not completed')
+    args = argparser.parse_args(argv)
+
+    name, configurations, to_argv = load_sweep(args.sweep, args.path)
+
+    if args.dry_run:
+        runner = sweep.SweepRunner(None, to_argv, args.logs, prefix=name)
+        for trial in runner.trials(configurations):
+            if not runner.is_completed(trial):
+                print(' '.join(trial.argv))
+        return
+
+    runner = sweep.SweepRunner(kbp_cli_main, to_argv, args.logs, prefix=name,
+                               nb_workers=args.nb_workers, cache_data=not args.no_cache)
+    outcomes = runner.run(configurations)
+
+    nb_failed = sum(1 for _, error in outcomes if error is not None)
+    if nb_failed > 0:
+        logger.warning('{} of {} trials failed'.format(nb_failed, len(outcomes)))
+
+    columns, rows = runner.results_table(configurations, metrics=args.metrics)
+    logger.info('Completed trials: {}'.format(len(rows)))
+    if args.table is not None:
+        sweep.write_table(args.table, columns, rows)
+    else:
+        print(sweep.format_table(columns, rows), end='')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])